@@ -77,11 +77,36 @@ export async function getCurrentUser() {
   return res.json();
 }
 
-export async function fetchAssessments() {
-  const res = await fetch(`${API_BASE}/assessments`, {
+export const ASSESSMENT_PAGE_SIZE = 50;
+
+export async function fetchAssessments(filters = {}, afterId = null, limit = ASSESSMENT_PAGE_SIZE) {
+  // One keyset page of the listing; pass nextAfterId back for the next one (null after the last page)
+  const params = new URLSearchParams({ limit: String(limit) });
+  for (const [key, value] of Object.entries(filters)) {
+    if (value !== undefined && value !== null && value !== "") params.set(key, value);
+  }
+  if (afterId !== null) params.set("after_id", afterId);
+  const res = await fetch(`${API_BASE}/assessments?${params}`, {
     headers: getAuthHeaders()
   });
   if (!res.ok) throw new Error("Failed to fetch assessments");
+  return { items: await res.json(), nextAfterId: res.headers.get("X-Next-After-Id") };
+}
+
+export async function getAssessment(assessmentId) {
+  const res = await fetch(`${API_BASE}/assessments/${assessmentId}`, {
+    headers: getAuthHeaders()
+  });
+  if (!res.ok) throw new Error("Failed to fetch assessment");
+  return res.json();
+}
+
+export async function getAssessmentSummary() {
+  // Counts per status, kept by the server, so the dashboard needs no full listing for them
+  const res = await fetch(`${API_BASE}/assessments/summary`, {
+    headers: getAuthHeaders()
+  });
+  if (!res.ok) throw new Error("Failed to fetch assessment summary");
   return res.json();
 }
 
@@ -121,6 +146,28 @@ export async function getScreeningAnswers(assessmentId) {
   return Array.isArray(data) ? data : [];
 }
 
+export async function getAssessmentWorkspace(assessmentId) {
+  // Assessment, screening answers, threads and comments in a single request
+  const res = await fetch(`${API_BASE}/assessments/${assessmentId}/workspace`, {
+    headers: getAuthHeaders()
+  });
+  if (res.status === 404) return null;
+  if (!res.ok) throw new Error("Failed to fetch assessment");
+  return res.json();
+}
+
+export function subscribeAssessmentEvents(assessmentId, handlers) {
+  // Server-Sent Events; EventSource reconnects by itself and resumes via Last-Event-ID
+  const token = sessionStorage.getItem('token');
+  const source = new EventSource(
+    `${API_BASE}/assessments/${assessmentId}/events?access_token=${encodeURIComponent(token || "")}`
+  );
+  for (const [type, handler] of Object.entries(handlers)) {
+    source.addEventListener(type, (e) => handler(JSON.parse(e.data)));
+  }
+  return () => source.close();
+}
+
 export async function getApprovers() {
   const res = await fetch(`${API_BASE}/assessments/approvers/list`, {
     headers: getAuthHeaders()
@@ -147,7 +194,7 @@ export async function getThreads(assessmentId) {
   return res.json();
 }
 
-export async function createThread(assessmentId, questionText) {
+export async function createThread(assessmentId, questionText, questionId) {
   const userId = parseInt(sessionStorage.getItem('userId') || '0');
   const res = await fetch(`${API_BASE}/threads`, {
     method: "POST",
@@ -155,6 +202,7 @@ export async function createThread(assessmentId, questionText) {
     body: JSON.stringify({ 
       assessment_id: parseInt(assessmentId),
       question_text: questionText,
+      question_id: questionId,
       opened_by: userId
     }),
   });
@@ -208,3 +256,21 @@ export async function deleteAssessment(assessmentId) {
   }
   return res.json();
 }
+
+export async function searchAssessments(query, limit = 20) {
+  const params = new URLSearchParams({ q: query, limit });
+  const res = await fetch(`${API_BASE}/search/?${params}`, {
+    headers: getAuthHeaders()
+  });
+  if (!res.ok) throw new Error("Failed to search");
+  return res.json();
+}
+
+export async function getQuestionCatalog(version) {
+  const query = version ? `?version=${version}` : "";
+  const res = await fetch(`${API_BASE}/questions/${query}`, {
+    headers: getAuthHeaders()
+  });
+  if (!res.ok) throw new Error("Failed to fetch questions");
+  return res.json();
+}
@@ -1,6 +1,6 @@
 // src/pages/Dashboard.jsx
 import { useEffect, useState } from "react";
-import { fetchAssessments } from "../api";
+import { fetchAssessments, getAssessmentSummary } from "../api";
 import { Link, useNavigate } from "react-router-dom";
 import { 
   Container, 
@@ -47,16 +47,26 @@ const statusLabels = {
 
 export default function Dashboard() {
   const [items, setItems] = useState([]);
+  const [nextAfterId, setNextAfterId] = useState(null);
+  const [summary, setSummary] = useState(null);
+  const [statusFilter, setStatusFilter] = useState("");
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
   const { user, logout } = useAuth();
   const navigate = useNavigate();
 
+  // First page only; the rest comes a page at a time from "Load more"
   const reload = async () => {
     try {
       setLoading(true);
-      const data = await fetchAssessments();
-      setItems(data);
+      const [page, counts] = await Promise.all([
+        fetchAssessments({ status: statusFilter }),
+        getAssessmentSummary()
+      ]);
+      setItems(page.items);
+      setNextAfterId(page.nextAfterId);
+      setSummary(counts);
       setError("");
     } catch (e) {
       setError("Failed to load assessments. Please try again.");
@@ -66,7 +76,21 @@ export default function Dashboard() {
     }
   };
 
-  useEffect(() => { reload(); }, []);
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await fetchAssessments({ status: statusFilter }, nextAfterId);
+      setItems(current => [...current, ...page.items]);
+      setNextAfterId(page.nextAfterId);
+    } catch (e) {
+      setError("Failed to load more assessments. Please try again.");
+      console.error(e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => { reload(); }, [statusFilter]);
 
   const getStatusChip = (status) => {
     const config = statusColors[status] || { color: '#757575', bg: '#f5f5f5' };
@@ -144,6 +168,26 @@ export default function Dashboard() {
 
         {error && <Alert severity="error" sx={{ mb: 3 }}>{error}</Alert>}
 
+        {summary && summary.total > 0 && (
+          <Box sx={{ mb: 3, display: 'flex', flexWrap: 'wrap', gap: 1 }}>
+            <Chip
+              label={`All (${summary.total})`}
+              onClick={() => setStatusFilter("")}
+              color={statusFilter === "" ? 'primary' : 'default'}
+              sx={{ fontWeight: 600 }}
+            />
+            {Object.entries(summary.by_status).map(([status, count]) => (
+              <Chip
+                key={status}
+                label={`${statusLabels[status] || status} (${count})`}
+                onClick={() => setStatusFilter(status)}
+                color={statusFilter === status ? 'primary' : 'default'}
+                sx={{ fontWeight: 600 }}
+              />
+            ))}
+          </Box>
+        )}
+
         {loading ? (
           <Box sx={{ display: 'flex', justifyContent: 'center', py: 8 }}>
             <CircularProgress />
@@ -266,6 +310,19 @@ export default function Dashboard() {
             ))}
           </Grid>
         )}
+
+        {!loading && nextAfterId !== null && (
+          <Box sx={{ display: 'flex', justifyContent: 'center', mt: 4 }}>
+            <Button
+              variant="outlined"
+              onClick={loadMore}
+              disabled={loadingMore}
+              sx={{ textTransform: 'none', fontWeight: 600, borderColor: '#1e3a8a', color: '#1e3a8a' }}
+            >
+              {loadingMore ? <CircularProgress size={20} /> : `Load more (${items.length} shown)`}
+            </Button>
+          </Box>
+        )}
     </Container>
 
     </Box>
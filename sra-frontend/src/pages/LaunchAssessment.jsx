@@ -41,16 +41,16 @@ export default function LaunchAssessment() {
     const loadData = async () => {
       try {
         setLoading(true);
-        const [approversData, assessmentsData] = await Promise.all([
+        // Only this user's approved and completed assessments have answers to reuse;
+        // the server filters by status and owners only get their own
+        const [approversData, approved, completed] = await Promise.all([
           getApprovers(),
-          fetchAssessments()
+          fetchAssessments({ status: 'approved' }),
+          fetchAssessments({ status: 'completed' })
         ]);
         console.log("Approvers loaded:", approversData); // Debug
         setApprovers(approversData || []);
-        // Filter assessments that belong to this user and have answers (approved or completed)
-        setExistingAssessments((assessmentsData || []).filter(a => 
-          a.owner_user_id === user?.id && (a.status === 'approved' || a.status === 'completed')
-        ));
+        setExistingAssessments([...approved.items, ...completed.items].filter(a => a.owner_user_id === user?.id));
         // Don't set error for empty approvers - just show message in dropdown
       } catch (e) {
         console.error("Failed to load data:", e);
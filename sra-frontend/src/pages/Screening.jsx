@@ -1,7 +1,7 @@
 // src/pages/Screening.jsx
 import React, { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
-import { submitScreening, createThread, getThreads, getThreadComments, addComment, fetchAssessments, updateAssessmentStatus, deleteAssessment, getScreeningAnswers, endThread } from "../api";
+import { submitScreening, getQuestionCatalog, createThread, getThreads, getThreadComments, addComment, getAssessment, updateAssessmentStatus, deleteAssessment, getScreeningAnswers, getAssessmentWorkspace, subscribeAssessmentEvents, endThread } from "../api";
 import { useAuth } from "../contexts/AuthContext";
 import Dialog from '@mui/material/Dialog';
 import DialogTitle from '@mui/material/DialogTitle';
@@ -21,270 +21,10 @@ import {
   ArrowBack as ArrowBackIcon
 } from "@mui/icons-material";
 
-const sensitiveDataTypes = [
-  "Health Information",
-  "Biometric Data (Fingerprints, Face Recognition, DNA)",
-  "Religious or Philosophical Beliefs",
-  "Political Opinions",
-  "Sexual Orientation",
-  "Racial or Ethnic Origin",
-  "Genetic Data",
-  "SSN",
-  "Trade Union Membership",
-  "National ID/Passport Number",
-  "Financial Information (Bank account / Credit card)"
-];
-
-const nonSensitiveDataTypes = [
-  "Name",
-  "Address",
-  "Phone Number",
-  "Email Address",
-  "IP Address",
-  "Date of Birth",
-  "Location Data (GPS, Geolocation)",
-  "Employment Information",
-  "Education Records",
-  "Online Identifiers (Cookies, Device IDs)",
-  "Username/User ID",
-  "Photographs (non-biometric)",
-  "Vehicle Registration Number",
-  "Postal Code",
-  "Age",
-  "Gender (non-sensitive)",
-  "Marital Status"
-];
-
-const dataSubjectGroups = [
-  "Customers",
-  "Employees",
-  "Children (under 18 years)",
-  "Suppliers",
-  "Contractors",
-  "Website Users",
-  "Prospects/Leads",
-  "Partners",
-  "Vendors",
-  "Students",
-  "Patients",
-  "Visitors",
-  "Applicants (Job/Program)",
-  "Shareholders",
-  "Members (Organization/Club)",
-  "Volunteers",
-  "Former Employees",
-  "Third-party Representatives",
-  "Public (General Public)",
-  "Other Data Subjects"
-];
-
-const dataCollectionPurposes = [
-  "Marketing and Advertising",
-  "Customer Service and Support",
-  "Legal Obligations and Compliance",
-  "Contract Performance",
-  "Human Resources Management",
-  "Product Development and Improvement",
-  "Fraud Prevention and Security",
-  "Financial Transactions and Billing",
-  "Research and Analytics",
-  "Communication and Notifications",
-  "Identity Verification",
-  "Website Functionality and Personalization",
-  "Quality Assurance and Testing",
-  "Business Operations and Administration",
-  "Data Processing on Behalf of Third Parties",
-  "Public Health and Safety",
-  "Legal Claims and Disputes",
-  "Regulatory Reporting",
-  "Training and Development",
-  "Other Purposes"
-];
-
-const continents = [
-  "Africa",
-  "Antarctica",
-  "Asia",
-  "Europe",
-  "North America",
-  "Oceania",
-  "South America"
-];
-
-const countries = [
-  "United States",
-  "United Kingdom",
-  "Canada",
-  "Australia",
-  "Germany",
-  "France",
-  "Italy",
-  "Spain",
-  "Netherlands",
-  "Belgium",
-  "Switzerland",
-  "Sweden",
-  "Norway",
-  "Denmark",
-  "Finland",
-  "Poland",
-  "Ireland",
-  "Portugal",
-  "Austria",
-  "Greece",
-  "Japan",
-  "China",
-  "India",
-  "South Korea",
-  "Singapore",
-  "Hong Kong",
-  "Brazil",
-  "Mexico",
-  "Argentina",
-  "Chile",
-  "South Africa",
-  "United Arab Emirates",
-  "Saudi Arabia",
-  "Israel",
-  "New Zealand",
-  "Other"
-];
-
-const securityMeasures = [
-  "Password Protection",
-  "Encryption at Rest",
-  "Encryption in Transit",
-  "Access Controls",
-  "Multi-factor Authentication",
-  "Data Masking",
-  "Audit Logging",
-  "Physical Security",
-  "Network Security",
-  "Intrusion Detection Systems",
-  "Firewall Protection",
-  "Data Loss Prevention (DLP)",
-  "Security Information and Event Management (SIEM)",
-  "Regular Security Assessments",
-  "Vulnerability Scanning",
-  "Penetration Testing",
-  "Identity and Access Management (IAM)",
-  "Single Sign-On (SSO)",
-  "Token-based Authentication",
-  "Other"
-];
-
-const accessReviewFrequencies = [
-  "Monthly",
-  "Quarterly",
-  "Annually",
-  "No review process"
-];
-
-const dataRetentionDurations = [
-  "Less than 1 year",
-  "1-3 years",
-  "3-5 years",
-  "5-7 years",
-  "7-10 years",
-  "More than 10 years",
-  "Indefinite",
-  "Other (specify)"
-];
-
-const dataProcessingScale = [
-  "Less than 1,000",
-  "1,000–50,000",
-  "50,000–1 million",
-  "More than 1 million"
-];
-
-const upstreamSystems = [
-  "Customer Relationship Management (CRM) System",
-  "Enterprise Resource Planning (ERP) System",
-  "Human Resources Information System (HRIS)",
-  "Enterprise Content Management (ECM) System",
-  "Business Intelligence (BI) Platform",
-  "Marketing Automation Platform",
-  "E-commerce Platform",
-  "Customer Support Ticketing System",
-  "Financial Management System",
-  "Identity and Access Management (IAM) System",
-  "Learning Management System (LMS)",
-  "Project Management Tool",
-  "Document Management System",
-  "Email Marketing Platform",
-  "Analytics and Reporting System",
-  "Supply Chain Management System",
-  "Vendor Management System",
-  "Compliance Management System",
-  "Data Warehouse",
-  "Third-party API Integration"
-];
-
-const downstreamSystems = [
-  "Customer Relationship Management (CRM) System",
-  "Enterprise Resource Planning (ERP) System",
-  "Human Resources Information System (HRIS)",
-  "Enterprise Content Management (ECM) System",
-  "Business Intelligence (BI) Platform",
-  "Marketing Automation Platform",
-  "E-commerce Platform",
-  "Customer Support Ticketing System",
-  "Financial Management System",
-  "Identity and Access Management (IAM) System",
-  "Learning Management System (LMS)",
-  "Project Management Tool",
-  "Document Management System",
-  "Email Marketing Platform",
-  "Analytics and Reporting System",
-  "Supply Chain Management System",
-  "Vendor Management System",
-  "Compliance Management System",
-  "Data Warehouse",
-  "Third-party API Integration"
-];
-
-const dataStorageLocations = [
-  "On-premise",
-  "Public Cloud",
-  "Private Cloud",
-  "Hybrid",
-  "Other"
-];
-
-const screeningQuestions = [
-  { id: 1, text: "Does the system collect any Personal information from individuals?", type: "boolean", page: 1 },
-  { id: 2, text: "Provide a detailed description of the system, including its purpose, functionality, and how it processes personal data.", type: "text", page: 1 },
-  { id: 3, text: "Will you collect or process any sensitive or special categories of personal data?", type: "boolean", page: 1 },
-  { id: 4, text: "If yes, which sensitive data categories apply? Please select all applicable categories.", type: "multiselect", options: sensitiveDataTypes, page: 1 },
-  { id: 5, text: "What categories of non-sensitive personal data will be collected and/or processed by the system? Please select all applicable categories.", type: "multiselect", options: nonSensitiveDataTypes, page: 1 },
-  { id: 6, text: "From which groups of data subjects will personal data be collected and/or processed? Please select all applicable groups.", type: "multiselect", options: dataSubjectGroups, page: 1 },
-  { id: 7, text: "For what purposes will personal data be collected and/or processed by the system?", type: "multiselect", options: dataCollectionPurposes, page: 1 },
-  { id: 8, text: "From which continents are you collecting personal data?", type: "multiselect", options: continents, page: 2 },
-  { id: 9, text: "Will the system comply with the General Data Protection Regulation (GDPR) requirements for processing personal data from European data subjects?", type: "boolean", page: 2 },
-  { id: 10, text: "What is the estimated volume or scale of personal data that will be collected and/or processed by the system?", type: "select", options: dataProcessingScale, page: 2 },
-  { id: 11, text: "Please list the upstream systems or sources providing personal data.", type: "select", options: upstreamSystems, page: 3 },
-  { id: 12, text: "Where will the data be stored?", type: "select", options: dataStorageLocations, page: 3 },
-  { id: 13, text: "Please list the downstream systems or recipients of data.", type: "select", options: downstreamSystems, page: 3 },
-  { id: 14, text: "Will personal data be transferred outside the country of collection?", type: "boolean", page: 3 },
-  { id: 15, text: "If yes, to which countries will personal data be transferred?", type: "multiselect", options: countries, page: 3 },
-  { id: 16, text: "Are group companies, affiliates, or external partners involved in the data transfer?", type: "boolean", page: 3 },
-  { id: 17, text: "Which authentication or security measures will you implement to protect personal data?", type: "multiselect", options: securityMeasures, page: 4 },
-  { id: 18, text: "How often are user access rights reviewed?", type: "select", options: accessReviewFrequencies, page: 4 },
-  { id: 20, text: "Will you send personal data to any third-party vendors or processors?", type: "boolean", page: 4 },
-  { id: 21, text: "For what purposes will you share data with vendors or third parties?", type: "text", page: 4 },
-  { id: 22, text: "Is there monitoring or CCTV involved in the project?", type: "boolean", page: 5 },
-  { id: 23, text: "Are you ensuring that no data subject rights are being violated?", type: "boolean", page: 5 },
-  { id: 24, text: "Is large-scale processing of personal data involved?", type: "boolean", page: 5 },
-  { id: 25, text: "Is any data on criminal convictions or offenses being collected?", type: "boolean", page: 5 },
-  { id: 26, text: "Are you combining datasets from multiple sources?", type: "boolean", page: 5 },
-  { id: 27, text: "Are innovative technologies (e.g., AI, IoT) used in the project?", type: "boolean", page: 5 },
-  { id: 28, text: "Is personal data regularly shared with government or law enforcement bodies?", type: "boolean", page: 5 },
-  { id: 29, text: "Will there be profiling, automated decision-making, or analytics performed on the data?", type: "boolean", page: 5 },
-  { id: 30, text: "How long do you intend to retain the personal data?", type: "select", options: dataRetentionDurations, page: 5 },
-  { id: 31, text: "Is there a process for reviewing and deleting outdated personal data?", type: "boolean", page: 5 },
-  // Additional questions will be added here when first question is answered "yes"
-];
+// Questions come from the server's catalog (GET /questions/): ids, wording, answer type, page and options.
+// Saved answers carry the catalog question id; answers saved before the catalog only have the text
+const findQuestion = (questions, ans) =>
+  questions.find(q => q.id === ans.question_id) || questions.find(q => q.text === ans.question);
 
 export default function Screening() {
   const { id } = useParams();
@@ -308,6 +48,10 @@ export default function Screening() {
   const [otherAnswers, setOtherAnswers] = useState({});
   // Pagination state
   const [currentPage, setCurrentPage] = useState(1);
+  // Question catalog version and questions, in display order
+  const [catalog, setCatalog] = useState({ version: null, questions: [] });
+  const screeningQuestions = catalog.questions;
+  const question = (qid) => screeningQuestions.find(q => q.id === qid);
 
   const isApprover = user?.role === 'approver';
   
@@ -345,36 +89,27 @@ export default function Screening() {
     const loadData = async () => {
       try {
         setLoading(true);
-        const assessments = await fetchAssessments();
-        const found = assessments.find(a => a.id === parseInt(id));
+        // Assessment, threads, comments and saved answers arrive in one response, the questions in another
+        const [workspace, questionCatalog] = await Promise.all([
+          getAssessmentWorkspace(parseInt(id)),
+          getQuestionCatalog()
+        ]);
+        setCatalog(questionCatalog);
+        const found = workspace?.assessment;
         setAssessment(found);
         
         if (found) {
-          // Load all threads for this assessment
-          const threadsData = await getThreads(parseInt(id));
-          setThreads(threadsData);
-          
-          // Load comments for each thread
-          const commentsData = {};
-          for (const thread of threadsData) {
-            try {
-              const threadComments = await getThreadComments(thread.id);
-              commentsData[thread.id] = threadComments;
-            } catch (e) {
-              console.error(`Failed to load comments for thread ${thread.id}:`, e);
-              commentsData[thread.id] = [];
-            }
-          }
-          setComments(commentsData);
+          setThreads(workspace.threads);
+          setComments(workspace.comments);
           
           // Load previous answers for both system owners and approvers (approvers need to see responses for review)
           try {
-            const savedAnswers = await getScreeningAnswers(parseInt(id));
+            const savedAnswers = workspace.screening_answers;
             if (savedAnswers && savedAnswers.length > 0) {
               const answersMap = {};
               const textAnswersMap = {}; // Store text answers separately
               savedAnswers.forEach((ans) => {
-                const question = screeningQuestions.find(q => q.text === ans.question);
+                const question = findQuestion(questionCatalog.questions, ans);
                 if (question) {
                   if (question.type === "text") {
                     // For text questions, store the text from notes field
@@ -441,6 +176,22 @@ export default function Screening() {
     loadData();
   }, [id, isOwner]);
 
+  useEffect(() => {
+    // Live comments, thread changes and status changes pushed by the server
+    return subscribeAssessmentEvents(parseInt(id), {
+      comment_added: (comment) => setComments(prev => {
+        const existing = prev[comment.thread_id] || [];
+        if (existing.some(c => c.id === comment.id)) return prev;
+        return { ...prev, [comment.thread_id]: [...existing, comment] };
+      }),
+      thread_opened: (thread) => setThreads(prev => (
+        prev.some(t => t.id === thread.id) ? prev : [...prev, thread]
+      )),
+      thread_resolved: (thread) => setThreads(prev => prev.map(t => (t.id === thread.id ? { ...t, ...thread } : t))),
+      status_changed: ({ status }) => setAssessment(prev => (prev ? { ...prev, status } : prev)),
+    });
+  }, [id]);
+
   const handleAnswer = (qid, val) => {
     // Only update the answer state - don't auto-submit
     setAnswers(a => ({ ...a, [qid]: val }));
@@ -456,7 +207,8 @@ export default function Screening() {
         
         // Submit the "no" answer
         const payload = [{
-          question: screeningQuestions[0].text,
+          question_id: 1,
+          catalog_version: catalog.version,
           answer: false,
           notes: ""
         }];
@@ -465,8 +217,7 @@ export default function Screening() {
         // Backend automatically sets status to 'completed' when first question is answered "No"
         
         // Reload assessment to get updated status
-        const assessments = await fetchAssessments();
-        const found = assessments.find(a => a.id === parseInt(id));
+        const found = await getAssessment(parseInt(id));
         if (found) {
           setAssessment(found);
         }
@@ -477,7 +228,7 @@ export default function Screening() {
           if (savedAnswers && savedAnswers.length > 0) {
             const answersMap = {};
             savedAnswers.forEach((ans) => {
-              const question = screeningQuestions.find(q => q.text === ans.question);
+              const question = findQuestion(screeningQuestions, ans);
               if (question) {
                 if (question.type === "text") {
                   // For text questions, store the text from notes field
@@ -512,9 +263,9 @@ export default function Screening() {
     }
   };
 
-  const handleSendQuestion = async (qText, msg) => {
+  const handleSendQuestion = async (question, msg) => {
     try {
-      const thread = await createThread(parseInt(id), `${qText}: ${msg}`);
+      const thread = await createThread(parseInt(id), `${question.text}: ${msg}`, question.id);
       setThreads([...threads, thread]);
       setSelectedThread(thread.id);
       setChatOpen(true);
@@ -558,8 +309,7 @@ export default function Screening() {
       setLoading(true);
       await updateAssessmentStatus(parseInt(id), status);
       // Reload assessment to get updated status
-      const assessments = await fetchAssessments();
-      const found = assessments.find(a => a.id === parseInt(id));
+      const found = await getAssessment(parseInt(id));
       setAssessment(found);
       setError("");
     } catch (e) {
@@ -591,8 +341,8 @@ export default function Screening() {
     }
   };
 
-  const getThreadForQuestion = (questionText) => {
-    return threads.find(t => t.question_text.includes(questionText));
+  const getThreadForQuestion = (question) => {
+    return threads.find(t => t.question_id === question.id || t.question_text.includes(question.text));
   };
 
   const getCommentsForThread = (threadId) => {
@@ -710,9 +460,14 @@ export default function Screening() {
           // If first question is "no", only show question 1
           let questionsToShow;
           
+          // Nothing to lay out until the question catalog has loaded
+          if (screeningQuestions.length === 0) {
+            return null;
+          }
+          
           if (!shouldShowAdditionalQuestions) {
             // Show only first question if answer is "no" or not answered yet
-            questionsToShow = [screeningQuestions[0]];
+            questionsToShow = [question(1)];
           } else {
             // First question is "yes" - show Q1, Q2, Q3, Q5, and conditionally Q4
             const thirdQuestionAnswer = answers[3] !== undefined ? answers[3] : (previousAnswers[3] !== undefined ? previousAnswers[3] : null);
@@ -728,39 +483,42 @@ export default function Screening() {
             const shouldShowCountriesQuestion = dataTransferAnswer === true;
             
             questionsToShow = [
-              screeningQuestions[0], // Q1: Does system collect PI?
-              screeningQuestions[1], // Q2: System description
-              screeningQuestions[2], // Q3: Sensitive data yes/no
-              ...(shouldShowSensitiveDataQuestion ? [screeningQuestions[3]] : []), // Q4: Sensitive data categories (only if Q3 is yes)
-              screeningQuestions[4],  // Q5: Non-sensitive data categories
-              screeningQuestions[5],  // Q6: Data subject groups
-              screeningQuestions[6],  // Q7: Data collection purposes
-              screeningQuestions[7],  // Q8: Continents
-              ...(hasEuropeSelected ? [screeningQuestions[8]] : []), // Q9: GDPR compliance (only if Europe is selected, right after Q8)
-              screeningQuestions[9],   // Q10: Data processing scale (after Q9)
-              screeningQuestions[10],  // Q11: Upstream systems (page 3)
-              screeningQuestions[11],  // Q12: Data storage location (page 3)
-              screeningQuestions[12],  // Q13: Downstream systems (page 3)
-              screeningQuestions[13],  // Q14: Data transfer outside country (page 3)
-              ...(shouldShowCountriesQuestion ? [screeningQuestions[14]] : []), // Q15: Countries (only if Q14 is Yes)
-              screeningQuestions[15],  // Q16: Group companies/affiliates/partners (page 3)
-              screeningQuestions[16],  // Q17: Security measures (page 4)
-              screeningQuestions[17],  // Q18: Access rights review frequency (page 4)
-              screeningQuestions[18],  // Q20: Third-party vendors/processors (page 4)
-              ...(answers[20] === true || previousAnswers[20] === true ? [screeningQuestions[19]] : []), // Q21: Vendor data sharing purposes (only if Q20 is Yes)
-              screeningQuestions[20],  // Q22: Monitoring/CCTV (page 5)
-              screeningQuestions[21],  // Q23: Data subject rights (page 5)
-              screeningQuestions[22],  // Q24: Large-scale processing (page 5)
-              screeningQuestions[23],  // Q25: Criminal convictions data (page 5)
-              screeningQuestions[24],  // Q26: Combining datasets (page 5)
-              screeningQuestions[25],  // Q27: Innovative technologies (page 5)
-              screeningQuestions[26],  // Q28: Government/law enforcement sharing (page 5)
-              screeningQuestions[27],  // Q29: Profiling/automated decision-making (page 5)
-              screeningQuestions[28],  // Q30: Data retention duration (page 5)
-              screeningQuestions[29]   // Q31: Review and delete outdated data (page 5)
+              question(1), // Q1: Does system collect PI?
+              question(2), // Q2: System description
+              question(3), // Q3: Sensitive data yes/no
+              ...(shouldShowSensitiveDataQuestion ? [question(4)] : []), // Q4: Sensitive data categories (only if Q3 is yes)
+              question(5),  // Q5: Non-sensitive data categories
+              question(6),  // Q6: Data subject groups
+              question(7),  // Q7: Data collection purposes
+              question(8),  // Q8: Continents
+              ...(hasEuropeSelected ? [question(9)] : []), // Q9: GDPR compliance (only if Europe is selected, right after Q8)
+              question(10),   // Q10: Data processing scale (after Q9)
+              question(11),  // Q11: Upstream systems (page 3)
+              question(12),  // Q12: Data storage location (page 3)
+              question(13),  // Q13: Downstream systems (page 3)
+              question(14),  // Q14: Data transfer outside country (page 3)
+              ...(shouldShowCountriesQuestion ? [question(15)] : []), // Q15: Countries (only if Q14 is Yes)
+              question(16),  // Q16: Group companies/affiliates/partners (page 3)
+              question(17),  // Q17: Security measures (page 4)
+              question(18),  // Q18: Access rights review frequency (page 4)
+              question(20),  // Q20: Third-party vendors/processors (page 4)
+              ...(answers[20] === true || previousAnswers[20] === true ? [question(21)] : []), // Q21: Vendor data sharing purposes (only if Q20 is Yes)
+              question(22),  // Q22: Monitoring/CCTV (page 5)
+              question(23),  // Q23: Data subject rights (page 5)
+              question(24),  // Q24: Large-scale processing (page 5)
+              question(25),  // Q25: Criminal convictions data (page 5)
+              question(26),  // Q26: Combining datasets (page 5)
+              question(27),  // Q27: Innovative technologies (page 5)
+              question(28),  // Q28: Government/law enforcement sharing (page 5)
+              question(29),  // Q29: Profiling/automated decision-making (page 5)
+              question(30),  // Q30: Data retention duration (page 5)
+              question(31)   // Q31: Review and delete outdated data (page 5)
             ];
           }
           
+          // Skip any question id the catalog does not have
+          questionsToShow = questionsToShow.filter(Boolean);
+          
           // Filter questions by current page
           const questionsForCurrentPage = questionsToShow.filter(q => (q.page || 1) === currentPage);
           
@@ -784,7 +542,7 @@ export default function Screening() {
                 </Alert>
               ) : (
                 questionsForCurrentPage.map((q, idx) => {
-            const thread = getThreadForQuestion(q.text);
+            const thread = getThreadForQuestion(q);
             const hasThread = !!thread;
             const hasOpenThread = hasThread && thread.status === 'open';
             const needsClarification = hasOpenThread && isOwner;
@@ -1354,7 +1112,7 @@ export default function Screening() {
                   
                   if (firstQAnswer !== true) {
                     // Only first question if answer is "no"
-                    questionsToAnswer = [screeningQuestions[0]];
+                    questionsToAnswer = [question(1)];
                   } else {
                     // First question is "yes" - include Q1, Q2, Q3, Q5, and conditionally Q4
                     const thirdQAnswer = answers[3] !== undefined ? answers[3] : (previousAnswers[3] !== undefined ? previousAnswers[3] : null);
@@ -1369,39 +1127,42 @@ export default function Screening() {
                     const shouldIncludeCountriesQ = dataTransferAnswerForSubmit === true;
                     
                     questionsToAnswer = [
-                      screeningQuestions[0], // Q1: Does system collect PI?
-                      screeningQuestions[1], // Q2: System description
-                      screeningQuestions[2], // Q3: Sensitive data yes/no
-                      ...(shouldIncludeSensitiveQ ? [screeningQuestions[3]] : []), // Q4: Sensitive data categories (only if Q3 is yes)
-                      screeningQuestions[4],  // Q5: Non-sensitive data categories
-                      screeningQuestions[5],  // Q6: Data subject groups
-                      screeningQuestions[6],  // Q7: Data collection purposes
-                      screeningQuestions[7],  // Q8: Continents
-                      ...(hasEuropeSelectedForSubmit ? [screeningQuestions[8]] : []), // Q9: GDPR compliance (only if Europe is selected, right after Q8)
-                      screeningQuestions[9],   // Q10: Data processing scale (after Q9)
-                      screeningQuestions[10],  // Q11: Upstream systems (page 3)
-                      screeningQuestions[11],   // Q12: Data storage location (page 3)
-                      screeningQuestions[12],  // Q13: Downstream systems (page 3)
-                      screeningQuestions[13],  // Q14: Data transfer outside country (page 3)
-                      ...(shouldIncludeCountriesQ ? [screeningQuestions[14]] : []), // Q15: Countries (only if Q14 is Yes)
-                      screeningQuestions[15],  // Q16: Group companies/affiliates/partners (page 3)
-                      screeningQuestions[16],  // Q17: Security measures (page 4)
-                      screeningQuestions[17],  // Q18: Access rights review frequency (page 4)
-                      screeningQuestions[18],  // Q20: Third-party vendors/processors (page 4)
-                      ...((answers[20] === true || previousAnswers[20] === true) ? [screeningQuestions[19]] : []), // Q21: Vendor data sharing purposes (only if Q20 is Yes)
-                      screeningQuestions[20],  // Q22: Monitoring/CCTV (page 5)
-                      screeningQuestions[21],  // Q23: Data subject rights (page 5)
-                      screeningQuestions[22],  // Q24: Large-scale processing (page 5)
-                      screeningQuestions[23],  // Q25: Criminal convictions data (page 5)
-                      screeningQuestions[24],  // Q26: Combining datasets (page 5)
-                      screeningQuestions[25],  // Q27: Innovative technologies (page 5)
-                      screeningQuestions[26],  // Q28: Government/law enforcement sharing (page 5)
-                      screeningQuestions[27],  // Q29: Profiling/automated decision-making (page 5)
-                      screeningQuestions[28],  // Q30: Data retention duration (page 5)
-                      screeningQuestions[29]   // Q31: Review and delete outdated data (page 5)
+                      question(1), // Q1: Does system collect PI?
+                      question(2), // Q2: System description
+                      question(3), // Q3: Sensitive data yes/no
+                      ...(shouldIncludeSensitiveQ ? [question(4)] : []), // Q4: Sensitive data categories (only if Q3 is yes)
+                      question(5),  // Q5: Non-sensitive data categories
+                      question(6),  // Q6: Data subject groups
+                      question(7),  // Q7: Data collection purposes
+                      question(8),  // Q8: Continents
+                      ...(hasEuropeSelectedForSubmit ? [question(9)] : []), // Q9: GDPR compliance (only if Europe is selected, right after Q8)
+                      question(10),   // Q10: Data processing scale (after Q9)
+                      question(11),  // Q11: Upstream systems (page 3)
+                      question(12),   // Q12: Data storage location (page 3)
+                      question(13),  // Q13: Downstream systems (page 3)
+                      question(14),  // Q14: Data transfer outside country (page 3)
+                      ...(shouldIncludeCountriesQ ? [question(15)] : []), // Q15: Countries (only if Q14 is Yes)
+                      question(16),  // Q16: Group companies/affiliates/partners (page 3)
+                      question(17),  // Q17: Security measures (page 4)
+                      question(18),  // Q18: Access rights review frequency (page 4)
+                      question(20),  // Q20: Third-party vendors/processors (page 4)
+                      ...((answers[20] === true || previousAnswers[20] === true) ? [question(21)] : []), // Q21: Vendor data sharing purposes (only if Q20 is Yes)
+                      question(22),  // Q22: Monitoring/CCTV (page 5)
+                      question(23),  // Q23: Data subject rights (page 5)
+                      question(24),  // Q24: Large-scale processing (page 5)
+                      question(25),  // Q25: Criminal convictions data (page 5)
+                      question(26),  // Q26: Combining datasets (page 5)
+                      question(27),  // Q27: Innovative technologies (page 5)
+                      question(28),  // Q28: Government/law enforcement sharing (page 5)
+                      question(29),  // Q29: Profiling/automated decision-making (page 5)
+                      question(30),  // Q30: Data retention duration (page 5)
+                      question(31)   // Q31: Review and delete outdated data (page 5)
                     ];
                   }
                   
+                  // Skip any question id the catalog does not have (or has not loaded yet)
+                  questionsToAnswer = questionsToAnswer.filter(Boolean);
+                  
                   // Questions are optional - no mandatory validation
                   // For resubmission: allow submission regardless of edits - system owner's choice
                   // They can submit after editing, without editing, or just after replying in chat
@@ -1409,7 +1170,7 @@ export default function Screening() {
                   // Build payload: use edited answers for questions with threads, previous answers for others
                   // Only include questions that should be shown based on first question answer
                   const payload = questionsToAnswer.map(q => {
-                  const thread = getThreadForQuestion(q.text);
+                  const thread = getThreadForQuestion(q);
                   const hasThread = !!thread;
                   // If question has thread and has been edited, use current answer
                   // Otherwise, use previous answer if exists (preserve all previous responses)
@@ -1429,7 +1190,8 @@ export default function Screening() {
                   if (q.type === "text") {
                     // For text questions, store text in notes field, answer as true
                     return {
-          question: q.text,
+          question_id: q.id,
+          catalog_version: catalog.version,
                       answer: true, // Indicates question is answered
                       notes: answerToUse || ""
                     };
@@ -1464,7 +1226,8 @@ export default function Screening() {
                       : cleanItems;
                     
                     return {
-                      question: q.text,
+                      question_id: q.id,
+                      catalog_version: catalog.version,
                       answer: true, // Indicates question is answered
                       notes: JSON.stringify(itemsToStore)
                     };
@@ -1485,14 +1248,16 @@ export default function Screening() {
                       }
                     }
                     return {
-                      question: q.text,
+                      question_id: q.id,
+                      catalog_version: catalog.version,
                       answer: true, // Indicates question is answered
                       notes: notesValue
                     };
                   } else {
                     // For boolean questions, store boolean in answer field
                     return {
-                      question: q.text,
+                      question_id: q.id,
+                      catalog_version: catalog.version,
                       answer: !!answerToUse,
                       notes: ""
                     };
@@ -1508,8 +1273,7 @@ export default function Screening() {
                   setSubmitMsg(`Submitted successfully! Status: ${res.next_status || res.message}`);
                   
                   // Reload assessment and answers to get updated status
-                  const assessments = await fetchAssessments();
-                  const found = assessments.find(a => a.id === parseInt(id));
+                  const found = await getAssessment(parseInt(id));
                   if (found) {
                     setAssessment(found);
                   }
@@ -1520,7 +1284,7 @@ export default function Screening() {
                     if (savedAnswers && savedAnswers.length > 0) {
                       const answersMap = {};
                       savedAnswers.forEach((ans) => {
-                        const question = screeningQuestions.find(q => q.text === ans.question);
+                        const question = findQuestion(ans);
                         if (question) {
                           if (question.type === "text") {
                             // For text questions, store the text from notes field
@@ -1679,7 +1443,7 @@ export default function Screening() {
               variant="contained"
             onClick={() => {
               if (popupIdx !== null && popupText.trim()) {
-                handleSendQuestion(screeningQuestions[popupIdx].text, popupText.trim());
+                handleSendQuestion(screeningQuestions[popupIdx], popupText.trim());
               }
             }}
             disabled={!popupText.trim()}
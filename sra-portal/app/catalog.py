@@ -0,0 +1,127 @@
+# app/catalog.py
+"""
+The screening question catalog, owned by the server.
+
+Each catalog version is a set of `Question` rows keyed by (id, catalog_version).
+The current version ships as app/question_catalog.json (or the file
+SRA_QUESTION_CATALOG names) and is written to the database by migration or with
+
+    python -m app.catalog sync
+
+Published versions are never changed: rewording a question or adding one
+means a new file with a higher version. Answers and threads store the
+(question id, catalog version) they were given against, so old answers keep
+the wording that was on screen.
+
+The app reads all versions once (they are small) and resolves ids to text and
+text to ids in memory.
+"""
+import argparse
+import json
+import sys
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from app import config
+from app.models import Question
+
+
+class UnknownQuestion(LookupError):
+    pass
+
+
+class Catalog:
+    def __init__(self, rows):
+        self._text = {}
+        self._by_text = {}
+        self._questions = {}
+        for row in sorted(rows, key=lambda r: (r.catalog_version, r.position)):
+            self._text[(row.id, row.catalog_version)] = row.text
+            self._by_text[row.text] = (row.id, row.catalog_version)  # the latest wording wins
+            self._questions.setdefault(row.catalog_version, []).append(row)
+        self.version = max(self._questions, default=0)
+
+    def versions(self) -> list:
+        return sorted(self._questions)
+
+    def questions(self, version: int = None) -> list:
+        """Questions of one version (default: the current one) in display order."""
+        return [
+            {"id": q.id, "text": q.text, "type": q.kind, "page": q.page, "options": q.options}
+            for q in self._questions.get(version or self.version, [])
+        ]
+
+    def text(self, question_id: int, version: int) -> Optional[str]:
+        return self._text.get((question_id, version))
+
+    def resolve(self, question: Optional[str], question_id: Optional[int] = None, version: Optional[int] = None):
+        """(question_id, catalog_version, question_text) to store for an answer given by id or by text.
+        Text outside the catalog is kept as text; an id that is not in the catalog raises UnknownQuestion."""
+        if question_id is not None:
+            version = version or self.version
+            if (question_id, version) not in self._text:
+                raise UnknownQuestion(f"Question {question_id} is not in catalog version {version}")
+            return question_id, version, None
+        found = self._by_text.get(question)
+        if found:
+            return found[0], found[1], None
+        return None, None, question
+
+    def resolve_thread(self, question_text: str):
+        """(question_id, catalog_version) of the catalog question a thread's text starts with, if any."""
+        question, _, _ = question_text.partition(": ")
+        return self._by_text.get(question, (None, None))
+
+
+def load_file(path: str = None) -> dict:
+    with open(path or config.QUESTION_CATALOG_PATH) as f:
+        spec = json.load(f)
+    if not isinstance(spec.get("version"), int) or not isinstance(spec.get("questions"), list):
+        raise ValueError("catalog file needs an integer version and a list of questions")
+    return spec
+
+
+def sync(conn, path: str = None) -> int:
+    """Write the catalog file's version to the database unless it is already there. Returns its version."""
+    spec = load_file(path)
+    version = spec["version"]
+    if conn.execute(select(func.count()).where(Question.catalog_version == version)).scalar():
+        return version
+    conn.execute(Question.__table__.insert(), [
+        {"id": q["id"], "catalog_version": version, "position": position, "text": q["text"],
+         "kind": q["type"], "page": q.get("page", 1), "options": q.get("options")}
+        for position, q in enumerate(spec["questions"], 1)
+    ])
+    return version
+
+
+def load(conn) -> Catalog:
+    return Catalog(conn.execute(select(Question)).all())
+
+
+@lru_cache(maxsize=None)
+def current() -> Catalog:
+    """All catalog versions, read from the database on first use."""
+    from app.database import engine
+    with engine.connect() as conn:
+        return load(conn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screening question catalog")
+    parser.add_argument("command", choices=["sync"])
+    parser.add_argument("--file", default=None, help="catalog file (default: the configured one)")
+    args = parser.parse_args(argv)
+
+    from app.database import engine
+    with engine.begin() as conn:
+        version = sync(conn, args.file)
+        count = conn.execute(select(func.count()).where(Question.catalog_version == version)).scalar()
+    print(f"Catalog version {version} has {count} question(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
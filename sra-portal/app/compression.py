@@ -0,0 +1,203 @@
+# app/compression.py
+"""
+Negotiated gzip/brotli compression of response bodies.
+
+Picks the best coding the client accepts (brotli when the optional `brotli`
+package is installed, else gzip) and compresses bodies of at least
+`minimum_size` bytes; streamed bodies are compressed as they are produced.
+Responses that are already encoded, event streams, compressed file downloads
+and 204/304 responses are passed through untouched.
+
+A compressed body gets its ETag suffixed with the coding ("abc" -> "abc-gzip")
+so the tag stays strong per representation; the suffix is stripped again from
+incoming If-None-Match headers before the app compares tags, and put back on
+the ETag of the 304 the app answers, so it matches the validator the client sent.
+"""
+import re
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+EXCLUDED_MEDIA_TYPES = ("text/event-stream", "application/gzip")
+_ETAG_SUFFIX = re.compile(r'-(?:gzip|br)"')
+_SUFFIXED_ETAG = re.compile(r'("[^"]*)-(gzip|br)"')
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+async def gzip_stream(chunks, level: int = 6):
+    """Gzip an async stream of bytes as it is produced, e.g. for a .gz download."""
+    compressor = _GzipCompressor(level)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+def _accepted_codings(accept_encoding: str) -> dict:
+    """{coding: q} from an Accept-Encoding header."""
+    codings = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.supported = ("br", "gzip") if brotli is not None else ("gzip",)  # in order of preference
+
+    def choose(self, accept_encoding: str):
+        codings = _accepted_codings(accept_encoding)
+        best, best_q = None, 0.0
+        for coding in self.supported:
+            q = codings.get(coding, codings.get("*", 0.0))
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def compressor(self, coding: str):
+        if coding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _ETAG_SUFFIX.search(if_none_match):
+            request_headers = MutableHeaders(scope=scope)
+            request_headers["if-none-match"] = _ETAG_SUFFIX.sub('"', if_none_match)
+            # Stripped tag -> tag as the client sent it, for the ETag of a 304
+            sent = {f'{tag}"': f'{tag}-{coding}"' for tag, coding in _SUFFIXED_ETAG.findall(if_none_match)}
+            send = _NotModifiedTagger(send, sent)
+        coding = self.choose(headers.get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self, coding)(scope, receive, send)
+
+
+class _NotModifiedTagger:
+    """Puts the coding suffix the client sent back on the ETag of a 304."""
+
+    def __init__(self, send, sent: dict):
+        self.send = send
+        self.sent = sent
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start" and message["status"] == 304:
+            headers = MutableHeaders(raw=message["headers"])
+            etag = headers.get("etag")
+            if etag in self.sent:
+                headers["ETag"] = self.sent[etag]
+                headers.add_vary_header("Accept-Encoding")
+        await self.send(message)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: str):
+        self.middleware = middleware
+        self.coding = coding
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.middleware.app(scope, receive, self.send_compressed)
+
+    def _encode_headers(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self.coding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and etag.endswith('"'):
+            headers["ETag"] = f'{etag[:-1]}-{self.coding}"'
+
+    async def send_compressed(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            self.passthrough = (
+                "content-encoding" in headers
+                or media_type in EXCLUDED_MEDIA_TYPES
+                or message["status"] in (204, 304)
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Small, complete body: not worth compressing
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = self.middleware.compressor(self.coding)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            self._encode_headers(headers)
+            if more_body:
+                # Streamed: length unknown up front
+                del headers["Content-Length"]
+                await self.send(self.start_message)
+            else:
+                compressed = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -1,44 +1,89 @@
-from sqlmodel import SQLModel, create_engine
-from sqlmodel import Session
-from sqlalchemy import text, inspect
-
-
-sqlite_file_name = "app.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
-
-engine = create_engine(sqlite_url, echo=True, connect_args={"check_same_thread": False})
-
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-    
-    # Migrate existing database: Add new columns if they don't exist
-    try:
-        inspector = inspect(engine)
-        
-        # Check and migrate assessment table
-        try:
-            columns = [col['name'] for col in inspector.get_columns('assessment')]
-            with Session(engine) as session:
-                if 'approver_user_id' not in columns:
-                    session.exec(text("ALTER TABLE assessment ADD COLUMN approver_user_id INTEGER"))
-                    print("Added approver_user_id column")
-                
-                if 'is_new' not in columns:
-                    session.exec(text("ALTER TABLE assessment ADD COLUMN is_new BOOLEAN DEFAULT 1"))
-                    print("Added is_new column")
-                
-                session.commit()
-        except Exception as e:
-            print(f"Assessment migration check: {e}")
-        
-        # ScreeningAnswer table will be created by create_all if it doesn't exist
-        # No migration needed as it's a new table
-        
-    except Exception as e:
-        print(f"Migration check: {e}")
-        # If table doesn't exist yet, that's fine - it will be created by create_all
-
-def get_session():
-    engine = create_engine("sqlite:///app.db", echo=True, connect_args={"check_same_thread": False})
-    with Session(engine) as session:
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from app import config, metrics, profiler
+
+# Async drivers used by the request path, per sync URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+psycopg",  # psycopg 3 is async-capable itself
+}
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+_UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+
+def upsert_insert(dialect_name: str):
+    """The dialect's insert() construct, which has on_conflict_do_update()."""
+    return _UPSERT_DIALECTS[dialect_name].insert
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # Runs once per new DB-API connection, so pooled connections keep the profile
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KIB}")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    # Enforce the ON DELETE CASCADE foreign keys (off by default in SQLite)
+    cursor.execute(f"PRAGMA foreign_keys={'ON' if config.SQLITE_FOREIGN_KEYS else 'OFF'}")
+    cursor.close()
+
+
+def _engine_options(url: str) -> dict:
+    """Pool settings shared by both engines, plus the driver options of the URL's backend."""
+    options = {
+        "echo": config.DB_ECHO,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if make_url(url).get_backend_name() == "sqlite":
+        # Pooled connections move between threads (and aiosqlite's worker threads)
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def build_engine(url: str = config.DATABASE_URL):
+    """Create the process-wide engine and connection pool from configuration."""
+    engine = create_engine(url, **_engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def async_url(url: str) -> str:
+    """Map a configured (sync) database URL onto its async driver."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str = config.DATABASE_URL):
+    """Create the async engine used by request handlers, with the same pool and profile."""
+    extra = {"poolclass": metrics.TimedQueuePool} if config.METRICS_ENABLED else {}
+    async_engine = create_async_engine(async_url(url), **_engine_options(url), **extra)
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    if config.METRICS_ENABLED:
+        metrics.instrument_engine(async_engine)
+    profiler.profiler.attach(async_engine)
+    return async_engine
+
+
+# Sync engine for command-line tools; async engine for requests
+engine = build_engine()
+async_engine = build_async_engine()
+
+async def get_session():
+    # expire_on_commit=False: touching an expired attribute would need implicit async IO
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
@@ -1,28 +1,93 @@
 # app/deps.py
-from contextlib import contextmanager
-from typing import Generator
-from sqlmodel import Session, select
-from fastapi import Depends, HTTPException
+import time
+from typing import AsyncGenerator, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, inspect
+from fastapi import Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from app import config, versions
+from app.cache import TTLCache
 from app.database import get_session as get_db_session
-from app.models import User
+from app.models import ResourceVersion, User
 from app.auth import SECRET, ALGO
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_session() -> Generator[Session, None, None]:
-    # Use the session generator from database.py
-    for session in get_db_session():
+# Resolved users keyed by token subject (email), so most requests skip the user query.
+# Every user update or deletion bumps the shared `users` version; each process
+# compares it with the one it last saw at most every SRA_PRINCIPAL_CACHE_RECHECK
+# seconds and empties its cache when it moved, so other workers drop a deleted or
+# demoted user within that interval rather than the TTL. Writes that bypass the
+# ORM (Core or bulk UPDATE/DELETE on "user") must call versions.bump(session, versions.USERS).
+principal_cache = TTLCache(maxsize=config.PRINCIPAL_CACHE_SIZE, ttl=config.PRINCIPAL_CACHE_TTL)
+
+
+class _UsersVersion:
+    seen = None  # last `users` version read, None before the first check
+    checked = float("-inf")  # time.monotonic() of that read
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    # Drop the current email and, if it just changed, the previous one
+    principal_cache.invalidate(target.email)
+    for old_email in inspect(target).attrs.email.history.deleted:
+        principal_cache.invalidate(old_email)
+    # In the flushing transaction, so other processes see it exactly when the change commits
+    connection.execute(versions.bump_statement(connection.dialect.name, [versions.USERS]))
+
+
+async def _recheck_principals(session: AsyncSession):
+    now = time.monotonic()
+    if now - _UsersVersion.checked < config.PRINCIPAL_CACHE_RECHECK:
+        return
+    version = (await session.execute(
+        select(ResourceVersion.version).where(ResourceVersion.key == versions.USERS)
+    )).scalar() or 0
+    _UsersVersion.checked = now
+    if version != _UsersVersion.seen:
+        if _UsersVersion.seen is not None:
+            principal_cache.clear()
+        _UsersVersion.seen = version
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    # Sessions come from the shared async engine/pool in database.py
+    async for session in get_db_session():
         yield session
 
-def get_current_user(token: str = Depends(oauth2_scheme), session=Depends(get_session)):
+async def _resolve_user(token: str, session: AsyncSession) -> User:
     try:
         payload = jwt.decode(token, SECRET, algorithms=[ALGO])
         email = payload.get("sub")
-        user = session.exec(select(User).where(User.email == email)).first()
+        await _recheck_principals(session)
+        cached = principal_cache.get(email)
+        if cached is not None:
+            return cached
+        # Read before the query: an invalidation while it runs makes the set below a no-op
+        generation = principal_cache.generation
+        user = (await session.exec(select(User).where(User.email == email))).first()
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
-        return user
+        # Cache a detached copy: the request session may expire `user` on commit
+        principal = User(id=user.id, email=user.email, password_hash=user.password_hash, role=user.role)
+        principal_cache.set(email, principal, generation)
+        return principal
     except JWTError:
         raise HTTPException(status_code=401, detail="Token invalid")
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session=Depends(get_session)):
+    return await _resolve_user(token, session)
+
+async def get_stream_user(
+    token: Optional[str] = Depends(OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)),
+    access_token: Optional[str] = Query(None),
+    session=Depends(get_session),
+):
+    # Browsers' EventSource cannot send headers, so streams also accept ?access_token=
+    token = token or access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return await _resolve_user(token, session)
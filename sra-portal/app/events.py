@@ -0,0 +1,256 @@
+# app/events.py
+"""
+Fan-out of assessment events to Server-Sent Events subscribers, across workers.
+
+Write paths call `await publish(session, ...)` as the last step before their
+commit. The event is a row of the `assessmentevent` table, written in the same
+transaction, so it exists exactly when the change it reports does. Its id comes
+from the shared "events" counter in `resourceversion`: the counter row stays
+locked until the commit (PostgreSQL; SQLite has one writer at a time), so ids
+are handed out and committed in the same order, and stay valid across restarts.
+
+Every worker runs `run_listener`, which reads the log past the last id it saw
+and hands new events to the subscribers connected to that worker. It wakes as
+soon as a transaction of its own process that published commits, and otherwise
+every SRA_EVENT_POLL_MS, which is how long events from other workers (or from
+command-line tools) take to arrive. A reconnecting client resumes from its
+Last-Event-ID out of the log, which `run_pruner` keeps for
+SRA_EVENT_RETENTION_SECONDS.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, insert
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import config
+from app.database import upsert_insert
+from app.models import AssessmentEvent, ResourceVersion
+from app.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+EVENT_COUNTER = "events"  # resourceversion key holding the last event id handed out
+SUBSCRIBER_QUEUE_SIZE = 256
+POLL_BATCH_SIZE = 500
+KEEPALIVE_SECONDS = 15
+_PUBLISHED = "events_published"  # Session.info flag: wake the listener after the commit
+
+
+class Event:
+    __slots__ = ("id", "type", "data")
+
+    def __init__(self, id: int, type: str, data: str):
+        self.id = id
+        self.type = type
+        self.data = data  # encoded JSON
+
+    @classmethod
+    def from_row(cls, row: AssessmentEvent) -> "Event":
+        return cls(row.id, row.type, row.data)
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {self.data}\n\n"
+
+
+async def publish_many(session, events: Iterable[Tuple[int, str, dict]]):
+    """Record (assessment id, event type, data) events in the session's transaction.
+    Does not commit; call it last before the commit, as the counter row stays locked
+    until then."""
+    events = list(events)
+    if not events:
+        return
+    count = len(events)
+    stmt = upsert_insert(session.bind.dialect.name)(ResourceVersion).values(key=EVENT_COUNTER, version=count)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"], set_={"version": ResourceVersion.version + count},
+    ).returning(ResourceVersion.version)
+    last_id = (await session.execute(stmt)).scalar_one()
+    now = datetime.utcnow()
+    await session.execute(insert(AssessmentEvent), [
+        {"id": last_id - count + n, "assessment_id": assessment_id, "type": event_type,
+         "data": dumps(data).decode(), "created_at": now}
+        for n, (assessment_id, event_type, data) in enumerate(events, 1)
+    ])
+    session.info[_PUBLISHED] = True
+
+
+async def publish(session, assessment_id: int, event_type: str, data: dict):
+    """Record one event in the session's transaction (see `publish_many`)."""
+    await publish_many(session, [(assessment_id, event_type, data)])
+
+
+async def latest_id(session) -> int:
+    """Id of the last event handed out; a new subscriber gets the ones after it."""
+    return (await session.execute(
+        select(ResourceVersion.version).where(ResourceVersion.key == EVENT_COUNTER)
+    )).scalar() or 0
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_listener(session):
+    if session.info.pop(_PUBLISHED, False):
+        hub.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_published(session):
+    session.info.pop(_PUBLISHED, None)
+
+
+class Subscription:
+    __slots__ = ("assessment_id", "queue", "last_id", "horizon")
+
+    def __init__(self, assessment_id: int, last_id: int, horizon: int, queue_size: int):
+        self.assessment_id = assessment_id
+        # One slot is kept free for the disconnect marker
+        self.queue = asyncio.Queue(maxsize=queue_size + 1)
+        self.last_id = last_id  # last event id sent to the client
+        self.horizon = horizon  # every event after it is still to be read from the log
+
+
+class EventHub:
+    """This process's subscribers, fed from the event log. Must be used from the event loop thread."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._cursor: Optional[int] = None  # last event id read from the log; None while nobody listens
+        self._wakeup: Optional[asyncio.Event] = None  # made by run_listener, on its loop
+
+    def subscribe(self, assessment_id: int, last_id: int, horizon: int) -> Subscription:
+        """Follow an assessment from after `last_id`. `horizon` is the latest event id
+        read before subscribing: the listener delivers every event after it."""
+        subscription = Subscription(assessment_id, last_id, horizon, self._queue_size)
+        self._subscribers.setdefault(assessment_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.assessment_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.assessment_id]
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait(self, timeout: float):
+        """Until a local commit published events, or `timeout` seconds."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def poll(self, async_engine):
+        """Deliver the events committed since the last poll."""
+        if not self._subscribers:
+            self._cursor = None  # nothing to catch up on while idle
+            return
+        if self._cursor is None:
+            self._cursor = min(s.horizon for subscribers in self._subscribers.values() for s in subscribers)
+        async with AsyncSession(async_engine) as session:
+            while True:
+                rows = (await session.exec(
+                    select(AssessmentEvent).where(AssessmentEvent.id > self._cursor)
+                    .order_by(AssessmentEvent.id).limit(POLL_BATCH_SIZE)
+                )).all()
+                for row in rows:
+                    self._deliver(row.assessment_id, Event.from_row(row))
+                if rows:
+                    self._cursor = rows[-1].id
+                if len(rows) < POLL_BATCH_SIZE:
+                    break
+
+    def _deliver(self, assessment_id: int, event: Event):
+        for subscription in list(self._subscribers.get(assessment_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up: cut it off, the client resumes from the log
+                self.unsubscribe(subscription)
+                subscription.queue.put_nowait(None)
+
+
+hub = EventHub()
+
+
+async def replay(session, assessment_id: int, after_id: int) -> list:
+    """Logged events of an assessment after `after_id`, oldest first."""
+    rows = (await session.exec(
+        select(AssessmentEvent).where(AssessmentEvent.assessment_id == assessment_id, AssessmentEvent.id > after_id)
+        .order_by(AssessmentEvent.id)
+    )).all()
+    return [Event.from_row(row) for row in rows]
+
+
+async def stream(request, async_engine, assessment_id: int, last_id: int, horizon: int):
+    """SSE body: logged events after `last_id`, then live events, with keep-alive comments."""
+    subscription = hub.subscribe(assessment_id, last_id, horizon)
+    try:
+        yield "retry: 3000\n\n"
+        # Read after subscribing: what the listener had already passed is in the log
+        async with AsyncSession(async_engine) as session:
+            missed = await replay(session, assessment_id, last_id)
+        for event in missed:
+            subscription.last_id = event.id
+            yield event.encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            if event.id <= subscription.last_id:
+                continue  # already replayed
+            subscription.last_id = event.id
+            yield event.encode()
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def run_listener(async_engine):
+    """Background loop every worker runs for its own subscribers."""
+    hub._wakeup = asyncio.Event()
+    while True:
+        await hub.wait(config.EVENT_POLL_MS / 1000)
+        try:
+            await hub.poll(async_engine)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Reading the event log failed, retrying next interval")
+            await asyncio.sleep(config.EVENT_POLL_MS / 1000)
+
+
+async def prune(async_engine) -> int:
+    """Remove events older than SRA_EVENT_RETENTION_SECONDS."""
+    cutoff = datetime.utcnow() - timedelta(seconds=config.EVENT_RETENTION_SECONDS)
+    async with AsyncSession(async_engine) as session:
+        result = await session.execute(delete(AssessmentEvent).where(AssessmentEvent.created_at < cutoff))
+        await session.commit()
+    return result.rowcount
+
+
+async def run_pruner(async_engine):
+    """Background loop started by the worker that runs the background tasks."""
+    while True:
+        await asyncio.sleep(config.EVENT_PRUNE_INTERVAL_SECONDS)
+        try:
+            removed = await prune(async_engine)
+            if removed:
+                logger.info("Pruned %d old events", removed)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Event pruning failed, retrying next interval")
@@ -0,0 +1,160 @@
+# app/export.py
+"""
+Streaming export of assessments with their screening answers, threads and
+comments, for audits.
+
+Assessments are read through a server-side cursor, `EXPORT_BATCH_SIZE` rows
+at a time; each batch pulls its answers, threads and comments with three
+queries and is written out before the next batch is fetched, so memory stays
+flat however many assessments match. The whole export runs in one read
+transaction and is therefore a consistent snapshot: on SQLite any read
+transaction is, and on PostgreSQL, where the default READ COMMITTED would let
+each batch see newer commits, the transaction is opened REPEATABLE READ and
+read-only.
+"""
+import csv
+import io
+from datetime import datetime
+from itertools import groupby
+from typing import Optional
+
+from sqlalchemy import and_, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import config
+from app.models import Assessment, Question, QuestionThread, ScreeningAnswer, ThreadComment
+from app.responses import dumps
+from app.routes.assessment import assessment_rows_query
+from app.routes.threads import comment_rows_query, thread_rows_query
+
+CSV_COLUMNS = [
+    "record_type", "assessment_id", "thread_id", "id", "status", "title", "question_id", "question",
+    "answer", "notes", "body", "user_email", "approver_email", "created_at", "updated_at",
+]
+
+
+def _assessments_query(status=None, created_after=None, created_before=None, owner_user_id=None):
+    query = assessment_rows_query().where(Assessment.deleted_at.is_(None))
+    if owner_user_id is not None:
+        query = query.where(Assessment.owner_user_id == owner_user_id)
+    if status is not None:
+        query = query.where(Assessment.status == status)
+    if created_after is not None:
+        query = query.where(Assessment.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(Assessment.created_at < created_before)
+    return query.order_by(Assessment.id)
+
+
+async def _children(session: AsyncSession, assessment_ids: list):
+    """Answers, threads and comments of a batch, grouped by assessment (and thread) id."""
+    answers = (await session.exec(
+        select(
+            ScreeningAnswer.id, ScreeningAnswer.assessment_id,
+            func.coalesce(ScreeningAnswer.question_text, Question.text).label("question"),
+            ScreeningAnswer.question_id, ScreeningAnswer.catalog_version,
+            ScreeningAnswer.answer, ScreeningAnswer.notes, ScreeningAnswer.created_at, ScreeningAnswer.updated_at,
+        )
+        .outerjoin(Question, and_(
+            Question.id == ScreeningAnswer.question_id, Question.catalog_version == ScreeningAnswer.catalog_version,
+        ))
+        .where(ScreeningAnswer.assessment_id.in_(assessment_ids))
+        .order_by(ScreeningAnswer.assessment_id, ScreeningAnswer.id)
+    )).all()
+    threads = (await session.exec(
+        thread_rows_query().where(QuestionThread.assessment_id.in_(assessment_ids))
+        # In assessment_id index order, so SQLite does not sort the batch's threads by id
+        .order_by(None).order_by(QuestionThread.assessment_id, QuestionThread.id)
+    )).all()
+    thread_ids = select(QuestionThread.id).where(QuestionThread.assessment_id.in_(assessment_ids))
+    comments = (await session.exec(
+        comment_rows_query().where(ThreadComment.thread_id.in_(thread_ids))
+    )).all()
+    answers_by = {key: list(group) for key, group in groupby(answers, key=lambda a: a.assessment_id)}
+    threads_by = {}
+    for thread in threads:
+        threads_by.setdefault(thread.assessment_id, []).append(thread)
+    comments_by = {key: list(group) for key, group in groupby(comments, key=lambda c: c.thread_id)}
+    return answers_by, threads_by, comments_by
+
+
+async def batches(async_engine, batch_size: int = None, **filters):
+    """Yield lists of (assessment row, answers, [(thread row, comments)]) in id order."""
+    batch_size = batch_size or config.EXPORT_BATCH_SIZE
+    async with AsyncSession(async_engine) as session:
+        if async_engine.dialect.name == "postgresql":
+            await session.connection(execution_options={
+                "isolation_level": "REPEATABLE READ", "postgresql_readonly": True,
+            })
+        result = await session.stream(
+            _assessments_query(**filters).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            answers_by, threads_by, comments_by = await _children(session, [row.id for row in rows])
+            yield [
+                (
+                    row,
+                    answers_by.get(row.id, []),
+                    [(thread, comments_by.get(thread.id, [])) for thread in threads_by.get(row.id, [])],
+                )
+                for row in rows
+            ]
+
+
+async def ndjson_chunks(batches_):
+    """One JSON object per assessment, children nested, one line each."""
+    async for batch in batches_:
+        lines = []
+        for assessment, answers, threads in batch:
+            lines.append(dumps({
+                **assessment._asdict(),
+                "screening_answers": answers,
+                "threads": [{**thread._asdict(), "comments": comments} for thread, comments in threads],
+            }))
+        lines.append(b"")
+        yield b"\n".join(lines)
+
+
+def _iso(value: Optional[datetime]):
+    return value.isoformat() if value is not None else None
+
+
+def _csv_rows(assessment, answers, threads):
+    yield {
+        "record_type": "assessment", "assessment_id": assessment.id, "id": assessment.id,
+        "status": assessment.status.value, "title": assessment.title, "user_email": assessment.owner_name,
+        "approver_email": assessment.approver_name, "created_at": _iso(assessment.created_at),
+    }
+    for a in answers:
+        yield {
+            "record_type": "screening_answer", "assessment_id": assessment.id, "id": a.id,
+            "question_id": a.question_id, "question": a.question, "answer": a.answer, "notes": a.notes,
+            "created_at": _iso(a.created_at), "updated_at": _iso(a.updated_at),
+        }
+    for thread, comments in threads:
+        yield {
+            "record_type": "thread", "assessment_id": assessment.id, "thread_id": thread.id, "id": thread.id,
+            "status": thread.status, "question_id": thread.question_id, "question": thread.question_text,
+            "user_email": thread.opener_email,
+            "created_at": _iso(thread.created_at),
+        }
+        for comment in comments:
+            yield {
+                "record_type": "comment", "assessment_id": assessment.id, "thread_id": thread.id, "id": comment.id,
+                "body": comment.body, "user_email": comment.author_email, "created_at": _iso(comment.created_at),
+            }
+
+
+async def csv_chunks(batches_):
+    """Flat CSV: each assessment row followed by its answers, threads and their comments."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in batches_:
+        buffer.seek(0)
+        buffer.truncate()
+        for record in batch:
+            writer.writerows(_csv_rows(*record))
+        yield buffer.getvalue().encode()
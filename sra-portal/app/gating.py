@@ -0,0 +1,274 @@
+# app/gating.py
+"""
+The screening gate: which status an assessment moves to once its screening
+answers are submitted.
+
+The rules are data, read from `GATE_RULES_PATH` (app/gate_rules.json unless
+SRA_GATE_RULES points elsewhere), so changing them needs a restart, not a
+deploy:
+
+    {"version": 2,
+     "rules": [{"status": "completed", "when": {"question_id": 1, "answer": false}},
+               {"status": "in_dpia", "when": {"yes_at_least": 1}}],
+     "default": "awaiting_approval"}
+
+The first rule whose condition holds decides; if none does, `default`.
+Conditions are
+    {"question_id": n, "answer": true|false|null}  catalog question n answered yes / no / not at all
+    {"question": text, "answer": ...}              the same, for a question given by its wording
+    {"yes_at_least": n}                            at least n answers are yes
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+
+`compile_rules` turns a spec into a `Gate` once: every question a rule names
+gets a slot, keyed by catalog id (or wording), so evaluating a submission is one pass over its answers filling
+the slots, then the compiled rule tests over those.
+
+Stored assessments are not re-gated when the rules change. To see (and with
+--apply, make) the status changes a new rules file would bring about:
+
+    python -m app.gating reevaluate --rules new_rules.json [--apply]
+
+Completed, approved and red-flagged assessments may be an approver's
+decision rather than the gate's, so they are left alone unless named with
+--status.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from functools import lru_cache
+from itertools import groupby
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import catalog, config, summary, versions
+from app.events import publish_many
+from app.models import Assessment, AssessmentStatus, ScreeningAnswer
+
+REEVALUATE_BATCH_SIZE = 500
+# An approver may have put an assessment here, so it is only re-gated when asked for by name
+DECISION_STATUSES = {AssessmentStatus.completed, AssessmentStatus.approved, AssessmentStatus.red_flag}
+
+
+class Gate:
+    def __init__(self, version, slots: dict, rules: list, default: AssessmentStatus):
+        self.version = version
+        self.slots = slots  # question id or wording -> index into the answer vector
+        self.rules = rules  # [(status, test(values, yes_count))]
+        self.default = default
+
+    @property
+    def outcomes(self) -> set:
+        return {status for status, _ in self.rules} | {self.default}
+
+    def evaluate(self, answers) -> AssessmentStatus:
+        """Status for an iterable of (question id, question wording, answer)."""
+        values = [None] * len(self.slots)
+        yes = 0
+        slot = self.slots.get
+        for question_id, question, answer in answers:
+            if answer:
+                yes += 1
+            for key in (question_id, question):
+                index = slot(key)
+                if index is not None:
+                    values[index] = answer
+        for status, test in self.rules:
+            if test(values, yes):
+                return status
+        return self.default
+
+
+def _status(value, where: str) -> AssessmentStatus:
+    try:
+        return AssessmentStatus(value)
+    except ValueError:
+        raise ValueError(f"{where}: unknown status {value!r}") from None
+
+
+def _compile_condition(condition, slots: dict, where: str):
+    if not isinstance(condition, dict) or len(condition.keys() - {"answer"}) != 1:
+        raise ValueError(f"{where}: a condition is an object with exactly one of "
+                         f"question_id, question, yes_at_least, all, any, not")
+    if "question_id" in condition or "question" in condition:
+        if "answer" not in condition or condition["answer"] not in (True, False, None):
+            raise ValueError(f"{where}: question conditions need answer true, false or null")
+        key = condition.get("question_id", condition.get("question"))
+        if "question_id" in condition and (not isinstance(key, int) or isinstance(key, bool)):
+            raise ValueError(f"{where}: question_id needs a number")
+        index = slots.setdefault(key, len(slots))
+        expected = condition["answer"]
+        return lambda values, yes: values[index] is expected
+    if "answer" in condition:
+        raise ValueError(f"{where}: answer is only valid with question_id or question")
+    (kind, operand), = condition.items()
+    if kind == "yes_at_least":
+        if not isinstance(operand, int) or isinstance(operand, bool):
+            raise ValueError(f"{where}: yes_at_least needs a number")
+        return lambda values, yes: yes >= operand
+    if kind == "not":
+        test = _compile_condition(operand, slots, f"{where}.not")
+        return lambda values, yes: not test(values, yes)
+    if kind in ("all", "any"):
+        if not isinstance(operand, list) or not operand:
+            raise ValueError(f"{where}: {kind} needs a non-empty list of conditions")
+        tests = [_compile_condition(c, slots, f"{where}.{kind}[{i}]") for i, c in enumerate(operand)]
+        combine = all if kind == "all" else any
+        return lambda values, yes: combine(test(values, yes) for test in tests)
+    raise ValueError(f"{where}: unknown condition {kind!r}")
+
+
+def compile_rules(spec: dict) -> Gate:
+    """Validate a rules spec and compile it. Raises ValueError naming the offending rule."""
+    if not isinstance(spec, dict) or not isinstance(spec.get("rules"), list):
+        raise ValueError("rules spec needs a list of rules")
+    slots = {}
+    rules = []
+    for i, rule in enumerate(spec["rules"]):
+        where = f"rules[{i}]"
+        if not isinstance(rule, dict) or "when" not in rule or "status" not in rule:
+            raise ValueError(f"{where}: a rule needs status and when")
+        rules.append((_status(rule["status"], where), _compile_condition(rule["when"], slots, f"{where}.when")))
+    default = _status(spec.get("default"), "default")
+    return Gate(spec.get("version"), slots, rules, default)
+
+
+def load_rules(path: str) -> Gate:
+    with open(path) as f:
+        return compile_rules(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def current() -> Gate:
+    """The gate submissions are evaluated with, compiled on first use."""
+    return load_rules(config.GATE_RULES_PATH)
+
+
+async def _screened_batch(session: AsyncSession, after_id: int, statuses, batch_size: int):
+    """Up to `batch_size` live assessments past `after_id` in `statuses`, with their answers."""
+    assessments = (await session.exec(
+        select(Assessment.id, Assessment.owner_user_id, Assessment.approver_user_id, Assessment.status)
+        .where(Assessment.id > after_id, Assessment.deleted_at.is_(None), Assessment.status.in_(statuses))
+        .order_by(Assessment.id)
+        .limit(batch_size)
+    )).all()
+    if not assessments:
+        return [], {}
+    answers = (await session.exec(
+        select(
+            ScreeningAnswer.assessment_id, ScreeningAnswer.question_id, ScreeningAnswer.catalog_version,
+            ScreeningAnswer.question_text, ScreeningAnswer.answer,
+        )
+        .where(ScreeningAnswer.assessment_id.in_([a.id for a in assessments]))
+        .order_by(ScreeningAnswer.assessment_id)
+    )).all()
+    questions = catalog.current()
+    answers_by = {
+        assessment_id: [
+            (a.question_id, a.question_text or questions.text(a.question_id, a.catalog_version), a.answer)
+            for a in group
+        ]
+        for assessment_id, group in groupby(answers, key=lambda a: a.assessment_id)
+    }
+    return assessments, answers_by
+
+
+async def _apply(session: AsyncSession, changed) -> list:
+    """Move the changed assessments of one batch to their new status, publish the
+    moves, and commit. Returns the (assessment, new status) pairs that moved: an
+    assessment whose status changed since the batch was read is left alone."""
+    moves = {}
+    for assessment, new_status in changed:
+        moves.setdefault((assessment.status, new_status), []).append(assessment.id)
+    moved = set()
+    for (old_status, new_status), ids in moves.items():
+        moved.update((await session.execute(
+            update(Assessment).where(Assessment.id.in_(ids), Assessment.status == old_status)
+            .values(status=new_status).returning(Assessment.id)
+        )).scalars().all())
+    changed = [(assessment, new_status) for assessment, new_status in changed if assessment.id in moved]
+    if not changed:
+        await session.commit()
+        return changed
+    counts = Counter()
+    for assessment, new_status in changed:
+        counts[(assessment.owner_user_id, assessment.approver_user_id, assessment.status)] -= 1
+        counts[(assessment.owner_user_id, assessment.approver_user_id, new_status)] += 1
+    await summary.adjust_many(session, counts)
+    await versions.bump(session, versions.ASSESSMENTS, *(versions.assessment(a.id) for a, _ in changed))
+    await publish_many(session, (
+        (assessment.id, "status_changed", {"assessment_id": assessment.id, "status": new_status})
+        for assessment, new_status in changed
+    ))
+    await session.commit()
+    return changed
+
+
+async def reevaluate(async_engine, gate: Gate, statuses=None, apply: bool = False, batch_size: int = None):
+    """Re-gate every screened, live assessment whose status is one of `statuses`
+    (by default the statuses `gate` can produce, less DECISION_STATUSES), `batch_size` at a time.
+    Returns the number checked and [(assessment id, old status, new status)];
+    with `apply`, also makes the changes, one transaction per batch, and publishes
+    them as status_changed events, which reach the app's subscribers once each batch commits."""
+    statuses = list(statuses or gate.outcomes - DECISION_STATUSES)
+    batch_size = batch_size or REEVALUATE_BATCH_SIZE
+    checked = 0
+    changes = []
+    after_id = 0
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        while True:
+            assessments, answers_by = await _screened_batch(session, after_id, statuses, batch_size)
+            if not assessments:
+                break
+            after_id = assessments[-1].id
+            changed = []
+            for assessment in assessments:
+                answers = answers_by.get(assessment.id)
+                if answers is None:
+                    continue  # never screened
+                checked += 1
+                new_status = gate.evaluate(answers)
+                if new_status != assessment.status:
+                    changed.append((assessment, new_status))
+            if apply and changed:
+                changed = await _apply(session, changed)
+            else:
+                await session.rollback()  # end the read transaction between batches
+            changes.extend((a.id, a.status, new_status) for a, new_status in changed)
+    return checked, changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screening gate rules")
+    parser.add_argument("command", choices=["check", "reevaluate"])
+    parser.add_argument("--rules", default=config.GATE_RULES_PATH, help="rules file (default: the configured one)")
+    parser.add_argument("--status", action="append", choices=[s.value for s in AssessmentStatus],
+                        help="re-gate assessments in this status (repeatable; default: the rules' "
+                             "outcomes other than completed, approved and red_flag)")
+    parser.add_argument("--batch-size", type=int, default=None, help="assessments per batch")
+    parser.add_argument("--apply", action="store_true", help="make the status changes, not just report them")
+    args = parser.parse_args(argv)
+
+    try:
+        gate = load_rules(args.rules)
+    except (OSError, ValueError) as exc:
+        print(f"Invalid rules in {args.rules}: {exc}")
+        return 1
+    if args.command == "check":
+        print(f"Rules version {gate.version}: {len(gate.rules)} rule(s) over {len(gate.slots)} question(s)")
+        return 0
+
+    from app.database import async_engine
+    checked, changes = asyncio.run(reevaluate(async_engine, gate, args.status, args.apply, args.batch_size))
+    for assessment_id, old, new in changes:
+        print(f"assessment {assessment_id}: {old.value} -> {new.value}")
+    verb = "changed" if args.apply else "would change"
+    print(f"Rules version {gate.version}: {len(changes)} of {checked} screened assessment(s) {verb} status")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
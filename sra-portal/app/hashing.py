@@ -0,0 +1,109 @@
+# app/hashing.py
+"""
+Password hashing on a dedicated, bounded executor.
+
+bcrypt is deliberately slow, so running it on Starlette's shared threadpool
+lets a login burst starve every other sync endpoint. Hashing work goes to its
+own thread or process pool instead, and callers are turned away with
+HashingBusy once too many hashes are already queued.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from app import auth, config
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full; maps to 503 + Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class HashMetrics:
+    """Latency of completed hash operations (queue wait included)."""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._recent.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 2) if recent else None
+        return {
+            "count": self.count,
+            "rejected": self.rejected,
+            "in_flight": _in_flight,
+            "max_pending": config.HASH_MAX_PENDING,
+            "avg_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else None,
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+        }
+
+
+metrics = HashMetrics()
+_executor: Optional[Executor] = None
+_in_flight = 0  # submitted and not yet finished; only touched from the event loop
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        workers = config.HASH_WORKERS or os.cpu_count() or 1
+        if config.HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _executor
+
+
+async def shutdown():
+    """Drop queued hashes and wait for running ones without blocking the event loop."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(executor.shutdown, wait=True, cancel_futures=True))
+
+
+async def _run(fn, *args):
+    global _in_flight
+    if _in_flight >= config.HASH_MAX_PENDING:
+        metrics.rejected += 1
+        raise HashingBusy(config.HASH_RETRY_AFTER)
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight -= 1
+        metrics.observe(time.perf_counter() - started)
+
+
+async def verify_password(plain: str, hash_: str) -> bool:
+    return await _run(auth.verify_password, plain, hash_)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(auth.hash_password, password)
@@ -0,0 +1,286 @@
+# app/importer.py
+"""
+Bulk import of legacy assessments from NDJSON, one assessment per line with
+its screening answers and threads nested:
+
+    {"title": "...", "owner_email": "...", "approver_email": "...", "status": "completed",
+     "answers": [{"question_id": 1, "answer": true, "notes": ""}, {"question": "...", "answer": false}],
+     "threads": [{"question_text": "...", "opened_by_email": "...", "status": "resolved",
+                  "comments": [{"author_email": "...", "body": "..."}]}]}
+
+Lines are validated one by one and written `IMPORT_BATCH_SIZE` records per
+transaction, each table with a single executemany INSERT. User emails are
+resolved with one query per batch for the addresses not seen before. Answers
+name their question by catalog id or by wording, which is stored by id when
+the catalog has it. Bad lines are reported with their line number and
+skipped; the rest import.
+
+    python -m app.importer legacy.ndjson [--offline]
+
+Imported rows reach the search index through its triggers, as every other
+write does. With --offline, while the server is stopped, each SQLite batch
+instead drops the insert triggers under its write lock and indexes its rows
+with one statement per table, which is several times faster; running servers
+would see the schema change under their pooled connections, so POST /import/
+never does this.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import catalog, config, search, summary, versions
+from app.models import Assessment, AssessmentStatus, QuestionThread, ScreeningAnswer, ThreadComment, User
+from app.routes.assessment import ScreeningAnswerRequest
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportComment(BaseModel):
+    author_email: str
+    body: str
+    created_at: Optional[datetime] = None
+
+
+class ImportThread(BaseModel):
+    question_text: str
+    opened_by_email: str
+    status: str = "open"  # open/resolved
+    created_at: Optional[datetime] = None
+    comments: List[ImportComment] = []
+
+
+class ImportAssessment(BaseModel):
+    title: str
+    owner_email: str
+    approver_email: Optional[str] = None
+    status: AssessmentStatus = AssessmentStatus.screening
+    is_new: bool = True
+    created_at: Optional[datetime] = None
+    answers: List[ScreeningAnswerRequest] = []
+    threads: List[ImportThread] = []
+
+    def emails(self):
+        yield self.owner_email
+        if self.approver_email:
+            yield self.approver_email
+        for thread in self.threads:
+            yield thread.opened_by_email
+            for comment in thread.comments:
+                yield comment.author_email
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _resolve_emails(session: AsyncSession, records, user_ids: dict):
+    """Add the ids of emails not yet in `user_ids` with one query."""
+    wanted = {email for _, record in records for email in record.emails()} - user_ids.keys()
+    if wanted:
+        rows = (await session.execute(select(User.email, User.id).where(User.email.in_(wanted)))).all()
+        user_ids.update(dict(rows))
+
+
+async def _insert_ids(session: AsyncSession, model, rows: list) -> list:
+    """Insert `rows` of `model` and return their new ids, in order.
+
+    SQLite cannot batch an INSERT .. RETURNING whose rows must come back in
+    parameter order (SQLAlchemy falls back to one statement per row), so
+    there the ids are handed out past max(id) instead; the caller already
+    holds the database write lock, so nothing can take them in between."""
+    if session.bind.dialect.name == "sqlite":
+        start = (await session.execute(select(func.max(model.id)))).scalar() or 0
+        ids = list(range(start + 1, start + 1 + len(rows)))
+        await session.execute(model.__table__.insert(), [{**row, "id": id_} for row, id_ in zip(rows, ids)])
+        return ids
+    return (await session.execute(
+        model.__table__.insert().returning(model.id, sort_by_parameter_order=True), rows
+    )).scalars().all()
+
+
+async def _write_batch(session: AsyncSession, records, user_ids: dict, offline: bool = False):
+    """Insert one batch of (line number, record) and commit it; `offline` as in import_lines.
+    Returns the number imported and the (line, error) of the records left out."""
+    await _resolve_emails(session, records, user_ids)
+    questions = catalog.current()
+    valid, resolved, errors = [], [], []
+    for line, record in records:
+        unknown = sorted({email for email in record.emails() if email not in user_ids})
+        if unknown:
+            errors.append((line, f"Unknown user email(s): {', '.join(unknown)}"))
+            continue
+        try:
+            resolved.append([questions.resolve(a.question, a.question_id, a.catalog_version) for a in record.answers])
+        except catalog.UnknownQuestion as exc:
+            errors.append((line, str(exc)))
+            continue
+        valid.append(record)
+    if not valid:
+        return 0, errors
+
+    # First writes of the transaction, status counts then versions as on every write path;
+    # on SQLite they take the write lock _insert_ids relies on
+    await summary.adjust_many(session, Counter(
+        (user_ids[r.owner_email], user_ids[r.approver_email] if r.approver_email else None, r.status)
+        for r in valid
+    ))
+    await versions.bump(session, versions.ASSESSMENTS)
+    defer_index = offline and session.bind.dialect.name == "sqlite"
+    if defer_index:
+        search_marks = await session.run_sync(lambda s: search.suspend_insert_triggers(s.connection()))
+    now = datetime.utcnow()
+    assessment_ids = await _insert_ids(session, Assessment, [
+        {
+            "title": r.title,
+            "owner_user_id": user_ids[r.owner_email],
+            "approver_user_id": user_ids[r.approver_email] if r.approver_email else None,
+            "status": r.status,
+            "is_new": r.is_new,
+            "created_at": r.created_at or now,
+        }
+        for r in valid
+    ])
+
+    answers = [
+        {"assessment_id": assessment_id, "question_id": question_id, "catalog_version": version,
+         "question_text": text, "answer": a.answer, "notes": a.notes, "created_at": r.created_at or now}
+        for assessment_id, r, questions_of in zip(assessment_ids, valid, resolved)
+        for a, (question_id, version, text) in zip(r.answers, questions_of)
+    ]
+    if answers:
+        await session.execute(ScreeningAnswer.__table__.insert(), answers)
+
+    threads = [(assessment_id, r, t) for assessment_id, r in zip(assessment_ids, valid) for t in r.threads]
+    if threads:
+        thread_ids = await _insert_ids(session, QuestionThread, [
+            {"assessment_id": assessment_id, "question_text": t.question_text,
+             "question_id": question_id, "catalog_version": version,
+             "opened_by": user_ids[t.opened_by_email], "status": t.status,
+             "created_at": t.created_at or r.created_at or now}
+            for (assessment_id, r, t), (question_id, version) in zip(
+                threads, (questions.resolve_thread(t.question_text) for _, _, t in threads)
+            )
+        ])
+        comments = [
+            {"thread_id": thread_id, "author_id": user_ids[c.author_email], "body": c.body,
+             "created_at": c.created_at or t.created_at or r.created_at or now}
+            for thread_id, (_, r, t) in zip(thread_ids, threads) for c in t.comments
+        ]
+        if comments:
+            await session.execute(ThreadComment.__table__.insert(), comments)
+
+    if defer_index:
+        await session.run_sync(lambda s: search.index_since(s.connection(), search_marks))
+
+    await session.commit()
+    return len(valid), errors
+
+
+async def _flush(session: AsyncSession, batch, user_ids: dict, report: ImportReport, offline: bool):
+    try:
+        imported, errors = await _write_batch(session, batch, user_ids, offline)
+    except DBAPIError as exc:
+        # The whole batch rolls back together; report every line in it
+        await session.rollback()
+        logger.warning("Import batch starting at line %d failed: %s", batch[0][0], exc)
+        for line, _ in batch:
+            report.error(line, f"Batch rejected by the database: {exc.orig}")
+        return
+    report.imported += imported
+    for line, message in errors:
+        report.error(line, message)
+
+
+async def import_lines(session: AsyncSession, lines, batch_size: int = None, offline: bool = False) -> dict:
+    """Import NDJSON from an async iterable of lines (str or bytes). Returns the report.
+    `offline` (no server running) lets SQLite batches index search in bulk, see the module docstring."""
+    batch_size = batch_size or config.IMPORT_BATCH_SIZE
+    report = ImportReport()
+    user_ids = {}
+    batch = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            batch.append((line_number, ImportAssessment.model_validate_json(line)))
+        except ValidationError as exc:
+            report.error(line_number, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'line'}: {err['msg']}" for err in exc.errors()
+            ))
+        if len(batch) >= batch_size:
+            await _flush(session, batch, user_ids, report, offline)
+            batch = []
+    if batch:
+        await _flush(session, batch, user_ids, report, offline)
+    return report.as_dict()
+
+
+async def split_lines(chunks):
+    """Lines of an async stream of byte chunks."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def _file_lines(path):
+    with open(path, "rb") as f:
+        for line in f:
+            yield line
+
+
+async def _import_file(path, batch_size, offline: bool = False):
+    from app.database import async_engine
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        return await import_lines(session, _file_lines(path), batch_size, offline)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import of assessments from NDJSON")
+    parser.add_argument("path", help="NDJSON file, one assessment per line")
+    parser.add_argument("--batch-size", type=int, default=None, help="records per transaction")
+    parser.add_argument("--offline", action="store_true",
+                        help="no server is running: index search per batch instead of per row (SQLite)")
+    args = parser.parse_args(argv)
+    report = asyncio.run(_import_file(args.path, args.batch_size, args.offline))
+    print(f"Imported {report['imported']} assessments, {report['failed']} failed")
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,31 @@
 # app/main.py
 from sqlmodel import select
-from fastapi import FastAPI, Depends, HTTPException
+from sqlalchemy import text
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from .database import create_db_and_tables
-from app.auth import create_token, hash_password, verify_password
+import asyncio
+import logging
+from typing import Optional
+from .database import engine, async_engine
+from app import catalog, config, events, gating, hashing, metrics, migrations, profiler, purge, ratelimit
+from app.compression import CompressionMiddleware
+from app.responses import FastJSONResponse
+from app.auth import create_token
 from app.models import User
 from app.deps import get_current_user, get_session
 from .routes.assessment import router as assessment_router  # if main.py is inside app/
 from pydantic import BaseModel
 from app.routes.threads import router as threads_router
-app = FastAPI(title="Risk Assessments")
+from app.routes.search import router as search_router
+from app.routes.export import router as export_router
+from app.routes.imports import router as import_router
+from app.routes.questions import router as questions_router
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Risk Assessments", default_response_class=FastJSONResponse)
 
 
 class RegisterRequest(BaseModel):
@@ -27,27 +42,141 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
     allow_credentials=True,
+    expose_headers=["X-Next-After-Id", "ETag", "Server-Timing", "X-SQL-N-Plus-One"],
 )
+# gzip/brotli for bodies of COMPRESS_MIN_SIZE bytes or more, per the client's Accept-Encoding
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESS_MIN_SIZE,
+    gzip_level=config.GZIP_LEVEL,
+    brotli_quality=config.BROTLI_QUALITY,
+)
+# Server-Timing and slow/N+1 logging while profiling is on (see app/profiler.py)
+app.add_middleware(profiler.SQLProfilerMiddleware)
+# Outermost, so request timings include compression
+if config.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+_background_tasks = []
+
+
+class Readiness:
+    """Whether this worker should get traffic (GET /ready), as opposed to being alive (GET /health)."""
+    preloaded = False  # set by run_server.py --prod once the schema is checked, before workers fork
+    background_tasks = True  # run_server.py --prod leaves the purger and event pruner to its first worker
+    started = False
+    draining = False
+
+
+readiness = Readiness()
 
 @app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+async def on_startup():
+    if not readiness.preloaded:
+        # Schema changes run once at deploy time (python -m app.migrations upgrade), not per worker
+        migrations.ensure_current(engine)
+        # A broken gate rules file fails the start, not the first screening submission
+        gating.current()
+        catalog.current()
+    metrics.registry.register_routes(app.routes)
+    # Every worker feeds its own live-update subscribers from the shared event log
+    _background_tasks.append(asyncio.create_task(events.run_listener(async_engine)))
+    if readiness.background_tasks:
+        _background_tasks.append(asyncio.create_task(events.run_pruner(async_engine)))
+    if config.SOFT_DELETE and readiness.background_tasks:
+        _background_tasks.append(asyncio.create_task(purge.run_purger(async_engine)))
+    readiness.started = True
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    readiness.draining = True
+    for task in _background_tasks:
+        task.cancel()
+    # Let them release their connections before the pool goes away
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    await hashing.shutdown()
+
+@app.exception_handler(hashing.HashingBusy)
+def hashing_busy_handler(request: Request, exc: hashing.HashingBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in requests, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(ratelimit.RateLimited)
+def rate_limited_handler(request: Request, exc: ratelimit.RateLimited):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many attempts, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 # Include routers AFTER app is created
 app.include_router(assessment_router)
 app.include_router(threads_router)
+app.include_router(search_router)
+app.include_router(export_router)
+app.include_router(import_router)
+app.include_router(questions_router)
 
 @app.get("/health")
-def health():
+async def health():
     return {"ok": True}
 
+@app.get("/ready")
+async def ready():
+    """503 until startup has finished, once the worker starts draining, and while the database is unreachable."""
+    if not readiness.started or readiness.draining:
+        return JSONResponse(status_code=503, content={"ready": False, "draining": readiness.draining})
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        return JSONResponse(status_code=503, content={"ready": False, "draining": False})
+    return {"ready": True}
+
+if config.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        return Response(metrics.render(async_engine), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+class SQLProfileSettings(BaseModel):
+    enabled: bool
+    slow_ms: Optional[int] = None
+    n_plus_one_threshold: Optional[int] = None
+
+@app.get("/debug/sql-profile", include_in_schema=False)
+async def get_sql_profile(current_user: User = Depends(get_current_user)):
+    if current_user.role != "approver":
+        raise HTTPException(status_code=403, detail="Only approvers can view profiling settings")
+    return profiler.profiler.settings()
+
+@app.put("/debug/sql-profile", include_in_schema=False)
+async def set_sql_profile(req: SQLProfileSettings, current_user: User = Depends(get_current_user)):
+    """Switch SQL profiling in this worker process; other workers keep their setting."""
+    if current_user.role != "approver":
+        raise HTTPException(status_code=403, detail="Only approvers can change profiling settings")
+    if req.slow_ms is not None:
+        profiler.profiler.slow_ms = req.slow_ms
+    if req.n_plus_one_threshold is not None:
+        profiler.profiler.n_plus_one_threshold = max(req.n_plus_one_threshold, 2)
+    profiler.profiler.set_enabled(req.enabled)
+    return profiler.profiler.settings()
+
+async def _find_user(session, email):
+    return (await session.exec(select(User).where(User.email == email))).first()
+
 @app.post("/auth/login")
-def login(form: OAuth2PasswordRequestForm = Depends(), session=Depends(get_session)):
+async def login(request: Request, form: OAuth2PasswordRequestForm = Depends(), session=Depends(get_session)):
+    # Before the user lookup and bcrypt; raises RateLimited (429)
+    ratelimit.check_login(request, form.username)
     try:
         # Frontend sends SHA-256 hashed password, we need to verify it against stored bcrypt hash
-        result = session.exec(select(User).where(User.email == form.username))
-        user = result.first()
+        user = await _find_user(session, form.username)
         if not user:
+            ratelimit.login_failed(form.username)
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         # The password from frontend is already SHA-256 hashed
@@ -61,35 +190,36 @@ def login(form: OAuth2PasswordRequestForm = Depends(), session=Depends(get_sessi
         # 2. Hash password_hash_from_frontend with that salt
         # 3. Compare result with stored_hash
         # This works because bcrypt stores the salt in the hash itself
-        if not verify_password(password_hash_from_frontend, stored_hash):
+        if not await hashing.verify_password(password_hash_from_frontend, stored_hash):
+            ratelimit.login_failed(form.username)
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         return {"access_token": create_token(user.email, user.role), "token_type": "bearer", "role": user.role}
-    except HTTPException:
+    except (HTTPException, hashing.HashingBusy, ratelimit.RateLimited):
         raise
-    except Exception as e:
-        # Log the error for debugging
-        print(f"Login error: {str(e)}")
+    except Exception:
+        logger.exception("Login failed for %r", form.username)
         raise HTTPException(status_code=500, detail="Internal server error during login")
 
 @app.get("/auth/me")
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user)):
     return {"id": current_user.id, "email": current_user.email, "role": current_user.role}
 
 @app.post("/auth/register")
-def register(req: RegisterRequest, session=Depends(get_session)):
+async def register(req: RegisterRequest, request: Request, session=Depends(get_session)):
+    ratelimit.check_register(request)
     if req.role not in ("owner", "approver"):
         raise HTTPException(status_code=400, detail="Invalid role")
     # Frontend sends SHA-256 hashed password (64 hex chars)
     # SHA-256 produces 64 hex characters, but allow some flexibility for edge cases
     if len(req.password) < 60 or len(req.password) > 70:
         raise HTTPException(status_code=400, detail=f"Invalid password format. Expected SHA-256 hash (64 chars), got {len(req.password)}")
-    existing = session.exec(select(User).where(User.email == req.email)).first()
+    existing = await _find_user(session, req.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email taken")
     # Hash the SHA-256 hash with bcrypt before storing
     # This way: stored = bcrypt(SHA-256(plain_password))
-    u = User(email=req.email, password_hash=hash_password(req.password), role=req.role)
-    session.add(u); session.commit(); session.refresh(u)
+    u = User(email=req.email, password_hash=await hashing.hash_password(req.password), role=req.role)
+    session.add(u); await session.commit(); await session.refresh(u)
     return {"id": u.id, "email": u.email, "role": u.role}
 
@@ -0,0 +1,217 @@
+# app/metrics.py
+"""
+Request, database and executor metrics in the Prometheus text format
+(GET /metrics).
+
+Collection is kept off the hot path's critical costs: every series is a
+preallocated Histogram or integer attribute, created once per route at
+startup, and updated with plain increments from the event loop thread, so no
+locks are taken. Queries are counted per request through a context variable
+and the engine's cursor events. Pool, cache, threadpool, hashing and
+rate-limit gauges are read when /metrics is scraped, not maintained per
+request.
+
+Set SRA_METRICS=0 to leave the middleware and the cursor listener out
+entirely.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+UNMATCHED = "unmatched"  # 404s and other requests no route claimed
+
+_queries: ContextVar[Optional[list]] = ContextVar("sra_queries", default=None)
+
+
+class Histogram:
+    """Fixed buckets; `observe` is a bisect and two increments."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str):
+        sep = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class RouteMetrics:
+    __slots__ = ("labels", "latency", "queries", "responses")
+
+    def __init__(self, method: str, path: str):
+        self.labels = f'method="{method}",route="{path}"'
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.responses = {}  # status code -> count
+
+
+class Registry:
+    def __init__(self):
+        self.routes = {}  # (method, path template) -> RouteMetrics
+        self.in_flight = 0
+        self.pool_wait = Histogram(POOL_WAIT_BUCKETS)
+        self.pool_timeouts = 0
+
+    def register_routes(self, routes):
+        """Allocate the series of every route up front."""
+        for route in routes:
+            for method in getattr(route, "methods", None) or ():
+                self.route(method, route.path)
+
+    def route(self, method: str, path: str) -> RouteMetrics:
+        key = (method, path)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics(method, path)
+        return metrics
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and counts its queries, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = _queries.set(queries)
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            _queries.reset(token)
+            route = scope.get("route")
+            metrics = registry.route(scope["method"], route.path if route is not None else UNMATCHED)
+            metrics.latency.observe(elapsed)
+            metrics.queries.observe(queries[0])
+            metrics.responses[status] = metrics.responses.get(status, 0) + 1
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    queries = _queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The async engine's pool, timing how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            registry.pool_timeouts += 1
+            raise
+        finally:
+            registry.pool_wait.observe(time.perf_counter() - started)
+
+
+def instrument_engine(async_engine):
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
+
+
+def _gauge(name: str, help_: str, value, kind: str = "gauge"):
+    return [f"# HELP {name} {help_}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+def render(async_engine) -> str:
+    """Every series, in the Prometheus text exposition format (version 0.0.4)."""
+    from anyio.to_thread import current_default_thread_limiter
+    from app import hashing, ratelimit
+    from app.deps import principal_cache
+
+    routes = sorted(registry.routes.values(), key=lambda m: m.labels)
+    lines = [
+        "# HELP sra_http_requests_total Responses by route and status code.",
+        "# TYPE sra_http_requests_total counter",
+    ]
+    for m in routes:
+        for status, count in sorted(m.responses.items()):
+            lines.append(f'sra_http_requests_total{{{m.labels},status="{status}"}} {count}')
+    lines += ["# HELP sra_http_request_duration_seconds Time to the end of the response body, by route.",
+              "# TYPE sra_http_request_duration_seconds histogram"]
+    for m in routes:
+        lines.extend(m.latency.lines("sra_http_request_duration_seconds", m.labels))
+    lines += ["# HELP sra_http_request_queries SQL statements run per request, by route.",
+              "# TYPE sra_http_request_queries histogram"]
+    for m in routes:
+        lines.extend(m.queries.lines("sra_http_request_queries", m.labels))
+    lines += _gauge("sra_http_requests_in_flight", "Requests being handled.", registry.in_flight)
+
+    pool = async_engine.sync_engine.pool
+    lines += ["# HELP sra_db_pool_wait_seconds Time to check a connection out of the pool.",
+              "# TYPE sra_db_pool_wait_seconds histogram"]
+    lines.extend(registry.pool_wait.lines("sra_db_pool_wait_seconds", ""))
+    lines += _gauge("sra_db_pool_timeouts_total", "Checkouts that failed or timed out.", registry.pool_timeouts, "counter")
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        lines += _gauge("sra_db_pool_size", "Configured pool size.", pool.size())
+        lines += _gauge("sra_db_pool_checked_out", "Connections in use.", pool.checkedout())
+        lines += _gauge("sra_db_pool_overflow", "Connections open beyond the pool size.", max(pool.overflow(), 0))
+
+    cache = principal_cache.stats()
+    lines += _gauge("sra_principal_cache_hits_total", "Authenticated users found in the cache.", cache["hits"], "counter")
+    lines += _gauge("sra_principal_cache_misses_total", "Authenticated users loaded from the database.",
+                    cache["misses"], "counter")
+    lines += _gauge("sra_principal_cache_size", "Users in the cache.", cache["size"])
+
+    limiter = current_default_thread_limiter()
+    lines += _gauge("sra_threadpool_busy", "Threadpool threads running sync code.", limiter.borrowed_tokens)
+    lines += _gauge("sra_threadpool_size", "Threadpool capacity.", limiter.total_tokens)
+    lines += _gauge("sra_threadpool_waiting", "Tasks queued for a threadpool thread.", limiter.statistics().tasks_waiting)
+
+    hashes = hashing.metrics.stats()
+    lines += _gauge("sra_hash_in_flight", "Password hashes running or queued.", hashes["in_flight"])
+    lines += _gauge("sra_hash_max_pending", "Hashes allowed in flight before 503.", hashes["max_pending"])
+    lines += _gauge("sra_hash_total", "Password hashes completed.", hashes["count"], "counter")
+    lines += _gauge("sra_hash_rejected_total", "Sign-ins turned away with 503.", hashes["rejected"], "counter")
+    lines += _gauge("sra_hash_seconds_total", "Time spent on password hashes, queueing included.",
+                    f"{hashing.metrics.total_seconds:.6f}", "counter")
+
+    limits = ratelimit.auth_limiter.stats()
+    lines += _gauge("sra_auth_rate_limit_ip_keys", "Client IPs with a sign-in bucket.", limits["ip_keys"])
+    lines += _gauge("sra_auth_rate_limit_account_keys", "Account names with a sign-in bucket.", limits["account_keys"])
+    lines += _gauge("sra_auth_rate_limited_ip_total", "Sign-ins turned away with 429 for their client IP.",
+                    limits["ip_rejected"], "counter")
+    lines += _gauge("sra_auth_rate_limited_account_total", "Sign-ins turned away with 429 for their account name.",
+                    limits["account_rejected"], "counter")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,311 @@
+# app/migrations.py
+"""
+Versioned schema migrations.
+
+Each migration runs once, in order, inside its own transaction, and is
+recorded in the `schema_version` table. Run them at deploy time, before the
+app workers start:
+
+    python -m app.migrations upgrade   # apply pending migrations
+    python -m app.migrations status    # current and latest version
+    python -m app.migrations check     # pending migrations and missing indexes (exit 1 if any)
+
+Migrations must be safe to run against a database that already has their
+changes, because the baseline creates tables from the current models. For the
+same reason a model change can break an earlier migration on an old database;
+`python bench/check_upgrade.py` upgrades a copy of the shipped app.db to catch
+that.
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, event, inspect, text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import AddConstraint, CreateTable
+from sqlmodel import SQLModel
+
+from app import config
+from app import catalog, search, summary
+from app.models import (
+    Assessment, AssessmentEvent, AssessmentStatusCount, Question, QuestionThread, ResourceVersion, ScreeningAnswer,
+    ThreadComment, User,
+)
+
+logger = logging.getLogger(__name__)
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+# Helpers for idempotent migrations
+
+def _columns(conn, table):
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+def _add_column_if_missing(conn, table, column, ddl_type):
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _create_indexes(conn, model, names=None):
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(model.__tablename__)}
+    for index in model.__table__.indexes:
+        if index.name not in existing and (names is None or index.name in names):
+            index.create(conn)
+
+
+def _missing_foreign_keys(conn, model):
+    existing = {
+        (tuple(fk["constrained_columns"]), fk["referred_table"])
+        for fk in inspect(conn).get_foreign_keys(model.__tablename__)
+    }
+    return [
+        fk for fk in model.__table__.foreign_key_constraints
+        if (tuple(fk.column_keys), fk.referred_table.name) not in existing
+    ]
+
+
+def _rebuild_sqlite_table(conn, model):
+    """SQLite cannot ALTER in a constraint: copy the table into a new one built from the model.
+    The new table has the model's current columns, which may be more than an older database's
+    table has; only the columns both share are copied, and later migrations find the rest there.
+    Triggers on the old table are dropped with it; reinstall them afterwards (see app.search)."""
+    table = model.__table__
+    staging = MetaData()
+    for other in SQLModel.metadata.sorted_tables:
+        other.to_metadata(staging)
+    new_table = table.to_metadata(staging, name=f"_new_{table.name}")
+    existing = _columns(conn, table.name)
+    columns = ", ".join(c.name for c in table.columns if c.name in existing)
+    conn.execute(CreateTable(new_table))
+    conn.execute(text(f"INSERT INTO {new_table.name} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {new_table.name} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(conn)
+
+
+# Migrations
+
+def _baseline(conn):
+    """Tables as of the first versioned release, plus the columns older databases were patched with."""
+    SQLModel.metadata.create_all(
+        conn,
+        tables=[m.__table__ for m in (User, Assessment, QuestionThread, ThreadComment, ScreeningAnswer)],
+    )
+    sqlite = conn.dialect.name == "sqlite"
+    _add_column_if_missing(conn, "assessment", "approver_user_id", "INTEGER")
+    _add_column_if_missing(conn, "assessment", "is_new", "BOOLEAN DEFAULT 1" if sqlite else "BOOLEAN DEFAULT TRUE")
+    _add_column_if_missing(conn, "assessment", "deleted_at", "DATETIME" if sqlite else "TIMESTAMP")
+
+
+def _hot_column_indexes(conn):
+    """Indexes for the columns the routers filter and join on."""
+    _create_indexes(conn, Assessment, {
+        "ix_assessment_owner_user_id", "ix_assessment_approver_user_id", "ix_assessment_deleted_at",
+    })
+    _create_indexes(conn, QuestionThread, {"ix_questionthread_opened_by"})
+    _create_indexes(conn, ThreadComment, {"ix_threadcomment_thread_id_created_at"})
+    # Covered by the (thread_id, created_at) index
+    conn.execute(text("DROP INDEX IF EXISTS ix_threadcomment_thread_id"))
+
+
+def _cascade_foreign_keys(conn):
+    """Tie threads, comments and answers to their parents with ON DELETE CASCADE."""
+    # Rows whose parent is already gone could never be reached again; drop them so the constraints hold
+    conn.execute(text("DELETE FROM questionthread WHERE assessment_id NOT IN (SELECT id FROM assessment)"))
+    conn.execute(text("DELETE FROM threadcomment WHERE thread_id NOT IN (SELECT id FROM questionthread)"))
+    conn.execute(text("DELETE FROM screeninganswer WHERE assessment_id NOT IN (SELECT id FROM assessment)"))
+    for model in (QuestionThread, ThreadComment, ScreeningAnswer):
+        missing = _missing_foreign_keys(conn, model)
+        if not missing:
+            continue
+        if conn.dialect.name == "sqlite":
+            _rebuild_sqlite_table(conn, model)
+        else:
+            for constraint in missing:
+                conn.execute(AddConstraint(constraint))
+
+
+def _status_summary(conn):
+    """Dashboard status counts, filled from the existing assessments."""
+    AssessmentStatusCount.__table__.create(conn, checkfirst=True)
+    summary.rebuild(conn)
+
+
+def _resource_versions(conn):
+    """Change counters for the ETags of the read endpoints; absent keys read as version 0."""
+    ResourceVersion.__table__.create(conn, checkfirst=True)
+
+
+def _search_index(conn):
+    """FTS5 index over titles, screening notes, thread questions and comments (SQLite only)."""
+    if not search.supported(conn):
+        logger.info("Skipping the full-text index: %s has no FTS5", conn.dialect.name)
+        return
+    search.rebuild(conn)
+
+
+def _question_catalog(conn):
+    """Question catalog; answers and threads reference catalog questions by id and catalog version.
+    Answers to catalog questions drop their copy of the question text."""
+    Question.__table__.create(conn, checkfirst=True)
+    version = catalog.sync(conn)
+    for table in ("screeninganswer", "questionthread"):
+        _add_column_if_missing(conn, table, "question_id", "INTEGER")
+        _add_column_if_missing(conn, table, "catalog_version", "INTEGER")
+    text_column = next(c for c in inspect(conn).get_columns("screeninganswer") if c["name"] == "question_text")
+    if not text_column["nullable"]:
+        if conn.dialect.name == "sqlite":
+            _rebuild_sqlite_table(conn, ScreeningAnswer)
+            if search.supported(conn):
+                search.install(conn)
+        else:
+            conn.execute(text("ALTER TABLE screeninganswer ALTER COLUMN question_text DROP NOT NULL"))
+    _create_indexes(conn, ScreeningAnswer, {"ix_screeninganswer_question"})
+    _create_indexes(conn, QuestionThread, {"ix_questionthread_question_id"})
+
+    params = {"version": version}
+    conn.execute(text(
+        "UPDATE screeninganswer SET catalog_version = :version, question_id = "
+        "(SELECT q.id FROM question q WHERE q.catalog_version = :version AND q.text = screeninganswer.question_text) "
+        "WHERE question_id IS NULL AND question_text IN (SELECT text FROM question WHERE catalog_version = :version)"
+    ), params)
+    conn.execute(text("UPDATE screeninganswer SET question_text = NULL WHERE question_id IS NOT NULL"))
+    # Thread texts are "<question>: <message>"; the message stays with the thread
+    conn.execute(text(
+        "UPDATE questionthread SET catalog_version = :version, question_id = "
+        "(SELECT q.id FROM question q WHERE q.catalog_version = :version "
+        " AND (questionthread.question_text = q.text "
+        "      OR substr(questionthread.question_text, 1, length(q.text) + 2) = q.text || ': ') LIMIT 1) "
+        "WHERE question_id IS NULL"
+    ), params)
+    conn.execute(text("UPDATE questionthread SET catalog_version = NULL WHERE question_id IS NULL"))
+
+
+def _postgres_search_indexes(conn):
+    """Full-text search on PostgreSQL: GIN indexes over the searched columns (SQLite uses FTS5)."""
+    if conn.dialect.name == "postgresql":
+        search.install_pg(conn)
+
+
+def _assessment_events(conn):
+    """Event log behind the live updates, shared by every worker (app/events.py)."""
+    AssessmentEvent.__table__.create(conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "indexes on hot filter columns", _hot_column_indexes),
+    (3, "cascading foreign keys for threads, comments and answers", _cascade_foreign_keys),
+    (4, "assessment status summary counts", _status_summary),
+    (5, "resource versions for conditional GETs", _resource_versions),
+    (6, "full-text search index", _search_index),
+    (7, "question catalog referenced by answers and threads", _question_catalog),
+    (8, "full-text search indexes on PostgreSQL", _postgres_search_indexes),
+    (9, "assessment event log for live updates", _assessment_events),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def migration_engine(url: str = config.DATABASE_URL):
+    engine = create_engine(url, poolclass=NullPool)
+    if engine.dialect.name == "sqlite":
+        # pysqlite only opens transactions before DML; take over so DDL is transactional too
+        @event.listens_for(engine, "connect")
+        def _no_implicit_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+    return engine
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def upgrade(engine=None) -> list:
+    """Apply pending migrations in order. Returns the versions applied."""
+    engine = engine or migration_engine()
+    with engine.begin() as conn:
+        _version_metadata.create_all(conn)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            if current_version(conn) >= version:
+                continue
+            logger.info("Applying migration %d: %s", version, description)
+            migrate(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow(),
+            ))
+        applied.append(version)
+    return applied
+
+
+def missing_indexes(conn) -> list:
+    """Indexes declared on the models that the database does not have."""
+    inspector = inspect(conn)
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        missing.extend(f"{table.name}.{ix.name}" for ix in table.indexes if ix.name not in existing)
+    return missing
+
+
+def ensure_current(engine):
+    """Fail fast at app startup when the schema has not been migrated."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version}, the app needs {LATEST_VERSION}. "
+            "Run `python -m app.migrations upgrade` before starting the server."
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", choices=["upgrade", "status", "check"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    engine = migration_engine()
+    if args.command == "upgrade":
+        applied = upgrade(engine)
+        print(f"Applied migrations: {applied}" if applied else "Schema already up to date")
+        return 0
+
+    with engine.connect() as conn:
+        version = current_version(conn)
+        print(f"Schema version {version} of {LATEST_VERSION}")
+        if args.command == "status":
+            return 0
+        problems = [f"pending migration {v}: {d}" for v, d, _ in MIGRATIONS if v > version]
+        problems += [f"missing index {name}" for name in missing_indexes(conn)]
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
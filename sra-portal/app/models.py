@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import SQLModel, Field
 
 class Role(str, Enum):
@@ -28,32 +29,74 @@ class AssessmentStatus(str, Enum):
 class Assessment(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
-    owner_user_id: int = Field(foreign_key="user.id")
-    approver_user_id: Optional[int] = Field(default=None, foreign_key="user.id")  # Assigned approver
+    owner_user_id: int = Field(foreign_key="user.id", index=True)
+    approver_user_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)  # Assigned approver
     status: AssessmentStatus = Field(default=AssessmentStatus.screening, index=True)
     is_new: bool = Field(default=True)  # New assessment or existing
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    deleted_at: Optional[datetime] = Field(default=None, index=True)  # Soft-deleted, waiting for purge
+
+class Question(SQLModel, table=True):
+    """A screening question as worded in one version of the catalog (app/question_catalog.json)."""
+    id: int = Field(primary_key=True)
+    catalog_version: int = Field(primary_key=True)
+    position: int
+    text: str
+    kind: str  # boolean, text, select or multiselect
+    page: int = Field(default=1)
+    options: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
 
 class QuestionThread(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    assessment_id: int = Field(index=True)
-    question_text: str
-    opened_by: int  # Approver user id
+    assessment_id: int = Field(index=True, foreign_key="assessment.id", ondelete="CASCADE")
+    question_text: str  # "<question>: <approver's message>"
+    question_id: Optional[int] = Field(default=None, index=True)  # catalog question the thread is about
+    catalog_version: Optional[int] = None
+    opened_by: int = Field(index=True)  # Approver user id
     status: str = Field(default="open", index=True)  # open/resolved
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class ThreadComment(SQLModel, table=True):
+    # (thread_id, created_at) serves both "comments of a thread" and their display order
+    __table_args__ = (Index("ix_threadcomment_thread_id_created_at", "thread_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    thread_id: int = Field(index=True)
+    thread_id: int = Field(foreign_key="questionthread.id", ondelete="CASCADE")
     author_id: int
     body: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class ScreeningAnswer(SQLModel, table=True):
+    __table_args__ = (Index("ix_screeninganswer_question", "question_id", "catalog_version"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    assessment_id: int = Field(index=True)
-    question_text: str
+    assessment_id: int = Field(index=True, foreign_key="assessment.id", ondelete="CASCADE")
+    # Catalog questions are stored by id; question_text is only kept for questions outside the catalog
+    question_id: Optional[int] = None
+    catalog_version: Optional[int] = None
+    question_text: Optional[str] = None
     answer: bool
     notes: str = Field(default="")
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: Optional[datetime] = None
\ No newline at end of file
+    updated_at: Optional[datetime] = None
+class AssessmentStatusCount(SQLModel, table=True):
+    """Running count of live assessments per status, maintained by the write paths.
+    scope is "all" (subject_id 0), "owner" or "approver" (subject_id 0 = unassigned)."""
+    scope: str = Field(primary_key=True)
+    subject_id: int = Field(primary_key=True)
+    status: AssessmentStatus = Field(primary_key=True)
+    count: int = Field(default=0)
+
+class ResourceVersion(SQLModel, table=True):
+    """Change counter per cacheable resource, e.g. "assessment:12"; feeds the read endpoints' ETags."""
+    key: str = Field(primary_key=True)
+    version: int = Field(default=0)
+
+class AssessmentEvent(SQLModel, table=True):
+    """A live update for the subscribers of one assessment (app/events.py), kept for
+    SRA_EVENT_RETENTION_SECONDS so reconnecting clients can resume from their Last-Event-ID."""
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})  # from the shared event counter
+    assessment_id: int = Field(index=True)
+    type: str
+    data: str  # JSON payload as sent
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
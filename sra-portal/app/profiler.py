@@ -0,0 +1,166 @@
+# app/profiler.py
+"""
+Per-request SQL profiling: the statements a request runs, their count and
+time, and N+1 patterns among them.
+
+While profiling is on, every HTTP response carries a Server-Timing header
+
+    Server-Timing: db;dur=12.4;desc="7 queries", app;dur=30.1
+
+(`app` is the time to the response headers, `db` the SQL time until then),
+and a request slower than SRA_SLOW_REQUEST_MS is logged as a warning on the
+`app.profiler` logger with its slowest statements. A statement text run
+SRA_N_PLUS_ONE_THRESHOLD or more times with different parameters in one
+request is reported as N+1, in the log and as `X-SQL-N-Plus-One` on the
+response, so listing loops that query per row show up without reading code.
+
+Profiling starts on with SRA_SQL_PROFILE=1 and is switched at runtime with
+`PUT /debug/sql-profile` (per process). When it is off the cursor listeners
+are removed from the engine and the middleware passes requests straight
+through, so the cost is one attribute check per request.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+LOGGED_STATEMENTS = 5  # slowest statements written to the slow-request log
+_trace: ContextVar[Optional["Trace"]] = ContextVar("sra_sql_trace", default=None)
+
+
+class Trace:
+    """Statements of one request: text -> [runs, total seconds, distinct parameter sets]."""
+
+    __slots__ = ("statements", "count", "seconds")
+
+    def __init__(self):
+        self.statements = {}
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, statement: str, parameters, seconds: float):
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = [0, 0.0, set()]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2].add(repr(parameters))
+        self.count += 1
+        self.seconds += seconds
+
+    def repeated(self, threshold: int):
+        """(statement, runs) of the N+1 suspects: same text, different parameters, `threshold`+ runs."""
+        return [(statement, runs) for statement, (runs, _, params) in self.statements.items()
+                if runs >= threshold and len(params) > 1]
+
+    def slowest(self, n: int = LOGGED_STATEMENTS):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [(statement, runs, seconds) for statement, (runs, seconds, _) in ranked[:n]]
+
+
+class Profiler:
+    """Switches the cursor listeners of the engines it is given on and off."""
+
+    def __init__(self, enabled: bool, slow_ms: int, n_plus_one_threshold: int):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._engines = []
+        self._want = enabled
+
+    def attach(self, async_engine):
+        self._engines.append(async_engine.sync_engine)
+        if self._want:
+            self.set_enabled(True)
+
+    def set_enabled(self, enabled: bool):
+        self._want = enabled
+        if enabled == self.enabled:
+            return
+        for sync_engine in self._engines:
+            if enabled:
+                event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+            else:
+                event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+                event.remove(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        self.enabled = enabled
+
+    def settings(self) -> dict:
+        return {"enabled": self.enabled, "slow_ms": self.slow_ms, "n_plus_one_threshold": self.n_plus_one_threshold}
+
+
+profiler = Profiler(config.SQL_PROFILE, config.SLOW_REQUEST_MS, config.N_PLUS_ONE_THRESHOLD)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _trace.get() is not None:
+        context._sra_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _trace.get()
+    started = getattr(context, "_sra_started", None)
+    if trace is not None and started is not None:
+        trace.add(statement, parameters, time.perf_counter() - started)
+
+
+class SQLProfilerMiddleware:
+    """Opens a Trace per HTTP request while profiling is on, and reports it."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        token = _trace.set(trace)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", (
+                    f'db;dur={trace.seconds * 1000:.1f};desc="{trace.count} queries", app;dur={elapsed_ms:.1f}'
+                ).encode()))
+                repeated = trace.repeated(profiler.n_plus_one_threshold)
+                if repeated:
+                    headers.append((b"x-sql-n-plus-one", str(max(runs for _, runs in repeated)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _trace.reset(token)
+            _report(scope, trace, time.perf_counter() - started)
+
+
+def _report(scope, trace: Trace, elapsed: float):
+    repeated = trace.repeated(profiler.n_plus_one_threshold)
+    slow = elapsed * 1000 >= profiler.slow_ms
+    if not (slow or repeated):
+        return
+    route = scope.get("route")
+    where = f"{scope['method']} {route.path if route is not None else scope['path']}"
+    lines = [f"{where}: {elapsed * 1000:.1f} ms, {trace.count} queries in {trace.seconds * 1000:.1f} ms"]
+    for statement, runs in repeated:
+        lines.append(f"  N+1: {runs}x {_one_line(statement)}")
+    if slow:
+        for statement, runs, seconds in trace.slowest():
+            lines.append(f"  {seconds * 1000:.1f} ms, {runs}x {_one_line(statement)}")
+    logger.warning("%s request %s", "Slow" if slow else "N+1", "\n".join(lines))
+
+
+def _one_line(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
@@ -0,0 +1,93 @@
+# app/purge.py
+"""
+Removal of assessments and everything that hangs off them.
+
+`delete_assessment_tree` does it in a handful of set-based DELETEs inside the
+caller's transaction. In soft-delete mode the request only stamps
+`Assessment.deleted_at`, and `run_purger` later removes the rows in small
+batches, one short transaction each, so other writers are never held up
+behind one large delete.
+"""
+import asyncio
+import logging
+
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import config, versions
+from app.models import Assessment, QuestionThread, ScreeningAnswer, ThreadComment
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_assessment_tree(session: AsyncSession, assessment_id: int):
+    """Delete an assessment, its answers, threads and comments. Does not commit."""
+    thread_ids = select(QuestionThread.id).where(QuestionThread.assessment_id == assessment_id)
+    await session.execute(delete(ThreadComment).where(ThreadComment.thread_id.in_(thread_ids)))
+    await session.execute(delete(QuestionThread).where(QuestionThread.assessment_id == assessment_id))
+    await session.execute(delete(ScreeningAnswer).where(ScreeningAnswer.assessment_id == assessment_id))
+    await session.execute(delete(Assessment).where(Assessment.id == assessment_id))
+
+
+async def _delete_batch(session: AsyncSession, model, condition, batch_size: int) -> int:
+    ids = select(model.id).where(condition).limit(batch_size)
+    result = await session.execute(delete(model).where(model.id.in_(ids)))
+    await session.commit()
+    return result.rowcount
+
+
+async def purge_assessment(async_engine, assessment_id: int, batch_size: int = None) -> int:
+    """Remove a soft-deleted assessment's rows, `batch_size` rows per transaction."""
+    batch_size = batch_size or config.PURGE_BATCH_SIZE
+    thread_ids = select(QuestionThread.id).where(QuestionThread.assessment_id == assessment_id)
+    steps = [
+        (ThreadComment, ThreadComment.thread_id.in_(thread_ids)),
+        (QuestionThread, QuestionThread.assessment_id == assessment_id),
+        (ScreeningAnswer, ScreeningAnswer.assessment_id == assessment_id),
+    ]
+    removed = 0
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        # Readers may have cached the hidden rows (threads stay listable until purged)
+        keys = await versions.assessment_tree_keys(session, assessment_id)
+        for model, condition in steps:
+            while True:
+                count = await _delete_batch(session, model, condition, batch_size)
+                removed += count
+                if count < batch_size:
+                    break
+                # Let waiting writers in between batches
+                await asyncio.sleep(0)
+        result = await session.execute(
+            delete(Assessment).where(Assessment.id == assessment_id, Assessment.deleted_at.is_not(None))
+        )
+        removed += result.rowcount
+        await versions.bump(session, *keys)
+        await session.commit()
+    return removed
+
+
+async def purge_deleted(async_engine) -> int:
+    """Purge every assessment currently marked as deleted."""
+    async with AsyncSession(async_engine) as session:
+        pending = (await session.exec(
+            select(Assessment.id).where(Assessment.deleted_at.is_not(None)).order_by(Assessment.deleted_at)
+        )).all()
+    removed = 0
+    for assessment_id in pending:
+        removed += await purge_assessment(async_engine, assessment_id)
+    return removed
+
+
+async def run_purger(async_engine):
+    """Background loop started by the app when soft delete is enabled."""
+    while True:
+        try:
+            removed = await purge_deleted(async_engine)
+            if removed:
+                logger.info("Purged %d soft-deleted rows", removed)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Soft-delete purge failed, retrying next interval")
+        await asyncio.sleep(config.PURGE_INTERVAL_SECONDS)
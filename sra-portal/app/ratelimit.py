@@ -0,0 +1,146 @@
+# app/ratelimit.py
+"""
+Token-bucket rate limiting for the password endpoints (/auth/login, /auth/register).
+
+Every sign-in or registration costs a bcrypt hash, so a script hammering these
+endpoints can pin every core. Each call takes a token from its client IP's
+bucket; when it is empty the call is answered with 429 and Retry-After before
+the form is checked against the database or any hash runs. Sign-ins are also
+turned away while the bucket of the account name they are for is empty, and
+only failed sign-ins spend its tokens: neither registering with someone's
+email nor signing in successfully can lock that account.
+
+The client IP is the address uvicorn reports. Behind a reverse proxy that is
+the proxy's, and every client would share one bucket, unless the proxy is
+trusted to name the client: uvicorn then takes it from X-Forwarded-For
+(SRA_FORWARDED_ALLOW_IPS for run_server.py, --forwarded-allow-ips for uvicorn).
+
+A bucket is one (tokens, timestamp) tuple in an LRU-ordered dict. A bucket
+left alone long enough to refill is the same as no bucket, so idle entries are
+swept from the cold end as new ones arrive, and the dict never holds more than
+`max_keys`; under high-cardinality traffic the least recently seen keys go
+first. State is per process and is only touched from the event loop.
+"""
+import time
+from collections import OrderedDict
+
+from app import config
+
+SWEEP_PER_CALL = 2  # idle buckets dropped per acquire, keeping sweeps incremental
+
+
+class RateLimited(Exception):
+    """Raised when a bucket is empty; maps to 429 + Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many requests")
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """Buckets of `burst` tokens refilled at `rate` tokens per second, one per key."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle_after = burst / rate  # seconds for an empty bucket to refill
+        self.rejected = 0
+        self._buckets = OrderedDict()  # key -> (tokens, updated at), least recently used first
+
+    def _tokens(self, key, now: float) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return float(self.burst)
+        tokens, updated = entry
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def _sweep(self, now: float):
+        buckets = self._buckets
+        for _ in range(SWEEP_PER_CALL):
+            if not buckets:
+                return
+            key, (_, updated) = next(iter(buckets.items()))
+            if now - updated < self.idle_after:
+                return
+            del buckets[key]
+
+    def wait(self, key, now: float = None) -> float:
+        """Seconds until `key` has a token (0 if it has one now)."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, (1 - self._tokens(key, now)) / self.rate)
+
+    def take(self, key, now: float = None):
+        """Spend one of `key`'s tokens; call `wait` first."""
+        now = time.monotonic() if now is None else now
+        self._buckets[key] = (self._tokens(key, now) - 1, now)
+        self._buckets.move_to_end(key)
+        self._sweep(now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def _account_key(account: str) -> str:
+    return (account or "").strip().lower()
+
+
+class AuthLimiter:
+    """Per-IP and per-account buckets for the password endpoints."""
+
+    def __init__(self):
+        per_second = 1 / 60
+        self.by_ip = TokenBuckets(config.AUTH_RATE_PER_IP * per_second, config.AUTH_BURST_PER_IP,
+                                  config.RATE_LIMIT_MAX_KEYS)
+        self.by_account = TokenBuckets(config.AUTH_RATE_PER_ACCOUNT * per_second, config.AUTH_BURST_PER_ACCOUNT,
+                                       config.RATE_LIMIT_MAX_KEYS)
+
+    def check(self, ip: str, account: str = None):
+        """Take a token from the IP's bucket, or raise RateLimited without taking it. With
+        `account`, also raise while that account's bucket is empty (see `failed`)."""
+        now = time.monotonic()
+        ip_wait = self.by_ip.wait(ip, now)
+        account_wait = self.by_account.wait(_account_key(account), now) if account is not None else 0.0
+        if ip_wait or account_wait:
+            (self.by_ip if ip_wait >= account_wait else self.by_account).rejected += 1
+            raise RateLimited(int(max(ip_wait, account_wait)) + 1)
+        self.by_ip.take(ip, now)
+
+    def failed(self, account: str):
+        """Spend one of `account`'s tokens for a failed sign-in."""
+        self.by_account.take(_account_key(account))
+
+    def stats(self) -> dict:
+        return {
+            "ip_keys": len(self.by_ip),
+            "account_keys": len(self.by_account),
+            "ip_rejected": self.by_ip.rejected,
+            "account_rejected": self.by_account.rejected,
+        }
+
+
+auth_limiter = AuthLimiter()
+
+
+def _client_ip(request) -> str:
+    return request.client.host if request.client else ""
+
+
+def check_login(request, account: str):
+    """Rate-limit a sign-in to `account` from the request's client."""
+    if config.AUTH_RATE_LIMIT:
+        auth_limiter.check(_client_ip(request), account)
+
+
+def login_failed(account: str):
+    """Count a failed sign-in against `account`."""
+    if config.AUTH_RATE_LIMIT:
+        auth_limiter.failed(account)
+
+
+def check_register(request):
+    """Rate-limit a registration from the request's client."""
+    if config.AUTH_RATE_LIMIT:
+        auth_limiter.check(_client_ip(request))
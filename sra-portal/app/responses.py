@@ -0,0 +1,49 @@
+# app/responses.py
+"""
+Fast JSON responses.
+
+`FastJSONResponse` is the app's default response class. Handlers that already
+hold result rows return it directly, so the rows are encoded in a single pass
+(with orjson when it is installed) instead of being copied into dicts and
+walked by FastAPI's jsonable_encoder first.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Row):
+        return value._asdict()
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    # Natively handled by orjson; only reached with the stdlib encoder
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+if orjson is not None:
+    def dumps(content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(content) -> bytes:
+        return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that also accepts result rows and models as they are."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,16 +1,32 @@
 # app/routes/assessment.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import Assessment, AssessmentStatus, User, ScreeningAnswer, QuestionThread, ThreadComment  # Import your SQLModel models
-from app.deps import get_current_user, get_session
+from app.deps import get_current_user, get_session, get_stream_user
+from app.events import latest_id as latest_event_id, publish, stream as event_stream
+from app.responses import FastJSONResponse, dumps
+from app import catalog, config, gating, purge, summary, versions
+from app.routes.threads import thread_rows_query, comment_rows_query
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
 
 
 router = APIRouter(prefix="/assessments", tags=["Assessments"])
 
 
+async def _get_live_assessment(session: AsyncSession, id: int) -> Assessment:
+    """Fetch an assessment, treating soft-deleted ones as missing."""
+    assessment = await session.get(Assessment, id)
+    if not assessment or assessment.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return assessment
+
+
 # 1. Create Assessment
 class CreateAssessmentRequest(BaseModel):
     title: str
@@ -19,10 +35,10 @@ class CreateAssessmentRequest(BaseModel):
     existing_assessment_id: Optional[int] = None  # If using existing assessment
 
 @router.post("/", response_model=Assessment, status_code=status.HTTP_201_CREATED)
-def create_assessment(
+async def create_assessment(
     req: CreateAssessmentRequest, 
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     # Create assessment with owner_user_id from current user
     assessment = Assessment(
@@ -33,163 +49,396 @@ def create_assessment(
         status=AssessmentStatus.screening
     )
     session.add(assessment)
-    session.commit()
-    session.refresh(assessment)
+    await summary.record_created(session, assessment)
+    await versions.bump(session, versions.ASSESSMENTS)
+    await session.commit()
+    await session.refresh(assessment)
     return assessment
 
 # 2. List Assessments with user details
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
+LIST_CHUNK_ROWS = 200  # rows encoded per streamed chunk
+
+def assessment_rows_query():
+    """Assessments with owner and approver emails resolved in the same query."""
+    owner = aliased(User)
+    approver = aliased(User)
+    return (
+        select(
+            *Assessment.__table__.columns,
+            func.coalesce(owner.email, "Unknown").label("owner_name"),
+            approver.email.label("approver_name"),
+        )
+        .outerjoin(owner, owner.id == Assessment.owner_user_id)
+        .outerjoin(approver, approver.id == Assessment.approver_user_id)
+    )
+
+def _stream_json_array(rows):
+    """Encode result rows as a JSON array, a chunk at a time."""
+    yield b"["
+    for start in range(0, len(rows), LIST_CHUNK_ROWS):
+        encoded = dumps(rows[start:start + LIST_CHUNK_ROWS])[1:-1]  # chunk array without its brackets
+        yield encoded if start == 0 else b"," + encoded
+    yield b"]"
+
 @router.get("/")
-def list_assessments(
+async def list_assessments(
+    request: Request,
+    status: Optional[AssessmentStatus] = None,
+    approver_user_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    # Get assessments with user details
-    if current_user.role == "approver":
-        assessments = session.exec(select(Assessment)).all()
-    else:
-        assessments = session.exec(select(Assessment).where(Assessment.owner_user_id == current_user.id)).all()
-    
-    # Enrich with user details
-    result = []
-    for assessment in assessments:
-        owner = session.get(User, assessment.owner_user_id)
-        approver = session.get(User, assessment.approver_user_id) if assessment.approver_user_id else None
-        result.append({
-            **assessment.dict(),
-            "owner_name": owner.email if owner else "Unknown",
-            "approver_name": approver.email if approver else None
-        })
-    return result
+    """List assessments in id order, one page at a time.
+    Pass the X-Next-After-Id response header back as `after_id` to fetch the next page."""
+    visibility = "all" if current_user.role == "approver" else f"owner:{current_user.id}"
+    # USERS: rows carry the owner and approver emails
+    etag = await versions.etag(session, [versions.ASSESSMENTS, versions.USERS], f"{visibility}|{request.url.query}")
+    if cached := versions.not_modified(request, etag):
+        return cached
+
+    query = assessment_rows_query().where(Assessment.deleted_at.is_(None))
+    # Approvers see every assessment, owners only their own
+    if current_user.role != "approver":
+        query = query.where(Assessment.owner_user_id == current_user.id)
+    if status is not None:
+        query = query.where(Assessment.status == status)
+    if approver_user_id is not None:
+        query = query.where(Assessment.approver_user_id == approver_user_id)
+    if created_after is not None:
+        query = query.where(Assessment.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(Assessment.created_at < created_before)
+    if after_id is not None:
+        query = query.where(Assessment.id > after_id)
+    rows = (await session.exec(query.order_by(Assessment.id).limit(limit))).all()
+
+    headers = versions.cache_headers(etag)
+    if len(rows) == limit:
+        headers["X-Next-After-Id"] = str(rows[-1].id)
+    return StreamingResponse(_stream_json_array(rows), media_type="application/json", headers=headers)
+
+# Dashboard counts (declared before /{id} so "summary" is not taken for an id)
+@router.get("/summary")
+async def get_summary(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Assessment counts per status, per owner and per approver.
+    Owners only see the counts of their own assessments."""
+    owner_user_id = None if current_user.role == "approver" else current_user.id
+    return await summary.read(session, owner_user_id)
 
 # 3. Get Assessment by ID
 @router.get("/{id}", response_model=Assessment)
-def get_assessment(id: int, session: Session = Depends(get_session)):
-    assessment = session.get(Assessment, id)
-    if not assessment:
-        raise HTTPException(status_code=404, detail="Assessment not found")
+async def get_assessment(
+    id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session)
+):
+    etag = await versions.etag(session, [versions.assessment(id)])
+    if cached := versions.not_modified(request, etag):
+        return cached
+    assessment = await _get_live_assessment(session, id)
+    response.headers.update(versions.cache_headers(etag))
     return assessment
 
 # 4. Submit PIA Screening Answers
 class ScreeningAnswerRequest(BaseModel):
-    question: str
+    question: Optional[str] = None  # question text; clients may send question_id instead
+    question_id: Optional[int] = None
+    catalog_version: Optional[int] = None  # defaults to the current catalog
     answer: bool
     notes: str = ""
 
+    @model_validator(mode="after")
+    def _question_given(self):
+        if self.question is None and self.question_id is None:
+            raise ValueError("question or question_id is required")
+        return self
+
 class ScreeningResponse(BaseModel):
     answers: List[ScreeningAnswerRequest]
 
+def _resolve_answers(items) -> list:
+    """(question_id, catalog_version, question_text, item) per answer, as stored: catalog questions
+    by id, anything else by text. An id missing from the catalog is a 400."""
+    questions = catalog.current()
+    try:
+        return [(*questions.resolve(item.question, item.question_id, item.catalog_version), item) for item in items]
+    except catalog.UnknownQuestion as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+def screening_answer_json(answer) -> dict:
+    """An answer row as the API returns it, with the question's wording resolved from the catalog."""
+    return {
+        "question": answer.question_text or catalog.current().text(answer.question_id, answer.catalog_version),
+        "question_id": answer.question_id,
+        "catalog_version": answer.catalog_version,
+        "answer": answer.answer,
+        "notes": answer.notes,
+    }
+
+async def _apply_answer_changes(session: AsyncSession, assessment_id: int, resolved, delete_missing: bool) -> dict:
+    """Bring stored answers in line with `resolved` (see _resolve_answers) using set-based statements.
+
+    Unchanged answers are not written. Rows for questions missing from `resolved`
+    are deleted only when `delete_missing` is set. Does not commit."""
+    stored = (await session.exec(
+        select(
+            ScreeningAnswer.id, ScreeningAnswer.question_id, ScreeningAnswer.catalog_version,
+            ScreeningAnswer.question_text, ScreeningAnswer.answer, ScreeningAnswer.notes,
+        )
+        .where(ScreeningAnswer.assessment_id == assessment_id)
+        .order_by(ScreeningAnswer.id)
+    )).all()
+    # Keyed by question id, or text outside the catalog; last answer wins for repeated questions
+    incoming = {question_id or text: (question_id, version, text, item) for question_id, version, text, item in resolved}
+
+    now = datetime.utcnow()
+    seen = set()
+    updates, delete_ids = [], []
+    for row in stored:
+        key = row.question_id or row.question_text
+        question_id, version, text, item = incoming.get(key, (None, None, None, None))
+        if key in seen or (item is None and delete_missing):
+            delete_ids.append(row.id)  # duplicate row or question no longer answered
+        elif item is not None and (item.answer != row.answer or item.notes != row.notes or version != row.catalog_version):
+            updates.append({
+                "id": row.id, "answer": item.answer, "notes": item.notes, "catalog_version": version, "updated_at": now,
+            })
+        seen.add(key)
+    inserts = [
+        {"assessment_id": assessment_id, "question_id": question_id, "catalog_version": version,
+         "question_text": text, "answer": item.answer, "notes": item.notes, "created_at": now}
+        for key, (question_id, version, text, item) in incoming.items() if key not in seen
+    ]
+
+    if delete_ids:
+        await session.execute(delete(ScreeningAnswer).where(ScreeningAnswer.id.in_(delete_ids)))
+    if updates:
+        await session.execute(update(ScreeningAnswer), updates)  # bulk UPDATE by primary key
+    if inserts:
+        await session.execute(insert(ScreeningAnswer), inserts)  # executemany INSERT
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(delete_ids)}
+
+async def _apply_gate(session: AsyncSession, assessment: Assessment, answers, answers_changed: bool):
+    """Screening gate (app/gate_rules.json) over (question id, wording, answer) triples:
+    set the new status, keep the summary counts and versions in step. Returns the
+    previous status. Does not commit."""
+    previous_status = assessment.status
+    assessment.status = gating.current().evaluate(answers)
+    await summary.record_status_change(session, assessment, previous_status)
+    keys = [versions.screening(assessment.id)] if answers_changed else []
+    if assessment.status != previous_status:
+        keys += [versions.ASSESSMENTS, versions.assessment(assessment.id)]
+    await versions.bump(session, *keys)
+    return previous_status
+
 @router.post("/{id}/screening", status_code=status.HTTP_200_OK)
-def submit_screening(
+async def submit_screening(
     id: int,
     body: ScreeningResponse,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Accepts a list of answers (yes/no) for PIA screening. If any 'Yes', proceed assessment to 'in_dpia'.
     Stores answers in the database for later access by both System Owners (to view/edit) and Approvers (to review).
     """
-    assessment = session.get(Assessment, id)
-    if not assessment:
-        raise HTTPException(status_code=404, detail="Assessment not found")
+    assessment = await _get_live_assessment(session, id)
     
     # Only system owners can submit screening
     if current_user.role != "owner" or assessment.owner_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Only the assessment owner can submit screening")
     
-    # Delete existing answers for this assessment (to allow resubmission)
-    existing_answers = session.exec(select(ScreeningAnswer).where(ScreeningAnswer.assessment_id == id)).all()
-    for answer in existing_answers:
-        session.delete(answer)
-    
-    # Store new answers
-    for item in body.answers:
-        answer = ScreeningAnswer(
-            assessment_id=id,
-            question_text=item.question,
-            answer=item.answer,
-            notes=item.notes,
-            created_at=datetime.utcnow()
-        )
-        session.add(answer)
-    
-    # Simple screening gate logic: 
-    # - If first question (PI collection) is answered "No", auto-complete (no PI data = no assessment needed)
-    # - If any answer is True (yes), start DPIA
-    # - Otherwise, await approval
-    first_question_text = "Does the system collect any Personal information from individuals?"
-    first_answer = next((item for item in body.answers if item.question == first_question_text), None)
+    # Resubmission only writes what changed since the stored answers
+    resolved = _resolve_answers(body.answers)
+    changes = await _apply_answer_changes(session, id, resolved, delete_missing=True)
     
-    if first_answer and not first_answer.answer:
-        # First question answered "No" - no PI data, auto-complete
-        assessment.status = AssessmentStatus.completed
-    elif any(item.answer for item in body.answers):
-        assessment.status = AssessmentStatus.in_dpia
-    else:
-        assessment.status = AssessmentStatus.awaiting_approval
-    
-    session.commit()
-    return {"message": "Screening submitted successfully", "next_status": assessment.status}
+    # Screening gate: by default "No" to collecting PI auto-completes,
+    # any "Yes" starts the DPIA, otherwise the assessment awaits approval
+    questions = catalog.current()
+    previous_status = await _apply_gate(session, assessment, (
+        (question_id, text or questions.text(question_id, version), item.answer)
+        for question_id, version, text, item in resolved
+    ), any(changes.values()))
+    if assessment.status != previous_status:
+        await publish(session, id, "status_changed", {"assessment_id": id, "status": assessment.status})
+    await session.commit()
+    return {"message": "Screening submitted successfully", "next_status": assessment.status, "changes": changes}
+
+# Save a single answer without resubmitting the whole screening
+@router.patch("/{id}/screening", status_code=status.HTTP_200_OK)
+async def patch_screening_answer(
+    id: int,
+    item: ScreeningAnswerRequest,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Insert or update the answer to one question. Once the screening has been
+    submitted, the stored answers are re-gated as a submission would be."""
+    assessment = await _get_live_assessment(session, id)
+    if current_user.role != "owner" or assessment.owner_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the assessment owner can edit screening answers")
+
+    changes = await _apply_answer_changes(session, id, _resolve_answers([item]), delete_missing=False)
+    previous_status = assessment.status
+    if any(changes.values()):
+        if assessment.status == AssessmentStatus.screening:
+            # Not submitted yet: the answers are a draft and the gate has not run
+            await versions.bump(session, versions.screening(id))
+        else:
+            stored = (await session.exec(
+                select(ScreeningAnswer.question_id, ScreeningAnswer.catalog_version,
+                       ScreeningAnswer.question_text, ScreeningAnswer.answer)
+                .where(ScreeningAnswer.assessment_id == id)
+            )).all()
+            questions = catalog.current()
+            await _apply_gate(session, assessment, (
+                (a.question_id, a.question_text or questions.text(a.question_id, a.catalog_version), a.answer)
+                for a in stored
+            ), True)
+    if assessment.status != previous_status:
+        await publish(session, id, "status_changed", {"assessment_id": id, "status": assessment.status})
+    await session.commit()
+    return {"message": "Answer saved", "next_status": assessment.status, "changes": changes}
 
 # Get screening answers for an assessment
 @router.get("/{id}/screening")
-def get_screening_answers(
+async def get_screening_answers(
     id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Get stored screening answers for an assessment.
     System owners can view their own answers, and approvers can view answers for any assessment."""
-    assessment = session.get(Assessment, id)
-    if not assessment:
-        raise HTTPException(status_code=404, detail="Assessment not found")
+    assessment = await _get_live_assessment(session, id)
     
     # Only system owners can view their own answers, or approvers can view any
     if current_user.role == "owner" and assessment.owner_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only view your own assessment answers")
+
+    etag = await versions.etag(session, [versions.screening(id)])
+    if cached := versions.not_modified(request, etag):
+        return cached
+    response.headers.update(versions.cache_headers(etag))
     
-    answers = session.exec(select(ScreeningAnswer).where(ScreeningAnswer.assessment_id == id)).all()
+    answers = (await session.exec(select(ScreeningAnswer).where(ScreeningAnswer.assessment_id == id))).all()
     # Return empty list if no answers exist (not an error)
     if not answers:
         return []
-    return [{"question": a.question_text, "answer": a.answer, "notes": a.notes} for a in answers]
+    return [screening_answer_json(a) for a in answers]
+
+# Everything the screening page needs, in one response
+@router.get("/{id}/workspace")
+async def get_workspace(
+    id: int,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Assessment, screening answers, threads and their comments for one assessment.
+    Uses four queries regardless of how many threads or comments exist."""
+    assessment = (await session.exec(
+        assessment_rows_query().where(Assessment.id == id, Assessment.deleted_at.is_(None))
+    )).first()
+    if not assessment:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
+    # Same visibility rule as the screening answers endpoint
+    if current_user.role == "owner" and assessment.owner_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You can only view your own assessment")
+
+    answers = (await session.exec(select(ScreeningAnswer).where(ScreeningAnswer.assessment_id == id))).all()
+    threads = (await session.exec(thread_rows_query().where(QuestionThread.assessment_id == id))).all()
+    thread_ids = select(QuestionThread.id).where(QuestionThread.assessment_id == id)
+    comment_rows = (await session.exec(comment_rows_query().where(ThreadComment.thread_id.in_(thread_ids)))).all()
+
+    # Comments grouped by thread id, every thread present even without comments
+    comments = {thread.id: [] for thread in threads}
+    for row in comment_rows:
+        comments[row.thread_id].append(row)
+
+    return FastJSONResponse({
+        "assessment": assessment,
+        "screening_answers": [screening_answer_json(a) for a in answers],
+        "threads": threads,
+        "comments": comments,
+    })
+
+# Live updates for an open assessment (Server-Sent Events)
+@router.get("/{id}/events")
+async def assessment_events(
+    id: int,
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    after: Optional[int] = None,
+    current_user: User = Depends(get_stream_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Stream new comments, thread changes and status changes for one assessment.
+    Reconnecting clients resume after Last-Event-ID (or `after`) from the event log."""
+    assessment = await _get_live_assessment(session, id)
+    if current_user.role == "owner" and assessment.owner_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You can only follow your own assessment")
+    horizon = await latest_event_id(session)
+    # Give the pooled connection back before the long-lived stream starts
+    await session.close()
+
+    resume_from = last_event_id if last_event_id is not None else after
+    return StreamingResponse(
+        event_stream(request, session.bind, id, horizon if resume_from is None else resume_from, horizon),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # 5. Update assessment status (for approvers)
 class UpdateStatusRequest(BaseModel):
     status: str  # "completed" or "red_flag"
 
 @router.post("/{id}/status", status_code=status.HTTP_200_OK)
-def update_assessment_status(
+async def update_assessment_status(
     id: int,
     req: UpdateStatusRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     if current_user.role != "approver":
         raise HTTPException(status_code=403, detail="Only approvers can update assessment status")
     
-    assessment = session.get(Assessment, id)
-    if not assessment:
-        raise HTTPException(status_code=404, detail="Assessment not found")
+    assessment = await _get_live_assessment(session, id)
     
+    previous_status = assessment.status
     if req.status == "completed":
         assessment.status = AssessmentStatus.completed
     elif req.status == "red_flag":
         assessment.status = AssessmentStatus.red_flag
     else:
         raise HTTPException(status_code=400, detail="Invalid status. Use 'completed' or 'red_flag'")
+    await summary.record_status_change(session, assessment, previous_status)
+    await versions.bump(session, versions.ASSESSMENTS, versions.assessment(id))
+    if assessment.status != previous_status:
+        await publish(session, id, "status_changed", {"assessment_id": id, "status": assessment.status})
     
-    session.commit()
-    session.refresh(assessment)
+    await session.commit()
+    await session.refresh(assessment)
     return assessment
 
 # 6. Get all approvers
 @router.get("/approvers/list")
-def get_approvers(
+async def get_approvers(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    approvers = session.exec(select(User).where(User.role == "approver")).all()
+    approvers = (await session.exec(select(User).where(User.role == "approver"))).all()
     if not approvers:
         return []  # Return empty list if no approvers found
     # Return as name-email pairs for dropdown
@@ -210,36 +459,24 @@ def get_approvers(
 
 # 7. Delete Assessment
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
-def delete_assessment(
+async def delete_assessment(
     id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    assessment = session.get(Assessment, id)
-    if not assessment:
-        raise HTTPException(status_code=404, detail="Assessment not found")
+    assessment = await _get_live_assessment(session, id)
     
     # Only approvers or the owner can delete
     if current_user.role != "approver" and assessment.owner_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to delete this assessment")
     
-    # Delete all related data for this assessment:
-    # 1. Delete all thread comments (chat history) for threads related to this assessment
-    threads = session.exec(select(QuestionThread).where(QuestionThread.assessment_id == id)).all()
-    for thread in threads:
-        # Delete all comments for this thread
-        comments = session.exec(select(ThreadComment).where(ThreadComment.thread_id == thread.id)).all()
-        for comment in comments:
-            session.delete(comment)
-        # Delete the thread itself
-        session.delete(thread)
-    
-    # 2. Delete all screening answers for this assessment
-    answers = session.exec(select(ScreeningAnswer).where(ScreeningAnswer.assessment_id == id)).all()
-    for answer in answers:
-        session.delete(answer)
-    
-    # 3. Finally, delete the assessment itself
-    session.delete(assessment)
-    session.commit()
+    await summary.record_deleted(session, assessment)
+    await versions.bump_assessment_tree(session, id)
+    if config.SOFT_DELETE:
+        # Hide it now; the background purger removes it and its dependents in small batches
+        assessment.deleted_at = datetime.utcnow()
+    else:
+        await purge.delete_assessment_tree(session, id)
+    await publish(session, id, "assessment_deleted", {"assessment_id": id})
+    await session.commit()
     return {"message": "Assessment and all related data deleted successfully", "id": id}
@@ -0,0 +1,51 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.models import AssessmentStatus, User
+from app.database import async_engine
+from app.deps import get_current_user
+from app.compression import gzip_stream
+from app import config, export
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+MEDIA_TYPES = {ExportFormat.ndjson: "application/x-ndjson", ExportFormat.csv: "text/csv; charset=utf-8"}
+
+
+# Everything about the matching assessments, as one streamed file
+@router.get("/")
+async def export_assessments(
+    format: ExportFormat = ExportFormat.ndjson,
+    status: Optional[AssessmentStatus] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    """Assessments with their screening answers, threads and comments.
+    NDJSON has one assessment per line with its children nested; CSV has one row per record.
+    Same visibility as the assessment list. `gzip=true` sends a .gz file compressed on the fly."""
+    owner_user_id = None if current_user.role == "approver" else current_user.id
+    # The stream opens its own session: it outlives the request's dependencies
+    batches = export.batches(
+        async_engine, owner_user_id=owner_user_id,
+        status=status, created_after=created_after, created_before=created_before,
+    )
+    chunks = export.ndjson_chunks(batches) if format == ExportFormat.ndjson else export.csv_chunks(batches)
+    filename = f"assessments.{format.value}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        chunks = gzip_stream(chunks, config.GZIP_LEVEL)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import User
+from app.deps import get_current_user, get_session
+from app import importer
+
+router = APIRouter(prefix="/import", tags=["Import"])
+
+
+# Bulk import of legacy assessments (NDJSON request body)
+@router.post("/")
+async def import_assessments(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """One assessment per line, answers and threads nested (see app/importer.py for the format).
+    The body is read as it arrives. Good lines are imported even if others fail;
+    the response reports the failed lines with their errors."""
+    if current_user.role != "approver":
+        raise HTTPException(status_code=403, detail="Only approvers can import assessments")
+    return await importer.import_lines(session, importer.split_lines(request.stream()))
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Optional
+from app.models import User
+from app.deps import get_current_user
+from app.responses import FastJSONResponse
+from app import catalog, versions
+
+router = APIRouter(prefix="/questions", tags=["Questions"])
+
+# Published catalog versions never change, so a response for an explicit version can be kept
+PINNED_MAX_AGE = 86400
+
+
+# Screening question catalog
+@router.get("/")
+async def get_questions(
+    request: Request,
+    version: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """Questions of one catalog version (default: the current one) in display order,
+    with their ids, wording, answer type, page and options."""
+    questions = catalog.current()
+    pinned = version is not None
+    version = version or questions.version
+    if version not in questions.versions():
+        raise HTTPException(status_code=404, detail=f"Catalog version {version} not found")
+    etag = f'"questions-{version}"'
+    if cached := versions.not_modified(request, etag):
+        return cached
+    headers = versions.cache_headers(etag)
+    if pinned:
+        headers["Cache-Control"] = f"private, max-age={PINNED_MAX_AGE}, immutable"
+    return FastJSONResponse(
+        {"version": version, "current_version": questions.version, "questions": questions.questions(version)},
+        headers=headers,
+    )
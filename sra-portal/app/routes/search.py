@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import User
+from app.deps import get_current_user, get_session
+from app import search
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+# Search assessment titles, screening notes, thread questions and comments
+@router.get("/")
+async def search_assessments(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Best matches first, each with a snippet around the matched words (marked with <mark>).
+    Same visibility as the assessment list: approvers search everything, owners their own assessments."""
+    if session.bind.dialect.name not in search.DIALECTS:
+        raise HTTPException(status_code=501, detail="Search is not available on this database")
+    owner_user_id = None if current_user.role == "approver" else current_user.id
+    return await search.search(session, q, owner_user_id, limit)
@@ -1,48 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.models import QuestionThread, ThreadComment, User
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Assessment, QuestionThread, ThreadComment, User
 from app.deps import get_current_user, get_session
-from typing import List
+from app.events import publish
+from app import catalog, versions
+from app.responses import FastJSONResponse
+from typing import List, Optional
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/threads", tags=["Threads"])
 
+
+def thread_rows_query():
+    """Threads with the opener's email joined in (no per-row user lookups)."""
+    return (
+        select(*QuestionThread.__table__.columns, func.coalesce(User.email, "Unknown").label("opener_email"))
+        .outerjoin(User, User.id == QuestionThread.opened_by)
+        .order_by(QuestionThread.id)
+    )
+
+
+def comment_rows_query():
+    """Comments with the author's email joined in (no per-row user lookups)."""
+    return (
+        select(*ThreadComment.__table__.columns, func.coalesce(User.email, "Unknown").label("author_email"))
+        .outerjoin(User, User.id == ThreadComment.author_id)
+        .order_by(ThreadComment.thread_id, ThreadComment.created_at, ThreadComment.id)
+    )
+
+
 # Start a new question thread
 class ThreadCreate(BaseModel):
     assessment_id: int
     question_text: str
+    question_id: Optional[int] = None  # catalog question; otherwise taken from the start of question_text
+    catalog_version: Optional[int] = None
     opened_by: int  # Approver user id
 
 @router.post("/", response_model=QuestionThread)
-def create_thread(
+async def create_thread(
     body: ThreadCreate, 
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     if current_user.role != "approver":
         raise HTTPException(status_code=403, detail="Only approvers can create threads")
-    thread = QuestionThread(**body.dict())
+    # Soft-deleted assessments (SRA_SOFT_DELETE) count as missing
+    assessment = await session.get(Assessment, body.assessment_id)
+    if not assessment or assessment.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    questions = catalog.current()
+    if body.question_id is not None:
+        try:
+            question_id, version, _ = questions.resolve(None, body.question_id, body.catalog_version)
+        except catalog.UnknownQuestion as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    else:
+        question_id, version = questions.resolve_thread(body.question_text)
+    thread = QuestionThread(**body.dict(exclude={"question_id", "catalog_version"}),
+                            question_id=question_id, catalog_version=version)
     session.add(thread)
-    session.commit()
-    session.refresh(thread)
+    await session.flush()  # the event carries the new id
+    opener = current_user if current_user.id == thread.opened_by else await session.get(User, thread.opened_by)
+    await versions.bump(session, versions.threads(body.assessment_id))
+    await publish(session, thread.assessment_id, "thread_opened",
+                  {**thread.dict(), "opener_email": opener.email if opener else "Unknown"})
+    await session.commit()
+    await session.refresh(thread)
     return thread
 
 # List threads for an assessment (even if assessment is deleted, threads persist)
 @router.get("/")
-def list_threads(
+async def list_threads(
     assessment_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    threads = session.exec(select(QuestionThread).where(QuestionThread.assessment_id == assessment_id)).all()
-    # Enrich with opener info
-    result = []
-    for thread in threads:
-        opener = session.get(User, thread.opened_by)
-        thread_dict = thread.dict()
-        thread_dict["opener_email"] = opener.email if opener else "Unknown"
-        result.append(thread_dict)
-    return result
+    etag = await versions.etag(session, [versions.threads(assessment_id), versions.USERS])  # rows carry opener emails
+    if cached := versions.not_modified(request, etag):
+        return cached
+    rows = (await session.exec(thread_rows_query().where(QuestionThread.assessment_id == assessment_id))).all()
+    return FastJSONResponse(rows, headers=versions.cache_headers(etag))
 
 # Add a comment to a thread
 class CommentCreate(BaseModel):
@@ -51,56 +92,63 @@ class CommentCreate(BaseModel):
     body: str
 
 @router.post("/comment", response_model=ThreadComment)
-def add_comment(
+async def add_comment(
     body: CommentCreate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
+    thread = await session.get(QuestionThread, body.thread_id)
+    if not thread:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    # Threads of a soft-deleted assessment are only waiting for the purger
+    assessment = await session.get(Assessment, thread.assessment_id)
+    if not assessment or assessment.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
     comment = ThreadComment(**body.dict())
     session.add(comment)
-    session.commit()
-    session.refresh(comment)
+    await session.flush()  # the event carries the new id
+    author = current_user if current_user.id == comment.author_id else await session.get(User, comment.author_id)
+    await versions.bump(session, versions.comments(body.thread_id))
+    await publish(session, thread.assessment_id, "comment_added",
+                  {**comment.dict(), "author_email": author.email if author else "Unknown"})
+    await session.commit()
+    await session.refresh(comment)
     return comment
 
 # Get all comments for a thread with author info
 @router.get("/{thread_id}/comments")
-def get_comments(
+async def get_comments(
     thread_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    comments = session.exec(select(ThreadComment).where(ThreadComment.thread_id == thread_id)).all()
-    # Enrich with author email for display
-    result = []
-    for comment in comments:
-        author = session.get(User, comment.author_id)
-        comment_dict = comment.dict()
-        comment_dict["author_email"] = author.email if author else "Unknown"
-        result.append(comment_dict)
-    return result
+    etag = await versions.etag(session, [versions.comments(thread_id), versions.USERS])  # rows carry author emails
+    if cached := versions.not_modified(request, etag):
+        return cached
+    rows = (await session.exec(comment_rows_query().where(ThreadComment.thread_id == thread_id))).all()
+    return FastJSONResponse(rows, headers=versions.cache_headers(etag))
 
 # Update thread status (end/resolve thread)
 @router.post("/{thread_id}/end", status_code=status.HTTP_200_OK)
-def end_thread(
+async def end_thread(
     thread_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """End/close a thread - only approvers can do this"""
     if current_user.role != "approver":
         raise HTTPException(status_code=403, detail="Only approvers can end threads")
     
-    thread = session.get(QuestionThread, thread_id)
+    thread = await session.get(QuestionThread, thread_id)
     if not thread:
         raise HTTPException(status_code=404, detail="Thread not found")
     
     thread.status = "resolved"
     session.add(thread)
-    session.commit()
-    session.refresh(thread)
-    
-    # Enrich with opener info
-    opener = session.get(User, thread.opened_by)
-    thread_dict = thread.dict()
-    thread_dict["opener_email"] = opener.email if opener else "Unknown"
-    return thread_dict
+    await versions.bump(session, versions.threads(thread.assessment_id))
+    # Re-read with the opener's email joined in
+    row = (await session.exec(thread_rows_query().where(QuestionThread.id == thread_id))).one()
+    await publish(session, thread.assessment_id, "thread_resolved", row)
+    await session.commit()
+    return FastJSONResponse(row)
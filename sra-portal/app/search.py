@@ -0,0 +1,282 @@
+# app/search.py
+"""
+Full-text search over assessment titles, screening notes, thread questions
+and thread comments, backed by one SQLite FTS5 table, or on PostgreSQL by
+GIN expression indexes over the source columns themselves (see PG_INDEXES).
+
+Triggers on the four source tables keep `assessment_search` current inside
+the writing transaction. Each indexed row's rowid encodes its source
+(id * 4 + kind code), so updates and deletes touch the index by rowid instead
+of scanning it. If the index is ever out of step (restored backup, manual SQL,
+a table rebuilt without its triggers), recreate the triggers and refill it with:
+
+    python -m app.search rebuild
+
+PostgreSQL keeps its expression indexes current itself; results have the same
+shape, with ts_headline snippets and ts_rank (negated, so lower is better as
+with bm25) as the rank.
+"""
+import argparse
+import html
+import re
+import sys
+
+from sqlalchemy import text
+
+FTS_TABLE = "assessment_search"
+SNIPPET_TOKENS = 16
+SNIPPET_OPEN, SNIPPET_CLOSE = "<mark>", "</mark>"
+# The database wraps matches in these private-use characters; the snippet is
+# HTML-escaped and only then are they turned into the tags above, so titles,
+# notes and comments can never inject markup of their own
+_MATCH_OPEN, _MATCH_CLOSE = "\ue000", "\ue001"
+MIN_PREFIX_LENGTH = 3  # shorter trailing words match whole words only; also the FTS prefix index size
+# bm25 has to score every match before the best can be picked; past this many
+# matches the newest ones are returned instead, which FTS5 reads in rowid order
+RANKED_MATCH_LIMIT = 5000
+
+# kind, rowid code, source table, text column, assessment id of a row (as SQL over {row})
+SOURCES = [
+    ("assessment", 0, "assessment", "title", "{row}.id"),
+    ("screening_answer", 1, "screeninganswer", "notes", "{row}.assessment_id"),
+    ("thread", 2, "questionthread", "question_text", "{row}.assessment_id"),
+    ("comment", 3, "threadcomment", "body",
+     "(SELECT assessment_id FROM questionthread WHERE questionthread.id = {row}.thread_id)"),
+]
+KINDS = {code: kind for kind, code, *_ in SOURCES}
+DIALECTS = ("sqlite", "postgresql")
+
+PG_TEXT_SEARCH_CONFIG = "english"  # stems like FTS5's porter tokenizer
+# GIN index per source column; queries must repeat the exact indexed expression
+PG_INDEXES = {table: f"ix_{table}_{column}_fts" for _, _, table, column, _ in SOURCES}
+
+
+def _pg_document(table, column):
+    return f"to_tsvector('{PG_TEXT_SEARCH_CONFIG}', {table}.{column})"
+
+
+def _trigger_ddl(code, table, column, assessment_id):
+    rowid = f"{{row}}.id * 4 + {code}"
+    insert = (
+        f"INSERT INTO {FTS_TABLE}(rowid, body, assessment_id) "
+        f"SELECT {rowid}, {{row}}.{column}, {assessment_id} WHERE {{row}}.{column} <> '';"
+    )
+    delete = f"DELETE FROM {FTS_TABLE} WHERE rowid = {rowid};"
+    return [
+        f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN "
+        f"{insert.format(row='NEW')} END",
+        f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {column} ON {table} BEGIN "
+        f"{delete.format(row='OLD')} {insert.format(row='NEW')} END",
+        f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN "
+        f"{delete.format(row='OLD')} END",
+    ]
+
+
+def supported(conn) -> bool:
+    """Whether the FTS5 table and its triggers exist on this database (SQLite only)."""
+    return conn.dialect.name == "sqlite"
+
+
+def install_pg(conn):
+    """Create the PostgreSQL expression indexes (concurrent writes wait while they build)."""
+    for _, _, table, column, _ in SOURCES:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {PG_INDEXES[table]} ON {table} USING gin ({_pg_document(table, column)})"
+        ))
+
+
+def install(conn):
+    """Create the FTS table if needed and (re)create the triggers that feed it."""
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"body, assessment_id UNINDEXED, tokenize = 'porter unicode61', prefix = '{MIN_PREFIX_LENGTH}')"
+    ))
+    for _, code, table, column, assessment_id in SOURCES:
+        for suffix in ("ai", "au", "ad"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}"))
+        for ddl in _trigger_ddl(code, table, column, assessment_id):
+            conn.execute(text(ddl))
+
+
+def _index_rows(conn, marks=None):
+    """Index the rows of every source table, or only those with ids past `marks[table]`."""
+    for _, code, table, column, assessment_id in SOURCES:
+        since = f"AND id > {int(marks[table])}" if marks else ""
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE}(rowid, body, assessment_id) "
+            f"SELECT id * 4 + {code}, {column}, {assessment_id.format(row=table)} "
+            f"FROM {table} WHERE {column} <> '' {since}"
+        ))
+
+
+def suspend_insert_triggers(conn) -> dict:
+    """For offline bulk loads: drop the insert triggers inside the current write
+    transaction and return the max id of each source table, to be handed to
+    `index_since` before the transaction commits. Indexing the new rows with
+    one statement per table is several times faster than a trigger per row.
+    The transaction must already hold the write lock, and no server may be
+    running: the DDL changes the schema under every other connection."""
+    marks = {}
+    for _, _, table, _, _ in SOURCES:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_ai"))
+        marks[table] = conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {table}")).scalar()
+    return marks
+
+
+def index_since(conn, marks: dict):
+    """Index the rows added since `suspend_insert_triggers` and put the triggers back."""
+    _index_rows(conn, marks)
+    install(conn)
+
+
+def rebuild(conn) -> int:
+    """Refill the index from the source tables. Returns the number of indexed rows."""
+    install(conn)
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    _index_rows(conn)
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+    return conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+
+
+def match_expression(query: str) -> str:
+    """User input as an FTS5 query: every word must appear, a long enough last word as a prefix.
+    Quoting each word keeps FTS5 operators and punctuation in the input inert."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_LENGTH:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def count_statement():
+    """Number of index rows matching :match, before visibility filters."""
+    return text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+
+
+def search_statement(owner_user_id=None, ranked: bool = True):
+    """Matches on live assessments, best (or with `ranked` off, newest) first,
+    optionally limited to one owner's. Binds :match and :limit (and :owner_user_id)."""
+    owner_filter = "AND a.owner_user_id = :owner_user_id" if owner_user_id is not None else ""
+    order = "s.rank" if ranked else "s.rowid DESC"
+    return text(f"""
+        SELECT s.rowid % 4 AS kind_code, s.rowid / 4 AS source_id, s.assessment_id,
+               a.title AS assessment_title, a.status AS assessment_status,
+               snippet({FTS_TABLE}, 0, '{_MATCH_OPEN}', '{_MATCH_CLOSE}', '…', {SNIPPET_TOKENS}) AS snippet,
+               s.rank AS rank
+        FROM {FTS_TABLE} AS s
+        JOIN assessment AS a ON a.id = s.assessment_id
+        WHERE {FTS_TABLE} MATCH :match AND a.deleted_at IS NULL {owner_filter}
+        ORDER BY {order}
+        LIMIT :limit
+    """)
+
+
+def pg_query_expression(query: str) -> str:
+    """User input as a to_tsquery() query, with the same rules as match_expression."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = list(words)
+    if len(words[-1]) >= MIN_PREFIX_LENGTH:
+        terms[-1] += ":*"
+    return " & ".join(terms)
+
+
+def _pg_matches(owner_user_id=None):
+    """Matching rows of every source on live assessments, as (kind_code, source_id, assessment_id, body),
+    with the assessment's title and status and the parsed query. Binds :match (and :owner_user_id)."""
+    owner_filter = "AND a.owner_user_id = :owner_user_id" if owner_user_id is not None else ""
+    sources = " UNION ALL ".join(
+        f"SELECT {code} AS kind_code, {table}.id AS source_id, "
+        f"{assessment_id.format(row=table)} AS assessment_id, {table}.{column} AS body "
+        f"FROM {table}, q WHERE {_pg_document(table, column)} @@ q.query"
+        for _, code, table, column, assessment_id in SOURCES
+    )
+    return f"""
+        WITH q AS (SELECT to_tsquery('{PG_TEXT_SEARCH_CONFIG}', :match) AS query)
+        SELECT m.*, a.title AS assessment_title, a.status AS assessment_status, q.query
+        FROM ({sources}) AS m
+        CROSS JOIN q
+        JOIN assessment AS a ON a.id = m.assessment_id
+        WHERE a.deleted_at IS NULL {owner_filter}
+    """
+
+
+def pg_count_statement():
+    return text(f"SELECT count(*) FROM ({_pg_matches()}) AS matches")
+
+
+def pg_search_statement(owner_user_id=None, ranked: bool = True):
+    """search_statement for PostgreSQL; binds the same parameters."""
+    order = "rank" if ranked else "source_id * 4 + kind_code DESC"
+    return text(f"""
+        SELECT kind_code, source_id, assessment_id, assessment_title, assessment_status,
+               ts_headline('{PG_TEXT_SEARCH_CONFIG}', body, query,
+                           'StartSel={_MATCH_OPEN}, StopSel={_MATCH_CLOSE}, MaxWords={SNIPPET_TOKENS}, MinWords=4')
+                   AS snippet,
+               rank
+        FROM (
+            SELECT matches.*, -ts_rank(to_tsvector('{PG_TEXT_SEARCH_CONFIG}', body), query) AS rank
+            FROM ({_pg_matches(owner_user_id)}) AS matches
+            ORDER BY {order}
+            LIMIT :limit
+        ) AS best
+        ORDER BY {order}
+    """)
+
+
+def snippet_html(snippet: str) -> str:
+    """A database snippet as HTML: the text escaped, matches in SNIPPET_OPEN/SNIPPET_CLOSE."""
+    return html.escape(snippet or "").replace(_MATCH_OPEN, SNIPPET_OPEN).replace(_MATCH_CLOSE, SNIPPET_CLOSE)
+
+
+async def search(session, query: str, owner_user_id=None, limit: int = 20) -> list:
+    """Best matches first (newest first for very common terms); `owner_user_id` applies
+    the owner visibility rule."""
+    postgres = session.bind.dialect.name == "postgresql"
+    match = pg_query_expression(query) if postgres else match_expression(query)
+    if not match:
+        return []
+    count, select_ = (pg_count_statement, pg_search_statement) if postgres else (count_statement, search_statement)
+    matches = (await session.execute(count(), {"match": match})).scalar()
+    params = {"match": match, "limit": limit}
+    if owner_user_id is not None:
+        params["owner_user_id"] = owner_user_id
+    ranked = matches <= RANKED_MATCH_LIMIT
+    rows = (await session.execute(select_(owner_user_id, ranked), params)).all()
+    return [
+        {
+            "kind": KINDS[row.kind_code],
+            "id": row.source_id,
+            "assessment_id": row.assessment_id,
+            "assessment_title": row.assessment_title,
+            "assessment_status": row.assessment_status,
+            "snippet": snippet_html(row.snippet),
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Full-text search index")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    from app.database import engine
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            install_pg(conn)
+            print("PostgreSQL search indexes are in place; they are kept current by the database")
+            return 0
+        if not supported(conn):
+            print(f"Full-text search needs SQLite FTS5 or PostgreSQL, not {conn.dialect.name}")
+            return 1
+        indexed = rebuild(conn)
+    print(f"Search index rebuilt: {indexed} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# app/summary.py
+"""
+Dashboard counts of assessments per status, overall, per owner and per approver.
+
+The counts live in `assessmentstatuscount` and are adjusted in the same
+transaction as every write that creates, deletes or changes the status of an
+assessment, so reading them costs a few primary-key rows regardless of how
+many assessments exist. If they ever drift (manual SQL, a bug), reconcile with:
+
+    python -m app.summary rebuild
+"""
+import argparse
+import sys
+
+from sqlalchemy import delete, func, select
+
+from app.database import upsert_insert
+from app.models import Assessment, AssessmentStatusCount
+
+UNASSIGNED = 0  # subject_id used for assessments without an approver
+
+
+def _keys(owner_user_id, approver_user_id, status):
+    return [
+        ("all", 0, status),
+        ("owner", owner_user_id, status),
+        ("approver", approver_user_id or UNASSIGNED, status),
+    ]
+
+
+def _upsert_statement(dialect_name, deltas: dict):
+    # Rows in key order, so concurrent transactions lock them in the same order (PostgreSQL)
+    stmt = upsert_insert(dialect_name)(AssessmentStatusCount).values([
+        {"scope": scope, "subject_id": subject_id, "status": status, "count": delta}
+        for (scope, subject_id, status), delta in sorted(deltas.items())
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=["scope", "subject_id", "status"],
+        set_={"count": AssessmentStatusCount.count + stmt.excluded.count},
+    )
+
+
+async def adjust(session, owner_user_id, approver_user_id, status, delta: int):
+    """Add `delta` to the counts of one assessment's status. Does not commit."""
+    deltas = {key: delta for key in _keys(owner_user_id, approver_user_id, status)}
+    await session.execute(_upsert_statement(session.bind.dialect.name, deltas))
+
+
+async def adjust_many(session, counts):
+    """`adjust` for many assessments at once, in one statement. `counts` maps
+    (owner_user_id, approver_user_id, status) to a delta. Does not commit."""
+    deltas = {}
+    for (owner_user_id, approver_user_id, status), delta in counts.items():
+        for key in _keys(owner_user_id, approver_user_id, status):
+            deltas[key] = deltas.get(key, 0) + delta
+    if deltas:
+        await session.execute(_upsert_statement(session.bind.dialect.name, deltas))
+
+
+async def record_created(session, assessment):
+    await adjust(session, assessment.owner_user_id, assessment.approver_user_id, assessment.status, 1)
+
+
+async def record_deleted(session, assessment):
+    await adjust(session, assessment.owner_user_id, assessment.approver_user_id, assessment.status, -1)
+
+
+async def record_status_change(session, assessment, old_status):
+    if old_status == assessment.status:
+        return
+    # One statement: two would lock the old and new status rows in opposite orders for opposite changes
+    await adjust_many(session, {
+        (assessment.owner_user_id, assessment.approver_user_id, old_status): -1,
+        (assessment.owner_user_id, assessment.approver_user_id, assessment.status): 1,
+    })
+
+
+def _grouped(rows):
+    result = {}
+    for row in rows:
+        if row.count:
+            result.setdefault(row.subject_id, {})[row.status.value] = row.count
+    return result
+
+
+async def read(session, owner_user_id=None) -> dict:
+    """Counts for the dashboard; limited to one owner's assessments when `owner_user_id` is given."""
+    query = select(AssessmentStatusCount)
+    if owner_user_id is not None:
+        query = query.where(AssessmentStatusCount.scope == "owner", AssessmentStatusCount.subject_id == owner_user_id)
+    rows = (await session.execute(query)).scalars().all()
+    by_scope = {"all": [], "owner": [], "approver": []}
+    for row in rows:
+        by_scope[row.scope].append(row)
+    overall = by_scope["owner"] if owner_user_id is not None else by_scope["all"]
+    by_status = {}
+    for row in overall:
+        if row.count:
+            by_status[row.status.value] = by_status.get(row.status.value, 0) + row.count
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_owner": _grouped(by_scope["owner"]),
+        "by_approver": _grouped(by_scope["approver"]),
+    }
+
+
+def rebuild(conn) -> int:
+    """Recompute every count from the assessment table. Returns how many counts were wrong."""
+    live = Assessment.deleted_at.is_(None)
+    status = Assessment.status
+    expected = {}
+    for scope, subject in (("all", None), ("owner", Assessment.owner_user_id), ("approver", Assessment.approver_user_id)):
+        columns = [status] if subject is None else [subject, status]
+        for row in conn.execute(select(*columns, func.count()).where(live).group_by(*columns)):
+            subject_id = 0 if subject is None else (row[0] or UNASSIGNED)
+            key = (scope, subject_id, row[-2])
+            expected[key] = expected.get(key, 0) + row[-1]
+
+    stored = {
+        (row.scope, row.subject_id, row.status): row.count
+        for row in conn.execute(select(AssessmentStatusCount))
+    }
+    drift = sum(1 for key in expected.keys() | stored.keys() if expected.get(key, 0) != stored.get(key, 0))
+
+    conn.execute(delete(AssessmentStatusCount))
+    if expected:
+        conn.execute(AssessmentStatusCount.__table__.insert(), [
+            {"scope": scope, "subject_id": subject_id, "status": status, "count": count}
+            for (scope, subject_id, status), count in expected.items()
+        ])
+    return drift
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dashboard summary counts")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    from app.database import engine
+    with engine.begin() as conn:
+        drift = rebuild(conn)
+    print(f"Summary rebuilt, {drift} count(s) were out of date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# app/versions.py
+"""
+Per-resource version counters behind the ETags of the read endpoints.
+
+Write paths call `bump(session, *keys)` before they commit, so a version only
+moves together with the change it stands for. A read folds the versions of the
+resources it depends on, plus whatever else shapes the response (the caller's
+visibility, the query string), into a strong ETag and answers a matching
+If-None-Match with 304 before running its real query.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+
+from app.database import upsert_insert
+from app.models import QuestionThread, ResourceVersion
+
+ASSESSMENTS = "assessments"  # any change visible in the assessment listing
+USERS = "users"  # any user update or deletion: emails shown in listings, cached principals (app/deps.py)
+
+
+def assessment(assessment_id: int) -> str:
+    return f"assessment:{assessment_id}"
+
+
+def screening(assessment_id: int) -> str:
+    return f"screening:{assessment_id}"
+
+
+def threads(assessment_id: int) -> str:
+    return f"threads:{assessment_id}"
+
+
+def comments(thread_id: int) -> str:
+    return f"comments:{thread_id}"
+
+
+async def bump(session, *keys: str):
+    """Advance the version of each key. Does not commit.
+
+    Keys are written in sorted order, so concurrent transactions lock the rows in
+    the same order (PostgreSQL). Bump all of a transaction's keys in one call, after
+    its status count changes (app/summary.py), which every write path does first."""
+    if not keys:
+        return
+    await session.execute(bump_statement(session.bind.dialect.name, keys))
+
+
+def bump_statement(dialect_name: str, keys: Iterable[str]):
+    """The upsert behind `bump`, for callers holding a plain Connection."""
+    stmt = upsert_insert(dialect_name)(ResourceVersion).values(
+        [{"key": key, "version": 1} for key in sorted(set(keys))]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"version": ResourceVersion.version + 1},
+    )
+
+
+async def assessment_tree_keys(session, assessment_id: int) -> list:
+    """Keys of everything that shows an assessment or its answers, threads and comments."""
+    thread_ids = (await session.execute(
+        select(QuestionThread.id).where(QuestionThread.assessment_id == assessment_id)
+    )).scalars().all()
+    return [
+        ASSESSMENTS, assessment(assessment_id), screening(assessment_id), threads(assessment_id),
+        *(comments(thread_id) for thread_id in thread_ids),
+    ]
+
+
+async def bump_assessment_tree(session, assessment_id: int):
+    """Bump every key of an assessment's tree, ahead of removing it. Does not commit."""
+    await bump(session, *await assessment_tree_keys(session, assessment_id))
+
+
+async def etag(session, keys: Iterable[str], variant: str = "") -> str:
+    """Strong ETag over the current versions of `keys` and the response `variant`."""
+    keys = sorted(set(keys))
+    rows = (await session.execute(
+        select(ResourceVersion.key, ResourceVersion.version).where(ResourceVersion.key.in_(keys))
+    )).all()
+    versions = dict(rows)
+    state = ";".join(f"{key}={versions.get(key, 0)}" for key in keys)
+    digest = hashlib.blake2b(f"{state}|{variant}".encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _matches(if_none_match: Optional[str], tag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == tag for candidate in candidates)
+
+
+def cache_headers(tag: str) -> dict:
+    # Clients may keep the body but must revalidate it on every use
+    return {"ETag": tag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(request: Request, tag: str) -> Optional[Response]:
+    """A 304 response when the client already holds `tag`, else None."""
+    if _matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=cache_headers(tag))
+    return None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Requests-per-second benchmark for GET /assessments against a running server.
+
+Usage:
+    python run_server.py            # in another terminal
+    python bench/bench_assessments.py --requests 2000 --concurrency 16
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_EMAIL = "bench-approver@example.com"
+BENCH_OWNER = "bench-owner@example.com"
+BENCH_PASSWORD = hashlib.sha256(b"bench-password").hexdigest()
+
+
+def _request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    res = conn.getresponse()
+    data = res.read()
+    return res.status, data
+
+
+def _register_and_login(conn, email, role):
+    _request(
+        conn, "POST", "/auth/register",
+        json.dumps({"email": email, "password": BENCH_PASSWORD, "role": role}),
+        {"Content-Type": "application/json"},
+    )
+    form = urllib.parse.urlencode({"username": email, "password": BENCH_PASSWORD})
+    status, data = _request(
+        conn, "POST", "/auth/login", form,
+        {"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    if status != 200:
+        raise SystemExit(f"Login failed for {email}: {status} {data!r}")
+    return {"Authorization": f"Bearer {json.loads(data)['access_token']}"}
+
+
+def seed(host, port, count):
+    """Make sure the benchmark owner has at least `count` assessments."""
+    conn = http.client.HTTPConnection(host, port)
+    owner = _register_and_login(conn, BENCH_OWNER, "owner")
+    approver = _register_and_login(conn, BENCH_EMAIL, "approver")
+    _, data = _request(conn, "GET", "/assessments/", headers=approver)
+    existing = len(json.loads(data))
+    headers = {**owner, "Content-Type": "application/json"}
+    for i in range(existing, count):
+        _request(conn, "POST", "/assessments/", json.dumps({"title": f"Bench assessment {i}"}), headers)
+    conn.close()
+    return approver
+
+
+def run(host, port, path, headers, total, concurrency, timeout=60):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    per_worker = total // concurrency
+
+    def worker():
+        nonlocal errors
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        local = []
+        local_errors = 0
+        for _ in range(per_worker):
+            start = time.perf_counter()
+            try:
+                status, _ = _request(conn, "GET", path, headers=headers)
+            except (OSError, http.client.HTTPException):
+                # Timed out or dropped: count it and reconnect
+                status = None
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            local.append(time.perf_counter() - start)
+            if status != 200:
+                local_errors += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "path": path,
+        "requests": n,
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(n / elapsed, 1),
+        "p50_ms": round(latencies[n // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(n * 0.95) - 1] * 1000, 2),
+        "p99_ms": round(latencies[int(n * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/assessments/")
+    parser.add_argument("--seed", type=int, default=50, help="assessments to make sure exist")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    args = parser.parse_args()
+
+    url = urllib.parse.urlparse(args.url)
+    headers = seed(url.hostname, url.port or 80, args.seed)
+    # Warm up connections and caches before measuring
+    run(url.hostname, url.port or 80, args.path, headers, args.concurrency * 2, args.concurrency, args.timeout)
+    print(json.dumps(run(url.hostname, url.port or 80, args.path, headers, args.requests, args.concurrency, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
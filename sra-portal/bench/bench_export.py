@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Peak memory and throughput of the streaming export (GET /export/).
+
+Runs in-process against a throwaway SQLite database seeded with --rows
+assessments, each with two screening answers and a thread with two
+comments, and drains the export generator the endpoint returns:
+
+    python bench/bench_export.py --rows 10000
+    python bench/bench_export.py --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _seed(engine, rows, batch=10000):
+    from sqlalchemy import insert
+    from app.models import Assessment, QuestionThread, ScreeningAnswer, ThreadComment, User
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": "bench-owner@example.com", "password_hash": "x", "role": "owner"},
+            {"email": "bench-approver@example.com", "password_hash": "x", "role": "approver"},
+        ])
+    for start in range(0, rows, batch):
+        ids = range(start + 1, min(start + batch, rows) + 1)
+        with engine.begin() as conn:
+            conn.execute(insert(Assessment), [
+                {"id": i, "title": f"Legacy PIA {i}", "owner_user_id": 1, "approver_user_id": 2,
+                 "status": "completed", "is_new": False, "created_at": now}
+                for i in ids
+            ])
+            conn.execute(insert(ScreeningAnswer), [
+                {"assessment_id": i, "question_text": f"Question {q}", "answer": bool(q), "notes": "n", "created_at": now}
+                for i in ids for q in range(2)
+            ])
+            conn.execute(insert(QuestionThread), [
+                {"id": i, "assessment_id": i, "question_text": "Question 1", "opened_by": 2, "status": "resolved",
+                 "created_at": now}
+                for i in ids
+            ])
+            conn.execute(insert(ThreadComment), [
+                {"thread_id": i, "author_id": 1 + c, "body": f"Comment {c} on {i}", "created_at": now}
+                for i in ids for c in range(2)
+            ])
+
+
+async def _drain(fmt):
+    from app import export
+    from app.database import async_engine
+
+    batches = export.batches(async_engine)
+    chunks = export.ndjson_chunks(batches) if fmt == "ndjson" else export.csv_chunks(batches)
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix="sra-bench-")
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    from app import migrations
+    from app.database import engine
+
+    migrations.upgrade()
+    _seed(engine, args.rows)
+    started = time.perf_counter()
+    size = asyncio.run(_drain(args.format))
+    elapsed = time.perf_counter() - started
+    # Second pass under tracemalloc, which slows it down too much to time
+    tracemalloc.start()
+    asyncio.run(_drain(args.format))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results = {
+        "assessments": args.rows,
+        "format": args.format,
+        "bytes": size,
+        "seconds": round(elapsed, 2),
+        "assessments_per_s": round(args.rows / elapsed),
+        "peak_traced_mb": round(peak / 1024 / 1024, 1),
+    }
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
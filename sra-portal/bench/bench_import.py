@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Throughput of the bulk import (POST /import/, python -m app.importer).
+
+Writes --rows NDJSON records, each with five screening answers and a thread
+with two comments, and imports them in-process into a throwaway SQLite
+database, so no server is needed:
+
+    python bench/bench_import.py --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OWNERS = 50
+
+
+def _write_ndjson(path, rows):
+    with open(path, "w") as f:
+        for i in range(rows):
+            owner = f"legacy-owner-{i % OWNERS}@example.com"
+            f.write(json.dumps({
+                "title": f"Legacy PIA {i}",
+                "owner_email": owner,
+                "approver_email": "legacy-approver@example.com",
+                "status": "completed",
+                "is_new": False,
+                "created_at": "2020-01-01T09:00:00",
+                "answers": [{"question": f"Question {q}", "answer": q % 2 == 0, "notes": f"note {q} for {i}"} for q in range(5)],
+                "threads": [{
+                    "question_text": "Question 1",
+                    "opened_by_email": "legacy-approver@example.com",
+                    "status": "resolved",
+                    "comments": [
+                        {"author_email": "legacy-approver@example.com", "body": f"Why is {i} exempt?"},
+                        {"author_email": owner, "body": "Data is anonymised before storage"},
+                    ],
+                }],
+            }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--offline", action="store_true", help="as python -m app.importer --offline")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="sra-bench-")
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import insert
+    from app import importer, migrations
+    from app.database import engine
+    from app.models import User
+
+    migrations.upgrade()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"legacy-owner-{i}@example.com", "password_hash": "x", "role": "owner"} for i in range(OWNERS)
+        ] + [{"email": "legacy-approver@example.com", "password_hash": "x", "role": "approver"}])
+    path = os.path.join(work_dir, "legacy.ndjson")
+    _write_ndjson(path, args.rows)
+
+    started = time.perf_counter()
+    report = asyncio.run(importer._import_file(path, args.batch_size, args.offline))
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "records": args.rows,
+        "offline": args.offline,
+        "imported": report["imported"],
+        "failed": report["failed"],
+        "seconds": round(elapsed, 1),
+        "records_per_s": round(args.rows / elapsed),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Cost of metrics collection (SRA_METRICS) and of SQL profiling (app/profiler.py)
+per request and per query, and of rendering GET /metrics.
+
+End-to-end timings of real routes vary by more than the metrics cost from run
+to run, so the pieces are timed in isolation, in-process:
+
+    middleware   MetricsMiddleware around a bare ASGI app that sends a
+                 200, against the bare app alone
+    per query    the before_cursor_execute listener that counts statements
+    render       GET /metrics with every route of the app registered and
+                 observed
+    profiler     SQLProfilerMiddleware switched off and on, and its two
+                 cursor listeners per query while on
+
+    python bench/bench_metrics.py --requests 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _noop_send(message):
+    pass
+
+
+async def _time_requests(app, requests):
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), None, _noop_send)
+    return (time.perf_counter() - started) / requests
+
+
+async def _time_render(metrics, async_engine, repeat=100):
+    # inside a loop, as in the handler: the threadpool gauges read anyio's limiter
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = metrics.render(async_engine)
+    return (time.perf_counter() - started) / repeat, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5, help="best of")
+    args = parser.parse_args()
+
+    # Nothing is queried; the engine only has to be constructible
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    from app import metrics, profiler
+    from app.database import async_engine
+    from app.main import app
+
+    wrapped = metrics.MetricsMiddleware(_bare_app)
+    bare = min(asyncio.run(_time_requests(_bare_app, args.requests)) for _ in range(args.repeat))
+    measured = min(asyncio.run(_time_requests(wrapped, args.requests)) for _ in range(args.repeat))
+
+    token = metrics._queries.set([0])
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        metrics._count_query(None, None, "SELECT 1", (), None, False)
+    per_query = (time.perf_counter() - started) / args.requests
+    metrics._queries.reset(token)
+
+    metrics.registry.register_routes(app.routes)
+    for route in metrics.registry.routes.values():
+        route.latency.observe(0.01)
+        route.queries.observe(3)
+        route.responses[200] = 1
+    render, body = asyncio.run(_time_render(metrics, async_engine))
+
+    profiled = profiler.SQLProfilerMiddleware(_bare_app)
+    profiler.profiler.slow_ms = 3600000
+    profiler_off = min(asyncio.run(_time_requests(profiled, args.requests)) for _ in range(args.repeat))
+    profiler.profiler.set_enabled(True)
+    profiler_on = min(asyncio.run(_time_requests(profiled, args.requests)) for _ in range(args.repeat))
+    profiler.profiler.set_enabled(False)
+    context = type("Context", (), {})()
+    token = profiler._trace.set(profiler.Trace())
+    started = time.perf_counter()
+    for i in range(args.requests):
+        profiler._before_cursor_execute(None, None, "SELECT 1", (i,), context, False)
+        profiler._after_cursor_execute(None, None, "SELECT 1", (i,), context, False)
+    profiled_query = (time.perf_counter() - started) / args.requests
+    profiler._trace.reset(token)
+
+    print(json.dumps({
+        "requests": args.requests,
+        "bare_app_us": round(bare * 1e6, 2),
+        "with_middleware_us": round(measured * 1e6, 2),
+        "middleware_overhead_us": round((measured - bare) * 1e6, 2),
+        "per_query_us": round(per_query * 1e6, 3),
+        "routes": len(metrics.registry.routes),
+        "render_ms": round(render * 1e3, 2),
+        "render_bytes": len(body),
+        "profiler_off_overhead_us": round((profiler_off - bare) * 1e6, 2),
+        "profiler_on_overhead_us": round((profiler_on - bare) * 1e6, 2),
+        "profiler_per_query_us": round(profiled_query * 1e6, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
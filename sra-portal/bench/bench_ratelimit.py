@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cost and footprint of the sign-in rate limiter (app/ratelimit.py).
+
+    check       time of one AuthLimiter.check for a fresh and for a known key
+    keys        --keys distinct client IPs through one limiter: buckets kept
+                and Python memory they hold (tracemalloc)
+    flood       --attempts wrong-password POST /auth/login calls for one
+                account from one client, in-process, with the limiter on and
+                off: responses by status, time per 401 (a bcrypt verify) and
+                per 429, and the flood's wall time
+
+    python bench/bench_ratelimit.py --keys 1000000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+
+from check_query_plans import call
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = hashlib.sha256(b"bench-password").hexdigest()
+
+
+def _time_checks(ratelimit, n):
+    limiter = ratelimit.AuthLimiter()
+    limiter.by_ip.burst = limiter.by_account.burst = n + 1  # nothing is rejected while timing
+    started = time.perf_counter()
+    for i in range(n):
+        limiter.check(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", f"user{i}@example.com")
+    fresh = (time.perf_counter() - started) / n
+    started = time.perf_counter()
+    for _ in range(n):
+        limiter.check("10.0.0.1", "user1@example.com")
+    known = (time.perf_counter() - started) / n
+    return fresh, known
+
+
+def _fill(ratelimit, keys):
+    tracemalloc.start()
+    buckets = ratelimit.TokenBuckets(1.0, 10, ratelimit.config.RATE_LIMIT_MAX_KEYS)
+    for i in range(keys):
+        buckets.take(f"{i >> 24 & 255}.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(buckets), current, peak
+
+
+async def _flood(app, attempts):
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    await call(app, "POST", "/auth/register", {"Content-Type": "application/json"},
+               json.dumps({"email": "target@example.com", "password": PASSWORD, "role": "owner"}).encode())
+    form = urllib.parse.urlencode({"username": "target@example.com", "password": "0" * 64}).encode()
+    timings = {}
+    started = time.perf_counter()
+    for _ in range(attempts):
+        began = time.perf_counter()
+        status, _, _ = await call(app, "POST", "/auth/login", headers, form)
+        timings.setdefault(status, []).append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": round(elapsed, 2),
+        "responses": {str(status): len(values) for status, values in sorted(timings.items())},
+        "ms_per_response": {str(status): round(sum(values) / len(values) * 1000, 3)
+                            for status, values in sorted(timings.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=1000000, help="distinct client IPs")
+    parser.add_argument("--attempts", type=int, default=200, help="sign-in attempts in the flood")
+    args = parser.parse_args()
+
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("SRA_METRICS", "0")
+    sys.path.insert(0, ROOT)
+    from app import config, migrations, ratelimit
+    from app.main import app
+
+    fresh, known = _time_checks(ratelimit, args.checks)
+    kept, current, peak = _fill(ratelimit, args.keys)
+
+    migrations.upgrade()
+    config.AUTH_RATE_LIMIT = True
+    limited = asyncio.run(_flood(app, args.attempts))
+    config.AUTH_RATE_LIMIT = False
+    unlimited = asyncio.run(_flood(app, args.attempts))
+
+    print(json.dumps({
+        "check_new_key_us": round(fresh * 1e6, 2),
+        "check_known_key_us": round(known * 1e6, 2),
+        "distinct_keys": args.keys,
+        "buckets_kept": kept,
+        "bucket_memory_mb": round(current / 2 ** 20, 1),
+        "peak_memory_mb": round(peak / 2 ** 20, 1),
+        "flood_limited": limited,
+        "flood_unlimited": unlimited,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Latency of full-text search (GET /search/) over a large comment corpus.
+
+Runs in-process against a throwaway SQLite database seeded with --comments
+thread comments (through the same triggers the app uses), so no server is
+needed:
+
+    python bench/bench_search.py --comments 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VOCABULARY_SIZE = 5000
+RARE_TERM = "biometric"  # in about 1 comment in 1000
+COMMON_TERM = "data"  # in about 1 comment in 20
+
+
+def _seed(engine, comments, assessments, batch=20000):
+    from sqlalchemy import insert
+    from app.models import Assessment, QuestionThread, ThreadComment, User
+
+    rng = random.Random(42)
+    words = [f"w{i}" for i in range(VOCABULARY_SIZE)]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": "bench-owner@example.com", "password_hash": "x", "role": "owner"},
+            {"email": "bench-other@example.com", "password_hash": "x", "role": "owner"},
+            {"email": "bench-approver@example.com", "password_hash": "x", "role": "approver"},
+        ])
+        conn.execute(insert(Assessment), [
+            {"title": f"Assessment {i}", "owner_user_id": 1 + i % 2, "status": "screening", "is_new": True, "created_at": now}
+            for i in range(assessments)
+        ])
+        conn.execute(insert(QuestionThread), [
+            {"assessment_id": 1 + i, "question_text": f"Question about {rng.choice(words)}", "opened_by": 3,
+             "status": "open", "created_at": now}
+            for i in range(assessments)
+        ])
+    for start in range(0, comments, batch):
+        rows = []
+        for _ in range(min(batch, comments - start)):
+            body = rng.choices(words, k=12)
+            if rng.random() < 0.001:
+                body[rng.randrange(12)] = RARE_TERM
+            if rng.random() < 0.05:
+                body[rng.randrange(12)] = COMMON_TERM
+            rows.append({"thread_id": rng.randrange(1, assessments + 1), "author_id": 3,
+                         "body": " ".join(body), "created_at": now})
+        with engine.begin() as conn:
+            conn.execute(insert(ThreadComment), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=1000000)
+    parser.add_argument("--assessments", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix="sra-bench-")
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    from app import migrations, search
+    from app.database import engine
+
+    migrations.upgrade()
+    started = time.perf_counter()
+    _seed(engine, args.comments, args.assessments)
+    seed_seconds = time.perf_counter() - started
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) VALUES ('optimize')")
+
+    cases = [
+        ("rare word", RARE_TERM, None),
+        ("rare word, owner", RARE_TERM, 1),
+        ("two words", "w17 w4242", None),
+        ("prefix", "w123", None),
+        ("short word, no prefix", "w7", None),
+        ("common word", COMMON_TERM, None),
+    ]
+    results = {"comments": args.comments, "seed_seconds": round(seed_seconds, 1), "queries": []}
+    with engine.connect() as conn:
+        for name, query, owner_user_id in cases:
+            match = search.match_expression(query)
+            params = {"match": match, "limit": args.limit}
+            if owner_user_id is not None:
+                params["owner_user_id"] = owner_user_id
+            latencies = []
+            for _ in range(args.repeat):
+                # Same two statements as search.search()
+                t0 = time.perf_counter()
+                matches = conn.execute(search.count_statement(), {"match": match}).scalar()
+                ranked = matches <= search.RANKED_MATCH_LIMIT
+                hits = conn.execute(search.search_statement(owner_user_id, ranked), params).all()
+                latencies.append(time.perf_counter() - t0)
+            latencies.sort()
+            results["queries"].append({
+                "case": name,
+                "query": query,
+                "matches": matches,
+                "ranked": ranked,
+                "hits": len(hits),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+            })
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
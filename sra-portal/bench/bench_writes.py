@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency of the write-heavy endpoints, on SQLite or PostgreSQL.
+
+Concurrent owners call POST /assessments/{id}/screening (a full ten-answer
+submission) and POST /threads/comment on their own assessments, in-process
+through the ASGI app, for --duration seconds. Run it once per backend with the
+same arguments to compare them:
+
+    python bench/bench_writes.py                                   # throwaway SQLite file
+    createdb sra_bench
+    python bench/bench_writes.py --database-url postgresql://localhost/sra_bench
+
+The database is migrated and, when empty, seeded with synthetic.py. PostgreSQL
+needs the psycopg2 (migrations, seeding) and asyncpg (requests) drivers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from check_query_plans import _bearer, call
+from synthetic import generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("POST /assessments/{id}/screening", "POST /threads/comment")
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else None
+
+
+def _targets(engine, per_owner):
+    """(owner email, [(assessment id, thread id)]) of the owners with the most assessments."""
+    from sqlalchemy import func, select
+    from app.models import Assessment, QuestionThread, User
+
+    with engine.connect() as conn:
+        owners = conn.execute(
+            select(User.id, User.email).join(Assessment, Assessment.owner_user_id == User.id)
+            .group_by(User.id, User.email).order_by(func.count().desc()).limit(64)
+        ).all()
+        targets = []
+        for owner_id, email in owners:
+            rows = conn.execute(
+                select(Assessment.id, func.min(QuestionThread.id))
+                .join(QuestionThread, QuestionThread.assessment_id == Assessment.id)
+                .where(Assessment.owner_user_id == owner_id, Assessment.deleted_at.is_(None))
+                .group_by(Assessment.id).limit(per_owner)
+            ).all()
+            if rows:
+                targets.append((owner_id, email, [tuple(row) for row in rows]))
+    return targets
+
+
+async def _client(app, owner, questions, deadline, rng, results):
+    owner_id, email, assessments = owner
+    headers = {**_bearer(email, "owner"), "Content-Type": "application/json"}
+    while time.perf_counter() < deadline:
+        assessment_id, thread_id = rng.choice(assessments)
+        if rng.random() < 0.5:
+            endpoint = ENDPOINTS[0]
+            path, payload = f"/assessments/{assessment_id}/screening", {"answers": [
+                {"question_id": q, "answer": rng.random() < 0.3, "notes": ""} for q in questions
+            ]}
+        else:
+            endpoint = ENDPOINTS[1]
+            path, payload = "/threads/comment", {
+                "thread_id": thread_id, "author_id": owner_id, "body": f"Benchmark comment {rng.random():.6f}",
+            }
+        started = time.perf_counter()
+        status, _, _ = await call(app, "POST", path, headers, json.dumps(payload).encode())
+        elapsed = time.perf_counter() - started
+        entry = results[endpoint]
+        if status in (200, 201):
+            entry["latencies"].append(elapsed)
+        else:
+            entry["errors"][status] = entry["errors"].get(status, 0) + 1
+
+
+async def _run(app, targets, questions, concurrency, duration, seed):
+    await app.router.startup()
+    results = {endpoint: {"latencies": [], "errors": {}} for endpoint in ENDPOINTS}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _client(app, targets[i % len(targets)], questions, deadline, random.Random(seed + i), results)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    await app.router.shutdown()
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="empty or previously seeded database (default: a new SQLite file)")
+    parser.add_argument("--assessments", type=int, default=5000, help="seeded when the database is empty")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent owners")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--random-seed", type=int, default=1)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sra-writes-'), 'writes.db')}"
+    os.environ["SRA_DATABASE_URL"] = url
+    os.environ.setdefault("SRA_METRICS", "0")
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import func, select
+    from app import catalog, migrations
+    from app.database import engine
+    from app.main import app
+    from app.models import Assessment
+
+    migrations.upgrade()
+    with engine.connect() as conn:
+        empty = not conn.execute(select(func.count()).select_from(Assessment)).scalar()
+    if empty:
+        print(f"Seeding {args.assessments} assessments", file=sys.stderr)
+        generate(engine, users=100, assessments=args.assessments, rng=random.Random(args.random_seed))
+    targets = _targets(engine, per_owner=50)
+    questions = [q["id"] for q in catalog.current().questions()[:10]]
+
+    results, elapsed = asyncio.run(_run(app, targets, questions, args.concurrency, args.duration, args.random_seed))
+    report = {"backend": engine.dialect.name, "concurrency": args.concurrency, "seconds": round(elapsed, 1)}
+    total = 0
+    for endpoint, entry in results.items():
+        latencies = entry["latencies"]
+        total += len(latencies)
+        report[endpoint] = {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+            "errors": entry["errors"],
+        }
+    report["total_rps"] = round(total / elapsed, 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
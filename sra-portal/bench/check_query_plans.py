@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for every route.
+
+Calls each API route in-process (straight through the ASGI app, no server)
+against a synthetic database (see synthetic.py), records every SQL statement
+the request runs, and asks SQLite for its EXPLAIN QUERY PLAN. The same check
+runs as part of the test suite (tests/test_query_plans.py, a test per
+statement); this script runs it against larger databases. A statement
+fails the check when its plan
+
+    SCANs a table    reads every row (or every index entry) instead of
+                     SEARCHing an index, or SEARCHes only an index in
+                     UNSELECTIVE_INDEXES, which matches nearly every row
+    USE TEMP B-TREE  sorts or groups the result in a temporary structure
+
+unless that plan step is listed in ACCEPTED with the reason it is fine. It
+also fails when a request runs N+1 statements (the SQL profiler in
+app/profiler.py is switched on for the run), and when a route of the app is
+not exercised here, so new routes have to be added. Exits 1 on any failure, printing the statement and its plan:
+
+    python bench/check_query_plans.py                      # throwaway 20,000-assessment database
+    python bench/synthetic.py --db big.db --assessments 1000000
+    python bench/check_query_plans.py --db big.db --analyze
+
+--db reuses an existing synthetic database (the check writes to it).
+--analyze runs ANALYZE first, to see the plans SQLite picks once it has
+table statistics; the app itself never collects them.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+import urllib.parse
+
+from synthetic import PASSWORD, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Indexes whose lookups are scans in disguise: every live assessment has deleted_at NULL
+UNSELECTIVE_INDEXES = {"ix_assessment_deleted_at"}
+# (route, caller, plan step) -> why it is not a regression
+ACCEPTED = {
+    ("GET /assessments/", "approver", "SEARCH assessment USING INDEX ix_assessment_deleted_at (deleted_at=?)"):
+        "approvers list everything in id order; the walk stops at the page size",
+    ("GET /assessments/", "approver",
+     "SEARCH assessment USING INDEX ix_assessment_deleted_at (deleted_at=? AND rowid>?)"):
+        "the next page of the same walk, starting at after_id",
+    ("GET /assessments/", "approver", "SCAN assessment"):
+        "the same walk as SQLite plans it with --analyze statistics",
+    ("GET /export/", "approver", "SEARCH assessment USING INDEX ix_assessment_deleted_at (deleted_at=?)"):
+        "approvers export everything, in id order, one keyset batch at a time",
+    ("GET /export/", "approver", "SCAN assessment"):
+        "the same, as planned with --analyze statistics",
+    ("GET /assessments/summary", "approver", "SCAN assessmentstatuscount"):
+        "approvers get every count; the table has a row per status per owner and approver, not per assessment",
+    ("GET /assessments/approvers/list", "owner", "SCAN user"):
+        "the user table is small; approvers are a large share of it",
+}
+PLANNED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")  # not DDL, PRAGMA or transaction control
+SCAN = re.compile(r"^SCAN (\w+)(?! VIRTUAL TABLE)")  # FTS lookups show as virtual table scans
+INDEX_SEARCH = re.compile(r"^SEARCH \w+ USING (?:COVERING )?INDEX (\w+)")
+TABLES = set()  # filled from sqlite_master: SCANs of subqueries and CTEs are not table scans
+
+
+class Recorder:
+    """SQL run per route, captured from the engine's cursor events."""
+
+    def __init__(self):
+        self.route = None  # (route, caller) of the request in progress
+        self.statements = {}  # (route, caller) -> {statement: parameters of its first run}
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.route is None or not statement.lstrip().upper().startswith(PLANNED_STATEMENTS):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.setdefault(self.route, {}).setdefault(statement, parameters)
+
+
+class NPlusOneLog(logging.Handler):
+    """Collects the N+1 reports of app/profiler.py."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+async def call(app, method, path, headers=None, body=b"", disconnect_after=None):
+    """One request straight through the ASGI app. Returns (status, content type, body).
+    `disconnect_after` seconds hangs up on a response that streams forever."""
+    url = urllib.parse.urlsplit(path)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": url.path, "raw_path": url.path.encode(), "query_string": url.query.encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 80),
+    }
+    sent = False
+    done = asyncio.Event()
+    response = {"status": None, "type": "", "body": b""}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        try:
+            await asyncio.wait_for(done.wait(), disconnect_after)
+        except asyncio.TimeoutError:
+            pass
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["type"] = dict(message.get("headers", [])).get(b"content-type", b"").decode()
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    return response["status"], response["type"], response["body"]
+
+
+def _bearer(email, role):
+    from app.auth import create_token
+    return {"Authorization": f"Bearer {create_token(email, role)}"}
+
+
+async def exercise(app, recorder, owner, approver, other_owner):
+    """Call every route as the frontend would. Returns the routes called, as "METHOD /template"."""
+    owner_id, owner_email = owner
+    approver_id, approver_email = approver
+    callers = {
+        "owner": _bearer(owner_email, "owner"),
+        "approver": _bearer(approver_email, "approver"),
+        "other owner": _bearer(other_owner[1], "owner"),
+        "anonymous": {},
+    }
+    json_headers = {"Content-Type": "application/json"}
+    called = set()
+    failures = []
+
+    async def request(route, path, caller, payload=None, expect=(200, 201), headers=None, **kwargs):
+        method = route.split(" ", 1)[0]
+        recorder.route = (route, caller)
+        headers = {**callers[caller], **(headers or {})}
+        if isinstance(payload, (dict, list)):
+            body, headers = json.dumps(payload).encode(), {**headers, **json_headers}
+        else:
+            body = payload or b""
+        try:
+            status, content_type, data = await call(app, method, path, headers, body, **kwargs)
+        finally:
+            recorder.route = None
+        called.add(route)
+        if status not in expect:
+            failures.append(f"{route} ({path}) returned {status}: {data[:200]!r}")
+        return json.loads(data) if status in (200, 201) and content_type == "application/json" else None
+
+    form = urllib.parse.urlencode({"username": owner_email, "password": PASSWORD}).encode()
+    await request("POST /auth/login", "/auth/login", "anonymous", form,
+                  headers={"Content-Type": "application/x-www-form-urlencoded"})
+    await request("POST /auth/register", "/auth/register", "anonymous", {
+        "email": f"plan-check-{time.time_ns()}@example.com", "password": PASSWORD, "role": "owner",
+    })
+    await request("GET /auth/me", "/auth/me", "owner")
+    await request("GET /health", "/health", "anonymous")
+    await request("GET /ready", "/ready", "anonymous")
+    await request("GET /metrics", "/metrics", "anonymous")
+    # SQL profiling on for the rest of the run, so N+1 statements are reported; slowness is not checked
+    await request("PUT /debug/sql-profile", "/debug/sql-profile", "approver", {"enabled": True, "slow_ms": 3600000})
+    await request("GET /debug/sql-profile", "/debug/sql-profile", "approver")
+    await request("GET /questions/", "/questions/", "owner")
+
+    # Dashboard, as both roles and with every filter
+    listing = await request("GET /assessments/", "/assessments/", "owner")
+    for query in ("", "?status=screening", f"?approver_user_id={approver_id}",
+                  "?created_after=2020-03-01T00:00:00&created_before=2020-04-01T00:00:00", "?after_id=1000&limit=50"):
+        await request("GET /assessments/", f"/assessments/{query}", "approver")
+    await request("GET /assessments/", "/assessments/?status=completed&after_id=10", "owner")
+    await request("GET /assessments/summary", "/assessments/summary", "owner")
+    await request("GET /assessments/summary", "/assessments/summary", "approver")
+    await request("GET /assessments/approvers/list", "/assessments/approvers/list", "owner")
+
+    created = await request("POST /assessments/", "/assessments/", "owner",
+                            {"title": "Plan check", "approver_user_id": approver_id})
+    existing = listing[0]["id"] if listing else created["id"]
+    await request("GET /assessments/{id}", f"/assessments/{existing}", "owner")
+    answers = [{"question_id": q, "answer": q == 2, "notes": ""} for q in range(1, 11)]
+    await request("POST /assessments/{id}/screening", f"/assessments/{existing}/screening", "owner",
+                  {"answers": answers})
+    await request("POST /assessments/{id}/screening", f"/assessments/{created['id']}/screening", "owner",
+                  {"answers": answers})
+    await request("PATCH /assessments/{id}/screening", f"/assessments/{existing}/screening", "owner",
+                  {"question_id": 3, "answer": True, "notes": "changed"})
+    await request("GET /assessments/{id}/screening", f"/assessments/{existing}/screening", "approver")
+    await request("GET /assessments/{id}/workspace", f"/assessments/{existing}/workspace", "owner")
+    await request("GET /assessments/{id}/events", f"/assessments/{existing}/events", "owner",
+                  disconnect_after=0.2)
+
+    # Threads and comments
+    thread = await request("POST /threads/", "/threads/", "approver", {
+        "assessment_id": existing, "question_id": 2, "question_text": "Question 2: why?", "opened_by": approver_id,
+    })
+    await request("GET /threads/", f"/threads/?assessment_id={existing}", "owner")
+    await request("POST /threads/comment", "/threads/comment", "owner",
+                  {"thread_id": thread["id"], "author_id": owner_id, "body": "Because retention is short"})
+    await request("GET /threads/{thread_id}/comments", f"/threads/{thread['id']}/comments", "owner")
+    await request("POST /threads/{thread_id}/end", f"/threads/{thread['id']}/end", "approver")
+    await request("POST /assessments/{id}/status", f"/assessments/{existing}/status", "approver",
+                  {"status": "completed"})
+
+    # Search: a rare word (ranked) and a word in every comment (newest first), as both roles
+    for query in ("biometric", "comment", "ret*"):
+        await request("GET /search/", f"/search/?q={query}", "approver")
+        await request("GET /search/", f"/search/?q={query}", "owner")
+
+    # Export and import; the approver export reads everything, so it is bounded by date
+    await request("GET /export/", "/export/", "other owner")
+    await request("GET /export/", "/export/?format=csv&status=completed", "other owner")
+    await request("GET /export/", "/export/?created_after=2020-03-01T00:00:00&created_before=2020-03-02T00:00:00",
+                  "approver")
+    legacy = json.dumps({
+        "title": "Imported by the plan check", "owner_email": owner_email, "approver_email": approver_email,
+        "answers": [{"question_id": 1, "answer": True}],
+        "threads": [{"question_text": "Question 1: legacy", "opened_by_email": approver_email,
+                     "comments": [{"author_email": owner_email, "body": "legacy"}]}],
+    }).encode()
+    await request("POST /import/", "/import/", "approver", legacy + b"\n" + legacy)
+
+    await request("DELETE /assessments/{id}", f"/assessments/{created['id']}", "owner")
+    await request("PUT /debug/sql-profile", "/debug/sql-profile", "approver", {"enabled": False})
+    return called, failures
+
+
+def _is_scan(step):
+    scan = SCAN.match(step)
+    if scan:
+        return scan.group(1) in TABLES
+    search = INDEX_SEARCH.match(step)
+    return bool(search) and search.group(1) in UNSELECTIVE_INDEXES
+
+
+def plan_findings(conn, route, caller, statement, parameters):
+    """The plan steps of `statement` that scan a table or build a temp b-tree and are not ACCEPTED."""
+    plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    flagged = [step for step in plan if _is_scan(step) or "USE TEMP B-TREE" in step]
+    return [step for step in flagged if (route, caller, step) not in ACCEPTED], plan
+
+
+def prepare(engine, assessments: int, analyze: bool = False):
+    """Migrate the configured database and, when it has no assessments yet, fill it with
+    `assessments` synthetic ones. Returns the callers: ([(owner id, email), ...], (approver id, email))."""
+    from sqlalchemy import text
+    from app import migrations
+
+    migrations.upgrade()
+    with engine.connect() as conn:
+        fresh = not conn.execute(text("SELECT 1 FROM assessment LIMIT 1")).first()
+    if fresh:
+        print(f"Generating {assessments} assessments in {engine.url.database}", file=sys.stderr)
+        generate(engine, assessments=assessments)
+    with engine.begin() as conn:
+        if analyze:
+            conn.execute(text("ANALYZE"))
+        TABLES.update(row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")))
+        users = conn.execute(text(
+            "SELECT u.id, u.email, u.role FROM user u WHERE u.role = 'approver' OR u.id IN "
+            "(SELECT owner_user_id FROM assessment WHERE deleted_at IS NULL LIMIT 2) ORDER BY u.id"
+        )).all()
+    owners = [(u.id, u.email) for u in users if u.role == "owner"]
+    approver = next((u.id, u.email) for u in users if u.role == "approver")
+    return owners, approver
+
+
+def capture(app, async_engine, owners, approver):
+    """Call every route in a new event loop, recording the SQL it runs.
+    Returns the Recorder and the failures that are not about plans: requests that
+    failed, N+1 statements and routes of the app the check does not call."""
+    from sqlalchemy import event
+
+    n_plus_one = NPlusOneLog()
+    logging.getLogger("app.profiler").addHandler(n_plus_one)
+    recorder = Recorder()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", recorder.before_cursor_execute)
+
+    async def run():
+        await app.router.startup()
+        try:
+            return await exercise(app, recorder, owners[0], approver, owners[-1])
+        finally:
+            # Background tasks and pooled connections belong to this event loop
+            await app.router.shutdown()
+            await async_engine.dispose()
+
+    try:
+        called, failures = asyncio.run(run())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", recorder.before_cursor_execute)
+        logging.getLogger("app.profiler").removeHandler(n_plus_one)
+
+    routes = {f"{method} {route.path}" for route in app.routes if hasattr(route, "methods")
+              and route.path not in ("/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc")
+              for method in route.methods - {"HEAD"}}
+    failures += [f"N+1 statements: {message}" for message in n_plus_one.messages]
+    failures += [f"{route} is not exercised by this check" for route in sorted(routes - called)]
+    return recorder, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="existing synthetic database to check against (default: a new one)")
+    parser.add_argument("--assessments", type=int, default=20000, help="size of the new database")
+    parser.add_argument("--analyze", action="store_true", help="collect table statistics first")
+    parser.add_argument("--verbose", action="store_true", help="print every statement and its plan")
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(prefix="sra-plans-"), "plans.db")
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, ROOT)
+    from app.database import async_engine, engine
+    from app.main import app
+
+    owners, approver = prepare(engine, args.assessments, args.analyze)
+    recorder, failures = capture(app, async_engine, owners, approver)
+
+    checked = 0
+    with engine.connect() as conn:
+        for (route, caller), statements in sorted(recorder.statements.items()):
+            for statement, parameters in statements.items():
+                checked += 1
+                findings, plan = plan_findings(conn, route, caller, statement, parameters)
+                if findings or args.verbose:
+                    print(f"\n{route} as {caller}: {' '.join(statement.split())}")
+                    for step in plan:
+                        note = ("full scan" if _is_scan(step) else "temp b-tree") if step in findings else ""
+                        print(f"    {step}{'   <-- ' + note if note else ''}")
+                if findings:
+                    failures.append(f"{route} as {caller}: {'; '.join(findings)}")
+
+    print(f"\nChecked {checked} statement(s) from {len({route for route, _ in recorder.statements})} route(s)")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
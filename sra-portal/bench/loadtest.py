@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Mixed-workload load test of the portal API against a local uvicorn.
+
+Seeds a throwaway SQLite database (see synthetic.py) with --users users (a
+fifth of them approvers), --assessments assessments with --answers screening
+answers and --threads threads of --comments comments each, starts uvicorn on
+it, and runs --concurrency virtual users for --duration seconds after a
+--warmup:
+
+    owners     log in, then list their dashboard, open a screening workspace,
+               submit or change answers and reply on threads
+    approvers  log in, then list every assessment, open workspaces, open
+               threads, comment and approve or red-flag
+
+Each virtual user repeats sessions of one login plus --actions actions, picked
+with a seeded random generator (--random-seed), so two runs with the same
+arguments send the same mix. The result is JSON with throughput and
+p50/p95/p99 latency per endpoint, plus the git commit and arguments it was
+measured with:
+
+    python bench/loadtest.py --concurrency 32 --duration 60 --out baseline.json
+    python bench/loadtest.py --concurrency 32 --duration 60 --compare baseline.json
+
+--compare prints the change per endpoint and exits 1 when any endpoint's p95
+is more than --tolerance (default 25%) slower than in the baseline.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+from synthetic import PASSWORD, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Actions per role and their relative weights
+OWNER_ACTIONS = {"dashboard": 4, "workspace": 4, "read_answers": 2, "submit_screening": 1, "change_answer": 2, "reply": 2}
+APPROVER_ACTIONS = {"dashboard": 4, "workspace": 4, "open_thread": 1, "comment": 2, "decide": 1}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url, port, timeout=30):
+    # Every virtual user signs in from 127.0.0.1; the per-IP limit would turn most of them away
+    env = {**os.environ, "SRA_DATABASE_URL": database_url, "SRA_AUTH_RATE_LIMIT": "0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("Server did not become healthy in time")
+
+
+class Recorder:
+    """Latencies and failures per endpoint, kept per virtual user and merged at the end."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def merge(self, other):
+        for endpoint, values in other.latencies.items():
+            self.latencies.setdefault(endpoint, []).extend(values)
+        for endpoint, count in other.errors.items():
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + count
+
+
+def _percentile(ordered, p):
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def summarize(recorder, seconds):
+    def stats(values, errors):
+        ordered = sorted(values)
+        return {
+            "requests": len(ordered),
+            "errors": errors,
+            "rps": round(len(ordered) / seconds, 1),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+    endpoints = {
+        endpoint: stats(values, recorder.errors.get(endpoint, 0))
+        for endpoint, values in sorted(recorder.latencies.items())
+    }
+    every = [v for values in recorder.latencies.values() for v in values]
+    return endpoints, stats(every, sum(recorder.errors.values())) if every else None
+
+
+class VirtualUser:
+    def __init__(self, host, port, user_id, email, role, rng, args, measure_from, stop_at):
+        self.host, self.port = host, port
+        self.user_id, self.email, self.role = user_id, email, role
+        self.rng = rng
+        self.args = args
+        self.measure_from, self.stop_at = measure_from, stop_at
+        self.recorder = Recorder()
+        self.conn = None
+        self.auth = {}
+        self.assessment_ids = []
+        self.question_ids = []
+
+    def _connect(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.args.timeout)
+
+    def request(self, endpoint, method, path, body=None, headers=None):
+        """Send one request, timing it under `endpoint` (the route, not the concrete path)."""
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers={**self.auth, **(headers or {})})
+            res = self.conn.getresponse()
+            status, data = res.status, res.read()
+        except (OSError, http.client.HTTPException):
+            status, data = None, b""
+            self._connect()
+        if started >= self.measure_from:
+            self.recorder.record(f"{method} {endpoint}", time.perf_counter() - started, status is not None and status < 400)
+        return status, data
+
+    def post_json(self, endpoint, path, payload):
+        return self.request(endpoint, "POST", path, json.dumps(payload), JSON_HEADERS)
+
+    def login(self):
+        self.auth = {}
+        form = urllib.parse.urlencode({"username": self.email, "password": PASSWORD})
+        status, data = self.request("/auth/login", "POST", "/auth/login", form,
+                                    {"Content-Type": "application/x-www-form-urlencoded"})
+        if status != 200:
+            return False
+        self.auth = {"Authorization": f"Bearer {json.loads(data)['access_token']}"}
+        return True
+
+    def run(self):
+        self._connect()
+        actions = OWNER_ACTIONS if self.role == "owner" else APPROVER_ACTIONS
+        names, weights = list(actions), list(actions.values())
+        while time.monotonic() < self.stop_at:
+            if not self.login():
+                time.sleep(0.5)  # hashing queue full or server down
+                continue
+            self.dashboard()
+            for _ in range(self.args.actions):
+                if time.monotonic() >= self.stop_at:
+                    break
+                getattr(self, self.rng.choices(names, weights)[0])()
+                if self.args.think_ms:
+                    time.sleep(self.rng.uniform(0, 2 * self.args.think_ms) / 1000)
+        self.conn.close()
+
+    # Actions
+
+    def dashboard(self):
+        status, data = self.request("/assessments/", "GET", "/assessments/")
+        if status == 200:
+            self.assessment_ids = [row["id"] for row in json.loads(data)]
+        self.request("/assessments/summary", "GET", "/assessments/summary")
+
+    def _pick_assessment(self):
+        return self.rng.choice(self.assessment_ids) if self.assessment_ids else None
+
+    def _workspace(self, assessment_id):
+        status, data = self.request("/assessments/{id}/workspace", "GET", f"/assessments/{assessment_id}/workspace")
+        return json.loads(data) if status == 200 else None
+
+    def workspace(self):
+        if (assessment_id := self._pick_assessment()) is not None:
+            self._workspace(assessment_id)
+
+    def read_answers(self):
+        if (assessment_id := self._pick_assessment()) is not None:
+            self.request("/assessments/{id}/screening", "GET", f"/assessments/{assessment_id}/screening")
+
+    def _questions(self):
+        if not self.question_ids:
+            status, data = self.request("/questions/", "GET", "/questions/")
+            if status == 200:
+                self.question_ids = [q["id"] for q in json.loads(data)["questions"]]
+        return self.question_ids
+
+    def submit_screening(self):
+        if (assessment_id := self._pick_assessment()) is None or not self._questions():
+            return
+        answers = [{"question_id": q, "answer": self.rng.random() < 0.3, "notes": ""}
+                   for q in self.question_ids[:self.args.answers]]
+        self.post_json("/assessments/{id}/screening", f"/assessments/{assessment_id}/screening", {"answers": answers})
+
+    def change_answer(self):
+        if (assessment_id := self._pick_assessment()) is None or not self._questions():
+            return
+        payload = {"question_id": self.rng.choice(self.question_ids), "answer": self.rng.random() < 0.3,
+                   "notes": f"changed at {time.time():.0f}"}
+        self.request("/assessments/{id}/screening", "PATCH", f"/assessments/{assessment_id}/screening",
+                     json.dumps(payload), JSON_HEADERS)
+
+    def _comment_on_some_thread(self):
+        if (assessment_id := self._pick_assessment()) is None:
+            return
+        workspace = self._workspace(assessment_id)
+        if workspace and workspace["threads"]:
+            thread = self.rng.choice(workspace["threads"])
+            self.post_json("/threads/comment", "/threads/comment", {
+                "thread_id": thread["id"], "author_id": self.user_id, "body": f"Load test comment by {self.email}",
+            })
+
+    reply = comment = _comment_on_some_thread
+
+    def open_thread(self):
+        if (assessment_id := self._pick_assessment()) is None or not self._questions():
+            return
+        question_id = self.rng.choice(self.question_ids)
+        self.post_json("/threads/", "/threads/", {
+            "assessment_id": assessment_id, "question_id": question_id,
+            "question_text": f"Question {question_id}: please clarify", "opened_by": self.user_id,
+        })
+
+    def decide(self):
+        if (assessment_id := self._pick_assessment()) is not None:
+            self.post_json("/assessments/{id}/status", f"/assessments/{assessment_id}/status",
+                           {"status": "completed" if self.rng.random() < 0.8 else "red_flag"})
+
+
+def run_load(host, port, people, args):
+    rng = random.Random(args.random_seed)
+    approvers = max(1, round(args.concurrency * args.approver_share))
+    picks = [("approver", person) for person in rng.sample(people["approver"], min(approvers, len(people["approver"])))]
+    owners = people["owner"]
+    picks += [("owner", owners[i % len(owners)]) for i in range(args.concurrency - len(picks))]
+
+    started = time.monotonic()
+    measure_from = time.perf_counter() + args.warmup
+    stop_at = started + args.warmup + args.duration
+    users = [
+        VirtualUser(host, port, user_id, email, role, random.Random(rng.random()), args, measure_from, stop_at)
+        for role, (user_id, email) in picks
+    ]
+    threads = [threading.Thread(target=user.run, daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    recorder = Recorder()
+    for user in users:
+        recorder.merge(user.recorder)
+    measured = time.monotonic() - started - args.warmup
+    return recorder, measured, sum(1 for role, _ in picks if role == "approver")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, result, tolerance):
+    """Print per-endpoint changes against `baseline`. Returns the endpoints whose p95 regressed past `tolerance`."""
+    regressed = []
+    print(f"{'endpoint':40} {'rps':>17} {'p95 ms':>20} {'p99 ms':>20}")
+    for endpoint, now in result["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None:
+            print(f"{endpoint:40} {'new':>16}")
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        flag = " REGRESSED" if change > tolerance else ""
+        if flag:
+            regressed.append(endpoint)
+        print(f"{endpoint:40} {before['rps']:>7} -> {now['rps']:<6} {before['p95_ms']:>8} -> {now['p95_ms']:<8}"
+              f" {before['p99_ms']:>8} -> {now['p99_ms']:<8}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="seeded users, every fifth an approver")
+    parser.add_argument("--assessments", type=int, default=5000)
+    parser.add_argument("--answers", type=int, default=10, help="screening answers per assessment")
+    parser.add_argument("--threads", type=int, default=1, help="threads per assessment")
+    parser.add_argument("--comments", type=int, default=2, help="comments per thread")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--approver-share", type=float, default=0.25, help="fraction of virtual users that are approvers")
+    parser.add_argument("--actions", type=int, default=20, help="actions per login")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between actions")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds first")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON result here as well as to stdout")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown with --compare")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="sra-load-")
+    database_url = f"sqlite:///{os.path.join(work_dir, 'load.db')}"
+    os.environ["SRA_DATABASE_URL"] = database_url
+    sys.path.insert(0, ROOT)
+    from app import migrations
+    from app.database import engine
+
+    migrations.upgrade()
+    seeding = time.perf_counter()
+    try:
+        people = generate(engine, args.users, args.assessments, args.answers, args.threads, args.comments,
+                          random.Random(args.random_seed))
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    engine.dispose()
+    seed_seconds = time.perf_counter() - seeding
+
+    port = _free_port()
+    server = start_server(database_url, port)
+    try:
+        recorder, measured, approvers = run_load("127.0.0.1", port, people, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+    endpoints, total = summarize(recorder, measured)
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "measured_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed_seconds": round(seed_seconds, 1),
+            "measured_seconds": round(measured, 1),
+            "virtual_approvers": approvers,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "tolerance")},
+        },
+        "total": total,
+        "endpoints": endpoints,
+    }
+    encoded = json.dumps(result, indent=2)
+    print(encoded)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(encoded + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(json.load(f), result, args.tolerance)
+        if regressed:
+            print(f"p95 regressed more than {args.tolerance:.0%} on: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Synthetic data for benchmarks: users, assessments, catalog answers, threads
+and comments written straight into a migrated database through the models in
+app/models.py, a batch per transaction, search index included.
+
+    python bench/synthetic.py --db big.db --assessments 1000000
+
+makes a 1,000,000-assessment database (about 14 million rows with the
+default ten answers and a two-comment thread per assessment) that
+bench/check_query_plans.py and ad-hoc experiments can reuse.
+--database-url fills an empty PostgreSQL database instead. Every user's
+password is PASSWORD (already SHA-256 hashed, as the frontend sends it).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = hashlib.sha256(b"loadtest-password").hexdigest()
+APPROVER_SHARE = 5  # every fifth user is an approver
+BATCH = 5000  # assessments per transaction
+WORDS = ("vendor", "retention", "biometric", "consent", "transfer", "anonymised", "payroll", "cctv", "backup", "cloud")
+
+
+def user_email(i):
+    role = "approver" if i % APPROVER_SHARE == 0 else "owner"
+    return f"load-{role}-{i}@example.com", role
+
+
+def generate(engine, users=200, assessments=5000, answers=10, threads=1, comments=2, rng=None):
+    """Fill a migrated, empty database. Returns {"owner": [...], "approver": [...]} of (id, email)."""
+    from sqlalchemy import insert, text
+    from app import auth, catalog, search, summary
+    from app.models import Assessment, AssessmentStatus, QuestionThread, ScreeningAnswer, ThreadComment, User
+
+    rng = rng or random.Random(1)
+    people = {"owner": [], "approver": []}
+    rows = []
+    for i in range(1, users + 1):
+        email, role = user_email(i)
+        rows.append({"id": i, "email": email, "role": role})
+        people[role].append((i, email))
+    if not people["owner"] or not people["approver"]:
+        raise ValueError("need at least 5 users so there are owners and approvers")
+    # bcrypt once; every user shares the password
+    password_hash = auth.hash_password(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{**row, "password_hash": password_hash} for row in rows])
+        questions_catalog = catalog.load(conn)
+    version, questions = questions_catalog.version, questions_catalog.questions()
+    if answers > len(questions):
+        raise ValueError(f"at most {len(questions)} answers per assessment, the catalog size")
+
+    statuses = [AssessmentStatus.screening, AssessmentStatus.awaiting_approval, AssessmentStatus.in_dpia,
+                AssessmentStatus.completed]
+    start_date = datetime(2020, 1, 1)
+    thread_id = 0
+    for start in range(1, assessments + 1, BATCH):
+        batch = {Assessment: [], ScreeningAnswer: [], QuestionThread: [], ThreadComment: []}
+        for i in range(start, min(start + BATCH, assessments + 1)):
+            owner_id, _ = rng.choice(people["owner"])
+            approver_id, _ = rng.choice(people["approver"])
+            created_at = start_date + timedelta(minutes=i)
+            batch[Assessment].append({
+                "id": i, "title": f"Synthetic PIA {i} {rng.choice(WORDS)}", "owner_user_id": owner_id,
+                "approver_user_id": approver_id, "status": rng.choice(statuses), "is_new": True,
+                "created_at": created_at,
+            })
+            for q in questions[:answers]:
+                batch[ScreeningAnswer].append({
+                    "assessment_id": i, "question_id": q["id"], "catalog_version": version,
+                    "answer": rng.random() < 0.3, "notes": "", "created_at": created_at,
+                })
+            for q in questions[:threads]:
+                thread_id += 1
+                batch[QuestionThread].append({
+                    "id": thread_id, "assessment_id": i, "question_text": f"{q['text']}: please explain",
+                    "question_id": q["id"], "catalog_version": version, "opened_by": approver_id,
+                    "status": "open", "created_at": created_at,
+                })
+                for c in range(comments):
+                    batch[ThreadComment].append({
+                        "thread_id": thread_id, "author_id": approver_id if c % 2 == 0 else owner_id,
+                        "body": f"Comment {c} on thread {thread_id} about {rng.choice(WORDS)}",
+                        "created_at": created_at + timedelta(seconds=c),
+                    })
+        with engine.begin() as conn:
+            fts = search.supported(conn)
+            if fts:
+                marks = search.suspend_insert_triggers(conn)
+            for model, values in batch.items():
+                if values:
+                    conn.execute(insert(model), values)
+            if fts:
+                search.index_since(conn, marks)
+    with engine.begin() as conn:
+        summary.rebuild(conn)
+        if conn.dialect.name == "postgresql":
+            # Rows were written with explicit ids; move the sequences past them
+            for model in (User, Assessment, QuestionThread, ThreadComment, ScreeningAnswer):
+                table = model.__tablename__
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                    f"(SELECT coalesce(max(id), 0) + 1 FROM \"{table}\"), false)"
+                ))
+    return people
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--db", help="SQLite file to create")
+    target.add_argument("--database-url", help="empty database to fill instead, e.g. postgresql://localhost/sra_bench")
+    parser.add_argument("--users", type=int, default=200, help="every fifth an approver")
+    parser.add_argument("--assessments", type=int, default=100000)
+    parser.add_argument("--answers", type=int, default=10, help="screening answers per assessment")
+    parser.add_argument("--threads", type=int, default=1, help="threads per assessment")
+    parser.add_argument("--comments", type=int, default=2, help="comments per thread")
+    parser.add_argument("--random-seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.db and os.path.exists(args.db):
+        raise SystemExit(f"{args.db} already exists")
+    os.environ["SRA_DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.abspath(args.db)}"
+    sys.path.insert(0, ROOT)
+    from app import migrations
+    from app.database import engine
+
+    migrations.upgrade()
+    started = time.perf_counter()
+    generate(engine, args.users, args.assessments, args.answers, args.threads, args.comments,
+             random.Random(args.random_seed))
+    elapsed = time.perf_counter() - started
+    rows = args.users + args.assessments * (1 + args.answers + args.threads * (1 + args.comments))
+    print(json.dumps({"db": args.db or args.database_url, "rows": rows, "seconds": round(elapsed, 1), "rows_per_s": round(rows / elapsed)}))
+
+
+if __name__ == "__main__":
+    main()
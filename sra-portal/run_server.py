@@ -1,9 +1,191 @@
 #!/usr/bin/env python3
 """
 Script to run the FastAPI backend server
+
+    python run_server.py            # development: one process, auto-reload, 127.0.0.1:8000
+    python run_server.py --prod     # production: pre-forked uvicorn workers on one socket
+
+In production mode the parent process applies pending migrations, checks the
+schema and imports the app (gate rules and question catalog included) once,
+binds the listening socket, and then forks the workers, which share the
+preloaded app and start serving at once. The parent restarts a worker that
+dies. On SIGTERM or SIGINT every worker starts draining: GET /ready answers
+503 for --drain-seconds so load balancers stop sending traffic, then the
+worker stops accepting connections and gives in-flight requests up to
+--graceful-timeout seconds to finish. Defaults come from SRA_HOST, SRA_PORT,
+SRA_WORKERS, SRA_KEEP_ALIVE, SRA_BACKLOG, SRA_GRACEFUL_TIMEOUT,
+SRA_DRAIN_SECONDS and SRA_FORWARDED_ALLOW_IPS (see app/config.py).
 """
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
 import uvicorn
 
-if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
+from app import config, migrations
+
+logger = logging.getLogger("run_server")
+
+RESPAWN_DELAY = 1.0  # seconds before replacing a worker that died within a second of starting
+
+
+class DrainingServer(uvicorn.Server):
+    """Marks the worker not ready on the first exit signal, then shuts down after the drain period."""
+
+    def __init__(self, config, drain_seconds: int):
+        super().__init__(config)
+        self.drain_seconds = drain_seconds
+
+    def handle_exit(self, sig, frame):
+        from app.main import readiness
+        if readiness.draining or not self.drain_seconds:
+            readiness.draining = True
+            return super().handle_exit(sig, frame)
+        readiness.draining = True
+        signal.signal(signal.SIGALRM, lambda *_: super(DrainingServer, self).handle_exit(sig, None))
+        signal.alarm(self.drain_seconds)
+
+
+def _listen(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _preload():
+    """Everything that should happen once, not once per worker."""
+    applied = migrations.upgrade()
+    if applied:
+        logger.info("Applied migrations %s", applied)
+    from app import catalog, gating
+    from app.database import engine
+    from app.main import app, readiness
+    migrations.ensure_current(engine)
+    gating.current()
+    catalog.current()
+    readiness.preloaded = True
+    # Workers must not share the connection the catalog was read on; the async pool is still empty
+    engine.dispose()
+    return app
 
+
+def _worker(app, sock, index, args):
+    # Own process group: a terminal's Ctrl-C reaches the parent only, which drains the workers once
+    os.setpgid(0, 0)
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    from app.main import readiness
+    readiness.background_tasks = index == 0
+    server = DrainingServer(uvicorn.Config(
+        app,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        backlog=args.backlog,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        log_level="info",
+        access_log=False,
+    ), args.drain_seconds)
+    server.run(sockets=[sock])
+    os._exit(0 if server.started else 3)
+
+
+def _spawn(app, sock, index, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _worker(app, sock, index, args)
+        finally:
+            os._exit(1)
+    logger.info("Started worker %d (pid %d)", index, pid)
+    return pid
+
+
+def serve_production(args):
+    app = _preload()
+    sock = _listen(args.host, args.port, args.backlog)
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    workers = {}  # pid -> (index, started at)
+    for index in range(args.workers):
+        workers[_spawn(app, sock, index, args)] = (index, time.monotonic())
+
+    stopping = []
+
+    def stop(sig, frame):
+        if stopping:
+            return
+        logger.info("Draining workers")
+        stopping.append(time.monotonic())
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    deadline_after = args.drain_seconds + args.graceful_timeout + 5
+    while workers:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping and time.monotonic() - stopping[0] > deadline_after:
+                for pid in workers:
+                    logger.warning("Worker pid %d did not stop in time; killing it", pid)
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                stopping[0] = float("inf")
+            time.sleep(0.1)
+            continue
+        if pid not in workers:
+            continue
+        index, started = workers.pop(pid)
+        if stopping:
+            continue
+        logger.warning("Worker %d (pid %d) exited with status %d; restarting it",
+                       index, pid, os.waitstatus_to_exitcode(status))
+        if time.monotonic() - started < 1:
+            time.sleep(RESPAWN_DELAY)
+        workers[_spawn(app, sock, index, args)] = (index, time.monotonic())
+    sock.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prod", action="store_true", help="pre-forked workers, no reload")
+    parser.add_argument("--host", default=config.HOST)
+    parser.add_argument("--port", type=int, default=config.PORT)
+    parser.add_argument("--workers", type=int, default=config.WORKERS or os.cpu_count() or 1)
+    parser.add_argument("--keep-alive", type=int, default=config.KEEP_ALIVE, help="idle connection timeout, seconds")
+    parser.add_argument("--backlog", type=int, default=config.BACKLOG, help="listen queue length")
+    parser.add_argument("--graceful-timeout", type=int, default=config.GRACEFUL_TIMEOUT,
+                        help="seconds in-flight requests get after SIGTERM")
+    parser.add_argument("--drain-seconds", type=int, default=config.DRAIN_SECONDS,
+                        help="seconds /ready answers 503 before the listener closes")
+    parser.add_argument("--forwarded-allow-ips", default=config.FORWARDED_ALLOW_IPS,
+                        help="proxies whose X-Forwarded-For names the client")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if args.prod:
+        if not hasattr(os, "fork"):
+            raise SystemExit("--prod needs os.fork; run `uvicorn app.main:app --workers N` on this platform")
+        return serve_production(args)
+    # Bring the schema up to date once, before the server (and its reloader) starts
+    migrations.upgrade()
+    uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True,
+                forwarded_allow_ips=args.forwarded_allow_ips)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
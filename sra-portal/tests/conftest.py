@@ -0,0 +1,109 @@
+"""
+Fixtures for the API tests. Requests go through the app in-process (TestClient)
+against SRA_DATABASE_URL, which defaults to a throwaway SQLite file:
+
+    python -m pytest tests
+    SRA_DATABASE_URL=postgresql://postgres@localhost/sra_test python -m pytest tests
+
+The database is migrated before the first test and its rows are left behind;
+point SRA_DATABASE_URL at a scratch database. Every test makes its own users,
+so rows from earlier runs or other tests do not get in the way.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import uuid
+from typing import NamedTuple
+
+import pytest
+
+# Configuration is read when app.config is first imported
+if not os.getenv("SRA_DATABASE_URL"):
+    os.environ["SRA_DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sra-tests-'), 'test.db')}"
+os.environ.setdefault("SRA_AUTH_RATE_LIMIT", "0")  # test_ratelimit.py switches it on where it needs it
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app import auth, migrations
+from app.database import engine
+from app.models import User
+
+PASSWORD = hashlib.sha256(b"test-password").hexdigest()  # as the frontend sends it
+
+
+class Account(NamedTuple):
+    id: int
+    email: str
+    role: str
+    headers: dict  # Authorization header for the account
+
+
+def unique_email(role: str) -> str:
+    return f"{role}-{uuid.uuid4().hex[:12]}@example.com"
+
+
+def bearer(email: str, role: str) -> dict:
+    return {"Authorization": f"Bearer {auth.create_token(email, role)}"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    migrations.upgrade()
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def password_hash():
+    return auth.hash_password(PASSWORD)
+
+
+@pytest.fixture
+def make_user(client, password_hash):
+    """Insert a user with PASSWORD straight into the database (one bcrypt per session)."""
+    def make(role: str = "owner") -> Account:
+        email = unique_email(role)
+        with engine.begin() as conn:
+            user_id = conn.execute(
+                insert(User).values(email=email, password_hash=password_hash, role=role).returning(User.id)
+            ).scalar_one()
+        return Account(user_id, email, role, bearer(email, role))
+    return make
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user("owner")
+
+
+@pytest.fixture
+def approver(make_user):
+    return make_user("approver")
+
+
+@pytest.fixture
+def other_owner(make_user):
+    return make_user("owner")
+
+
+@pytest.fixture
+def make_assessment(client):
+    """Create an assessment through the API as `owner`; returns its JSON."""
+    def make(owner: Account, approver: Account = None, title: str = "Payroll vendor") -> dict:
+        response = client.post("/assessments/", headers=owner.headers, json={
+            "title": title, "approver_user_id": approver.id if approver else None,
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make
+
+
+@pytest.fixture
+def assessment(make_assessment, owner, approver):
+    return make_assessment(owner, approver)
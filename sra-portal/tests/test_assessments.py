@@ -0,0 +1,148 @@
+YES_TO_PERSONAL_DATA = [{"question_id": 1, "answer": True}, {"question_id": 3, "answer": False}]
+NO_PERSONAL_DATA = [{"question_id": 1, "answer": False}]
+
+
+def _ids(response):
+    return [row["id"] for row in response.json()]
+
+
+def test_create_and_get(client, owner, approver, assessment):
+    assert assessment["owner_user_id"] == owner.id
+    assert assessment["approver_user_id"] == approver.id
+    assert assessment["status"] == "screening"
+
+    response = client.get(f"/assessments/{assessment['id']}", headers=owner.headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Payroll vendor"
+    assert client.get("/assessments/999999999", headers=owner.headers).status_code == 404
+
+
+def test_list_shows_owners_their_own_with_user_emails(client, owner, other_owner, approver, make_assessment):
+    mine = make_assessment(owner, approver)
+    theirs = make_assessment(other_owner, approver)
+
+    rows = client.get("/assessments/", headers=owner.headers).json()
+    assert [row["id"] for row in rows] == [mine["id"]]
+    assert rows[0]["owner_name"] == owner.email and rows[0]["approver_name"] == approver.email
+
+    listed = _ids(client.get(f"/assessments/?approver_user_id={approver.id}", headers=approver.headers))
+    assert listed == [mine["id"], theirs["id"]]
+
+
+def test_list_pages_and_filters(client, owner, approver, make_assessment):
+    created = [make_assessment(owner, approver, f"Page {i}")["id"] for i in range(5)]
+    query = f"/assessments/?approver_user_id={approver.id}&limit=2"
+
+    pages, after_id = [], None
+    while True:
+        response = client.get(query + (f"&after_id={after_id}" if after_id else ""), headers=approver.headers)
+        assert response.status_code == 200
+        pages.append(_ids(response))
+        after_id = response.headers.get("X-Next-After-Id")
+        if after_id is None:
+            break
+    assert pages == [created[:2], created[2:4], created[4:]]
+
+    client.post(f"/assessments/{created[0]}/screening", headers=owner.headers, json={"answers": NO_PERSONAL_DATA})
+    completed = client.get(f"/assessments/?approver_user_id={approver.id}&status=completed", headers=approver.headers)
+    assert _ids(completed) == [created[0]]
+    assert client.get("/assessments/?limit=0", headers=owner.headers).status_code == 422
+
+
+def test_submit_screening_runs_the_gate(client, owner, approver, assessment):
+    url = f"/assessments/{assessment['id']}/screening"
+    response = client.post(url, headers=owner.headers, json={"answers": YES_TO_PERSONAL_DATA})
+    assert response.status_code == 200
+    assert response.json()["next_status"] == "in_dpia"
+    assert response.json()["changes"] == {"inserted": 2, "updated": 0, "deleted": 0}
+
+    answers = client.get(url, headers=approver.headers).json()
+    assert [(a["question_id"], a["answer"]) for a in answers] == [(1, True), (3, False)]
+    assert answers[0]["question"].startswith("Does the system collect any Personal information")
+
+    # Resubmitting writes only the difference
+    response = client.post(url, headers=owner.headers, json={"answers": NO_PERSONAL_DATA})
+    assert response.json()["next_status"] == "completed"
+    assert response.json()["changes"] == {"inserted": 0, "updated": 1, "deleted": 1}
+
+
+def test_submit_screening_is_for_the_owner_only(client, other_owner, approver, assessment):
+    url = f"/assessments/{assessment['id']}/screening"
+    assert client.post(url, headers=other_owner.headers, json={"answers": NO_PERSONAL_DATA}).status_code == 403
+    assert client.post(url, headers=approver.headers, json={"answers": NO_PERSONAL_DATA}).status_code == 403
+    assert client.get(url, headers=other_owner.headers).status_code == 403
+
+
+def test_patch_screening_keeps_drafts_and_regates_submitted_answers(client, owner, assessment):
+    url = f"/assessments/{assessment['id']}/screening"
+    draft = client.patch(url, headers=owner.headers, json={"question_id": 1, "answer": False})
+    assert draft.status_code == 200
+    assert draft.json()["next_status"] == "screening"
+
+    client.post(url, headers=owner.headers, json={"answers": NO_PERSONAL_DATA})
+    patched = client.patch(url, headers=owner.headers, json={"question_id": 1, "answer": True, "notes": "HR data"})
+    assert patched.json()["next_status"] == "in_dpia"
+    assert patched.json()["changes"] == {"inserted": 0, "updated": 1, "deleted": 0}
+    assert client.get(f"/assessments/{assessment['id']}", headers=owner.headers).json()["status"] == "in_dpia"
+
+
+def test_unknown_question_id_is_rejected(client, owner, assessment):
+    response = client.post(f"/assessments/{assessment['id']}/screening", headers=owner.headers,
+                           json={"answers": [{"question_id": 999, "answer": True}]})
+    assert response.status_code == 400
+
+
+def test_status_updates_are_for_approvers(client, owner, approver, assessment):
+    url = f"/assessments/{assessment['id']}/status"
+    assert client.post(url, headers=owner.headers, json={"status": "completed"}).status_code == 403
+    assert client.post(url, headers=approver.headers, json={"status": "archived"}).status_code == 400
+    response = client.post(url, headers=approver.headers, json={"status": "red_flag"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "red_flag"
+
+
+def test_summary_follows_creates_status_changes_and_deletes(client, owner, approver, make_assessment):
+    def counts():
+        return client.get("/assessments/summary", headers=owner.headers).json()["by_owner"][str(owner.id)]
+
+    first = make_assessment(owner, approver)
+    make_assessment(owner, approver)
+    assert counts() == {"screening": 2}
+    client.post(f"/assessments/{first['id']}/status", headers=approver.headers, json={"status": "completed"})
+    assert counts() == {"screening": 1, "completed": 1}
+    client.delete(f"/assessments/{first['id']}", headers=owner.headers)
+    assert counts() == {"screening": 1}
+
+
+def test_workspace(client, owner, other_owner, approver, assessment):
+    client.post(f"/assessments/{assessment['id']}/screening", headers=owner.headers,
+                json={"answers": YES_TO_PERSONAL_DATA})
+    thread = client.post("/threads/", headers=approver.headers, json={
+        "assessment_id": assessment["id"], "question_id": 1, "question_text": "Which data?", "opened_by": approver.id,
+    }).json()
+    client.post("/threads/comment", headers=owner.headers,
+                json={"thread_id": thread["id"], "author_id": owner.id, "body": "Payroll only"})
+
+    workspace = client.get(f"/assessments/{assessment['id']}/workspace", headers=owner.headers).json()
+    assert workspace["assessment"]["owner_name"] == owner.email
+    assert len(workspace["screening_answers"]) == 2
+    assert [t["opener_email"] for t in workspace["threads"]] == [approver.email]
+    assert [c["body"] for c in workspace["comments"][str(thread["id"])]] == ["Payroll only"]
+    assert client.get(f"/assessments/{assessment['id']}/workspace", headers=other_owner.headers).status_code == 403
+
+
+def test_approvers_list(client, owner, approver):
+    approvers = client.get("/assessments/approvers/list", headers=owner.headers).json()
+    assert {"id": approver.id, "name": approver.email, "email": approver.email} in approvers
+
+
+def test_get_answers_with_etag(client, owner, assessment):
+    url = f"/assessments/{assessment['id']}"
+    first = client.get(url, headers=owner.headers)
+    etag = first.headers["ETag"]
+    assert client.get(url, headers={**owner.headers, "If-None-Match": etag}).status_code == 304
+
+    client.post(f"{url}/screening", headers=owner.headers, json={"answers": NO_PERSONAL_DATA})
+    changed = client.get(url, headers={**owner.headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["status"] == "completed"
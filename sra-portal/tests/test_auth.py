@@ -0,0 +1,41 @@
+from conftest import PASSWORD, unique_email
+
+
+def _register(client, email, role="owner", password=PASSWORD):
+    return client.post("/auth/register", json={"email": email, "password": password, "role": role})
+
+
+def _login(client, email, password=PASSWORD):
+    return client.post("/auth/login", data={"username": email, "password": password})
+
+
+def test_register_login_and_me(client):
+    email = unique_email("owner")
+    registered = _register(client, email)
+    assert registered.status_code == 200
+    assert registered.json()["email"] == email and registered.json()["role"] == "owner"
+
+    login = _login(client, email)
+    assert login.status_code == 200
+    body = login.json()
+    assert body["token_type"] == "bearer" and body["role"] == "owner"
+
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {body['access_token']}"})
+    assert me.status_code == 200
+    assert me.json() == {"id": registered.json()["id"], "email": email, "role": "owner"}
+
+
+def test_login_rejects_wrong_password_and_unknown_user(client, owner):
+    assert _login(client, owner.email, "0" * 64).status_code == 401
+    assert _login(client, unique_email("nobody")).status_code == 401
+
+
+def test_register_rejects_taken_email_bad_role_and_plain_passwords(client, owner):
+    assert _register(client, owner.email).status_code == 400
+    assert _register(client, unique_email("admin"), role="admin").status_code == 400
+    assert _register(client, unique_email("owner"), password="hunter2").status_code == 400
+
+
+def test_me_needs_a_valid_token(client):
+    assert client.get("/auth/me").status_code == 401
+    assert client.get("/auth/me", headers={"Authorization": "Bearer not-a-token"}).status_code == 401
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import config, purge
+from app.database import async_engine, engine
+from app.models import Assessment, QuestionThread, ScreeningAnswer, ThreadComment
+
+
+def _rows(assessment_id):
+    """Rows left of an assessment's tree: (assessments, answers, threads, comments)."""
+    threads = select(QuestionThread.id).where(QuestionThread.assessment_id == assessment_id)
+    with engine.connect() as conn:
+        return tuple(conn.execute(query).scalar() for query in (
+            select(func.count()).select_from(Assessment).where(Assessment.id == assessment_id),
+            select(func.count()).select_from(ScreeningAnswer).where(ScreeningAnswer.assessment_id == assessment_id),
+            select(func.count()).select_from(QuestionThread).where(QuestionThread.assessment_id == assessment_id),
+            select(func.count()).select_from(ThreadComment).where(ThreadComment.thread_id.in_(threads)),
+        ))
+
+
+@pytest.fixture
+def tree(client, owner, approver, assessment):
+    """An assessment with two answers and a thread with one comment."""
+    client.post(f"/assessments/{assessment['id']}/screening", headers=owner.headers, json={"answers": [
+        {"question_id": 1, "answer": True}, {"question_id": 3, "answer": True},
+    ]})
+    thread = client.post("/threads/", headers=approver.headers, json={
+        "assessment_id": assessment["id"], "question_text": "Which categories?", "opened_by": approver.id,
+    }).json()
+    client.post("/threads/comment", headers=owner.headers,
+                json={"thread_id": thread["id"], "author_id": owner.id, "body": "Health"})
+    assert _rows(assessment["id"]) == (1, 2, 1, 1)
+    return assessment["id"]
+
+
+def test_delete_removes_the_whole_tree(client, owner, tree):
+    response = client.delete(f"/assessments/{tree}", headers=owner.headers)
+    assert response.status_code == 200
+    assert _rows(tree) == (0, 0, 0, 0)
+    assert client.get(f"/assessments/{tree}", headers=owner.headers).status_code == 404
+    assert client.delete(f"/assessments/{tree}", headers=owner.headers).status_code == 404
+
+
+def test_delete_permissions(client, other_owner, approver, assessment):
+    assert client.delete(f"/assessments/{assessment['id']}", headers=other_owner.headers).status_code == 403
+    assert client.delete(f"/assessments/{assessment['id']}", headers=approver.headers).status_code == 200
+
+
+def test_soft_delete_hides_now_and_purges_later(client, monkeypatch, owner, tree):
+    monkeypatch.setattr(config, "SOFT_DELETE", True)
+    assert client.delete(f"/assessments/{tree}", headers=owner.headers).status_code == 200
+    assert client.get(f"/assessments/{tree}", headers=owner.headers).status_code == 404
+    assert tree not in [row["id"] for row in client.get("/assessments/", headers=owner.headers).json()]
+    assert _rows(tree) == (1, 2, 1, 1)
+
+    client.portal.call(purge.purge_assessment, async_engine, tree)
+    assert _rows(tree) == (0, 0, 0, 0)
+
+
+def test_soft_deleted_assessments_take_no_new_threads_or_comments(client, monkeypatch, owner, approver, tree):
+    thread_id = client.get(f"/threads/?assessment_id={tree}", headers=owner.headers).json()[0]["id"]
+    monkeypatch.setattr(config, "SOFT_DELETE", True)
+    client.delete(f"/assessments/{tree}", headers=owner.headers)
+
+    comment = {"thread_id": thread_id, "author_id": owner.id, "body": "Still there?"}
+    assert client.post("/threads/comment", headers=owner.headers, json=comment).status_code == 404
+    thread = {"assessment_id": tree, "question_text": "Anyone?", "opened_by": approver.id}
+    assert client.post("/threads/", headers=approver.headers, json=thread).status_code == 404
+    assert _rows(tree) == (1, 2, 1, 1)
+
+
+def test_purge_counts_only_rows_it_removed(client, monkeypatch, owner, tree):
+    monkeypatch.setattr(config, "SOFT_DELETE", True)
+    client.delete(f"/assessments/{tree}", headers=owner.headers)
+    assert client.portal.call(purge.purge_assessment, async_engine, tree) == 5
+    assert client.portal.call(purge.purge_assessment, async_engine, tree) == 0
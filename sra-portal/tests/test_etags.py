@@ -0,0 +1,48 @@
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import User
+from conftest import unique_email
+
+
+def _revalidate(client, url, account, etag, **headers):
+    return client.get(url, headers={**account.headers, "If-None-Match": etag, **headers})
+
+
+def test_listings_change_with_user_emails(client, owner, approver, assessment):
+    thread = client.post("/threads/", headers=approver.headers, json={
+        "assessment_id": assessment["id"], "question_text": "Retention?", "opened_by": approver.id,
+    }).json()
+    client.post("/threads/comment", headers=approver.headers,
+                json={"thread_id": thread["id"], "author_id": approver.id, "body": "Please confirm"})
+    urls = [f"/assessments/?approver_user_id={approver.id}", f"/threads/?assessment_id={assessment['id']}",
+            f"/threads/{thread['id']}/comments"]
+    etags = [client.get(url, headers=owner.headers).headers["ETag"] for url in urls]
+
+    with Session(engine) as session:
+        session.get(User, approver.id).email = new_email = unique_email("approver")
+        session.commit()
+
+    for url, etag in zip(urls, etags):
+        response = _revalidate(client, url, owner, etag)
+        assert response.status_code == 200, url
+        assert new_email in response.text
+
+
+def test_not_modified_keeps_the_compressed_etag(client, owner, approver, make_assessment):
+    for i in range(20):
+        make_assessment(owner, approver, f"Compressed listing {i}")
+    url = "/assessments/"
+    response = client.get(url, headers={**owner.headers, "Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    not_modified = _revalidate(client, url, owner, etag, **{"Accept-Encoding": "gzip"})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    plain = client.get(url, headers={**owner.headers, "Accept-Encoding": "identity"})
+    assert "-gzip" not in plain.headers["ETag"]
+    assert _revalidate(client, url, owner, plain.headers["ETag"],
+                       **{"Accept-Encoding": "identity"}).headers["ETag"] == plain.headers["ETag"]
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import config, events
+from app.database import async_engine, engine
+from app.models import AssessmentEvent
+
+
+async def _replay(assessment_id, after_id):
+    async with AsyncSession(async_engine) as session:
+        return await events.replay(session, assessment_id, after_id)
+
+
+async def _latest_id():
+    async with AsyncSession(async_engine) as session:
+        return await events.latest_id(session)
+
+
+async def _next(subscription, timeout=5):
+    return await asyncio.wait_for(subscription.queue.get(), timeout)
+
+
+def _open_thread(client, approver, assessment, question="Retention?"):
+    return client.post("/threads/", headers=approver.headers, json={
+        "assessment_id": assessment["id"], "question_text": question, "opened_by": approver.id,
+    }).json()
+
+
+def test_writes_are_logged_in_commit_order(client, approver, assessment):
+    before = client.portal.call(_latest_id)
+    thread = _open_thread(client, approver, assessment)
+    client.post("/threads/comment", headers=approver.headers,
+                json={"thread_id": thread["id"], "author_id": approver.id, "body": "Please confirm"})
+    client.post(f"/threads/{thread['id']}/end", headers=approver.headers)
+
+    logged = client.portal.call(_replay, assessment["id"], before)
+    assert [event.type for event in logged] == ["thread_opened", "comment_added", "thread_resolved"]
+    assert [event.id for event in logged] == sorted(event.id for event in logged)
+    assert json.loads(logged[1].data)["body"] == "Please confirm"
+    assert client.portal.call(_latest_id) >= logged[-1].id
+
+
+def test_a_reconnect_resumes_after_its_last_event_id(client, approver, assessment):
+    first = _open_thread(client, approver, assessment, "First?")
+    second = _open_thread(client, approver, assessment, "Second?")
+    logged = client.portal.call(_replay, assessment["id"], 0)
+    first_id = next(event.id for event in logged if json.loads(event.data)["id"] == first["id"])
+
+    # Any worker, or this one after a restart, serves the rest from the log
+    resumed = client.portal.call(_replay, assessment["id"], first_id)
+    assert [json.loads(event.data)["id"] for event in resumed] == [second["id"]]
+
+
+def test_subscribers_of_every_worker_get_the_event(client, approver, assessment):
+    horizon = client.portal.call(_latest_id)
+    local = client.portal.call(events.hub.subscribe, assessment["id"], horizon, horizon)
+    other_worker = events.EventHub()
+    remote = other_worker.subscribe(assessment["id"], horizon, horizon)
+    try:
+        thread = _open_thread(client, approver, assessment)
+        # The app's listener is woken by the commit
+        event = client.portal.call(_next, local)
+        assert event.type == "thread_opened" and json.loads(event.data)["id"] == thread["id"]
+        # Another process finds it in the log
+        client.portal.call(other_worker.poll, async_engine)
+        assert client.portal.call(_next, remote).id == event.id
+    finally:
+        client.portal.call(events.hub.unsubscribe, local)
+
+
+def test_old_events_are_pruned(client, assessment):
+    old = datetime.utcnow() - timedelta(seconds=config.EVENT_RETENTION_SECONDS + 60)
+    with engine.begin() as conn:
+        conn.execute(insert(AssessmentEvent), [{
+            "id": -assessment["id"], "assessment_id": assessment["id"], "type": "status_changed",
+            "data": "{}", "created_at": old,
+        }])
+    assert client.portal.call(events.prune, async_engine) >= 1
+    assert client.portal.call(_replay, assessment["id"], -assessment["id"] - 1) == []
@@ -0,0 +1,93 @@
+"""
+Migrations from a database made by the first release, on the configured backend:
+a new SQLite file, or a scratch schema of the PostgreSQL test database.
+"""
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, create_engine, inspect, text,
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app import config, migrations
+
+# The tables as the first release created them, before the startup patching added columns
+first_release = MetaData()
+Table("user", first_release,
+      Column("id", Integer, primary_key=True), Column("email", String, nullable=False, unique=True, index=True),
+      Column("password_hash", String, nullable=False), Column("role", String(9), nullable=False))
+Table("assessment", first_release,
+      Column("id", Integer, primary_key=True), Column("title", String, nullable=False),
+      Column("owner_user_id", Integer, ForeignKey("user.id"), nullable=False),
+      Column("status", String(17), nullable=False, index=True), Column("created_at", DateTime, nullable=False))
+Table("questionthread", first_release,
+      Column("id", Integer, primary_key=True), Column("assessment_id", Integer, nullable=False, index=True),
+      Column("question_text", String, nullable=False), Column("opened_by", Integer, nullable=False),
+      Column("status", String, nullable=False, index=True), Column("created_at", DateTime, nullable=False))
+Table("threadcomment", first_release,
+      Column("id", Integer, primary_key=True), Column("thread_id", Integer, nullable=False, index=True),
+      Column("author_id", Integer, nullable=False), Column("body", String, nullable=False),
+      Column("created_at", DateTime, nullable=False))
+Table("screeninganswer", first_release,
+      Column("id", Integer, primary_key=True), Column("assessment_id", Integer, nullable=False, index=True),
+      Column("question_text", String, nullable=False), Column("answer", Boolean, nullable=False),
+      Column("notes", String, nullable=False), Column("created_at", DateTime, nullable=False),
+      Column("updated_at", DateTime))
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """Migration engine on an empty database of the configured backend."""
+    url = make_url(config.DATABASE_URL)
+    if url.get_backend_name() == "sqlite":
+        yield migrations.migration_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        return
+    schema = f"legacy_{uuid.uuid4().hex[:12]}"
+    admin = create_engine(url, poolclass=NullPool)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    try:
+        yield create_engine(url, poolclass=NullPool, connect_args={"options": f"-csearch_path={schema}"})
+    finally:
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+
+def test_upgrade_from_the_first_release(legacy_engine):
+    now = datetime(2024, 5, 1)
+    tables = first_release.tables
+    with legacy_engine.begin() as conn:
+        first_release.create_all(conn)
+        conn.execute(tables["user"].insert(), [
+            {"id": 1, "email": "owner@example.com", "password_hash": "x", "role": "owner"},
+        ])
+        conn.execute(tables["assessment"].insert(), [
+            {"id": 1, "title": "Legacy", "owner_user_id": 1, "status": "screening", "created_at": now},
+        ])
+        conn.execute(tables["screeninganswer"].insert(), [{
+            "id": 1, "assessment_id": 1, "answer": True, "notes": "", "created_at": now,
+            "question_text": "Does the system collect any Personal information from individuals?",
+        }])
+        conn.execute(tables["questionthread"].insert(), [
+            {"id": 1, "assessment_id": 1, "question_text": "Why?", "opened_by": 1, "status": "open",
+             "created_at": now},
+        ])
+        conn.execute(tables["threadcomment"].insert(), [
+            {"id": 1, "thread_id": 1, "author_id": 1, "body": "Because", "created_at": now},
+        ])
+
+    assert migrations.upgrade(legacy_engine) == [version for version, _, _ in migrations.MIGRATIONS]
+
+    with legacy_engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION
+        assert migrations.missing_indexes(conn) == []
+        columns = {column["name"] for column in inspect(conn).get_columns("assessment")}
+        assert {"approver_user_id", "is_new", "deleted_at"} <= columns
+        row = conn.execute(text("SELECT is_new, deleted_at FROM assessment WHERE id = 1")).one()
+        assert row.is_new and row.deleted_at is None
+        answer = conn.execute(text("SELECT question_id, question_text FROM screeninganswer")).one()
+        assert answer.question_id == 1 and answer.question_text is None
+        assert conn.execute(text("SELECT count(*) FROM threadcomment")).scalar() == 1
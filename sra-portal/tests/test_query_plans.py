@@ -0,0 +1,61 @@
+"""
+Query-plan regression tests (SQLite only).
+
+Every route is called once against a synthetic database and every statement it
+runs becomes a test of its own (bench/check_query_plans.py, which also checks
+larger databases stand-alone). A statement fails when its EXPLAIN QUERY PLAN
+scans a table or sorts in a temp B-tree, unless check_query_plans.ACCEPTED
+says why that is fine. The routes are called while the tests are collected,
+since the statements they run are the test parameters.
+"""
+import pytest
+from sqlalchemy.engine import make_url
+
+import check_query_plans as plans
+from app import config
+
+PLAN_ASSESSMENTS = 2000  # without ANALYZE statistics, SQLite plans the same at any size
+SQLITE = make_url(config.DATABASE_URL).get_backend_name() == "sqlite"
+
+pytestmark = pytest.mark.skipif(not SQLITE, reason="EXPLAIN QUERY PLAN checks are SQLite's")
+
+_captured = []
+
+
+def _capture():
+    """(Recorder, failures) of one run over every route, made on first use."""
+    if not _captured:
+        from app.database import async_engine, engine
+        from app.main import app
+        owners, approver = plans.prepare(engine, PLAN_ASSESSMENTS)
+        _captured.append(plans.capture(app, async_engine, owners, approver))
+    return _captured[0]
+
+
+def pytest_generate_tests(metafunc):
+    if "statement" not in metafunc.fixturenames:
+        return
+    params = []
+    if SQLITE:
+        recorder, _ = _capture()
+        for (route, caller), statements in sorted(recorder.statements.items()):
+            for n, (statement, parameters) in enumerate(statements.items(), 1):
+                params.append(pytest.param(route, caller, statement, parameters, id=f"{route} as {caller} #{n}"))
+    metafunc.parametrize("route,caller,statement,parameters", params)
+
+
+@pytest.fixture(scope="module")
+def plan_conn():
+    from app.database import engine
+    with engine.connect() as conn:
+        yield conn
+
+
+def test_plan(plan_conn, route, caller, statement, parameters):
+    findings, plan = plans.plan_findings(plan_conn, route, caller, statement, parameters)
+    assert not findings, "\n".join([" ".join(statement.split()), *(f"    {step}" for step in plan)])
+
+
+def test_every_route_runs_without_n_plus_one():
+    _, failures = _capture()
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,40 @@
+import pytest
+
+from app import config, ratelimit
+from conftest import PASSWORD, unique_email
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """A fresh limiter: 3 failed sign-ins per account, 20 calls per client IP."""
+    monkeypatch.setattr(config, "AUTH_RATE_LIMIT", True)
+    monkeypatch.setattr(config, "AUTH_BURST_PER_ACCOUNT", 3)
+    monkeypatch.setattr(config, "AUTH_BURST_PER_IP", 20)
+    monkeypatch.setattr(ratelimit, "auth_limiter", ratelimit.AuthLimiter())
+
+
+def _login(client, email, password=PASSWORD):
+    return client.post("/auth/login", data={"username": email, "password": password})
+
+
+def test_failed_sign_ins_lock_the_account(client, limits, owner):
+    assert [_login(client, owner.email, "0" * 64).status_code for _ in range(3)] == [401] * 3
+    locked = _login(client, owner.email)
+    assert locked.status_code == 429
+    assert int(locked.headers["Retry-After"]) >= 1
+
+
+def test_successful_sign_ins_spend_only_the_ip_bucket(client, limits, owner):
+    assert [_login(client, owner.email).status_code for _ in range(5)] == [200] * 5
+
+
+def test_registering_with_an_email_does_not_lock_its_account(client, limits, owner):
+    for _ in range(5):
+        response = client.post("/auth/register", json={"email": owner.email, "password": PASSWORD, "role": "owner"})
+        assert response.status_code == 400
+    assert _login(client, owner.email).status_code == 200
+
+
+def test_one_client_ip_is_limited_across_accounts(client, limits):
+    statuses = [_login(client, unique_email("nobody")).status_code for _ in range(21)]
+    assert statuses == [401] * 20 + [429]
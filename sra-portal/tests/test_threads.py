@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def thread(client, approver, assessment):
+    response = client.post("/threads/", headers=approver.headers, json={
+        "assessment_id": assessment["id"], "question_id": 3, "question_text": "Health data?", "opened_by": approver.id,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_open_thread(client, owner, approver, assessment, thread):
+    assert thread["status"] == "open"
+    assert thread["question_id"] == 3 and thread["catalog_version"] == 1
+
+    threads = client.get(f"/threads/?assessment_id={assessment['id']}", headers=owner.headers).json()
+    assert [(t["id"], t["opener_email"]) for t in threads] == [(thread["id"], approver.email)]
+
+
+def test_only_approvers_open_threads_on_existing_assessments(client, owner, approver, assessment):
+    body = {"assessment_id": assessment["id"], "question_text": "Why?", "opened_by": owner.id}
+    assert client.post("/threads/", headers=owner.headers, json=body).status_code == 403
+    missing = {**body, "assessment_id": 999999999, "opened_by": approver.id}
+    assert client.post("/threads/", headers=approver.headers, json=missing).status_code == 404
+
+
+def test_comments_in_order_with_authors(client, owner, approver, thread):
+    for author, text in ((owner, "Only sick days"), (approver, "Which system holds them?")):
+        response = client.post("/threads/comment", headers=author.headers,
+                               json={"thread_id": thread["id"], "author_id": author.id, "body": text})
+        assert response.status_code == 200
+        assert response.json()["body"] == text
+
+    comments = client.get(f"/threads/{thread['id']}/comments", headers=owner.headers).json()
+    assert [(c["body"], c["author_email"]) for c in comments] == [
+        ("Only sick days", owner.email), ("Which system holds them?", approver.email),
+    ]
+
+
+def test_comment_on_missing_thread(client, owner):
+    response = client.post("/threads/comment", headers=owner.headers,
+                           json={"thread_id": 999999999, "author_id": owner.id, "body": "Hello?"})
+    assert response.status_code == 404
+
+
+def test_end_thread(client, owner, approver, thread):
+    assert client.post(f"/threads/{thread['id']}/end", headers=owner.headers).status_code == 403
+    response = client.post(f"/threads/{thread['id']}/end", headers=approver.headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "resolved"
+    assert response.json()["opener_email"] == approver.email
+    assert client.post("/threads/999999999/end", headers=approver.headers).status_code == 404
+
+
+def test_thread_listing_etag_moves_with_new_threads(client, owner, approver, assessment, thread):
+    url = f"/threads/?assessment_id={assessment['id']}"
+    etag = client.get(url, headers=owner.headers).headers["ETag"]
+    assert client.get(url, headers={**owner.headers, "If-None-Match": etag}).status_code == 304
+    client.post(f"/threads/{thread['id']}/end", headers=approver.headers)
+    assert client.get(url, headers={**owner.headers, "If-None-Match": etag}).status_code == 200